@@ -0,0 +1,112 @@
+"""
+Load test of the built-in server, comparing the single and thread serving modes.
+内置服务器的负载测试，比较 single 和 thread 两种服务模式。
+
+Run from the tracker_collector directory, like the collector itself:
+与收集器本身一样，在 tracker_collector 目录下运行：
+
+    PYTHONPATH=..:. python -m test.benchmark_server [--clients 32] [--requests 200] [--size 65536]
+"""
+from argparse import ArgumentParser
+from http.client import HTTPConnection
+from os.path import join
+from socket import create_connection
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from threading import Barrier, Thread
+from time import perf_counter, sleep
+from unittest.mock import patch
+
+from tracker_collector import server
+from tracker_collector.server import Snapshot, create_server
+
+
+def slow_client(port: int, seconds: float):
+    """
+    Open a connection and send an incomplete request, like a client on a bad network.
+    打开连接并发送不完整的请求，模拟网络较差的客户端。
+    """
+    with create_connection(('127.0.0.1', port)) as sock:
+        sock.sendall(b'GET /all HTTP/1.1\r\n')
+        sleep(seconds)
+
+
+def client(port: int, requests: int, keep_alive: bool, barrier: Barrier, latencies: list[float]):
+    """
+    Send requests one after another and record the latency of each.
+    逐个发送请求并记录每个请求的延迟。
+    """
+    barrier.wait()
+    connection = HTTPConnection('127.0.0.1', port, timeout=30)
+    for _ in range(requests):
+        start = perf_counter()
+        connection.request('GET', '/all')
+        response = connection.getresponse()
+        response.read()
+        if not keep_alive or response.will_close:
+            connection.close()
+        latencies.append(perf_counter() - start)
+    connection.close()
+
+
+def benchmark(mode: str, clients: int, requests: int, slow: float) -> tuple[float, float, float]:
+    """
+    Benchmark one serving mode.
+    对一种服务模式进行基准测试。
+
+    :return: Requests per second, p50 and p99 latency in milliseconds.
+             每秒请求数，以及以毫秒为单位的 p50 和 p99 延迟。
+    """
+    httpd = create_server(('127.0.0.1', 0), mode)
+    port = httpd.server_address[1]
+    Thread(target=httpd.serve_forever, daemon=True).start()
+
+    latencies: list[float] = []
+    barrier = Barrier(clients + 1)
+    threads = [Thread(target=client, args=(port, requests, mode == 'thread', barrier, latencies))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+
+    if slow:
+        Thread(target=slow_client, args=(port, slow), daemon=True).start()
+        sleep(0.05)
+
+    barrier.wait()
+    start = perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+
+    httpd.shutdown()
+    httpd.server_close()
+
+    percentiles = quantiles(latencies, n=100)
+    return len(latencies) / elapsed, percentiles[49] * 1000, percentiles[98] * 1000
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--size', type=int, default=64 * 1024, help='size of the tracker list in bytes')
+    parser.add_argument('--slow', type=float, default=0.5,
+                        help='seconds a slow client holds an incomplete request, 0 disables it')
+    args = parser.parse_args()
+
+    directory = TemporaryDirectory()
+    snapshot = Snapshot(join(directory.name, 'tracker.txt'))
+    with open(snapshot.file_path, 'wb') as f:
+        f.write(b'udp://tracker.example.com:80/announce\n' * (args.size // 38))
+
+    with directory, patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}), \
+            patch.object(server.HTTPRequestHandler, 'log_message', lambda *_: None):
+        print(f'{args.clients} clients x {args.requests} requests, {args.size} bytes, slow client {args.slow}s')
+        print(f'{"mode":<8}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for mode in ('single', 'thread'):
+            rate, p50, p99 = benchmark(mode, args.clients, args.requests, args.slow)
+            print(f'{mode:<8}{rate:>10.0f}{p50:>10.2f}{p99:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
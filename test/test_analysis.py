@@ -1,8 +1,15 @@
 import unittest
+from os import utime
+from os.path import join
+from pickle import dumps, loads
+from tempfile import TemporaryDirectory
+from builtins import compile as compile_source
 from unittest.mock import patch
 from re import compile
 
-from tracker_collector.analysis import Analysis, Split, Regex
+from tracker_collector.cache import ResultCache
+from tracker_collector.analysis import (Analysis, Split, Regex, Script, ScriptFile, ScriptRegistry,
+                                        IncrementalSplit, IncrementalRegex)
 
 
 class TestAnalysis(unittest.TestCase):
@@ -60,6 +67,74 @@ class TestAnalysis(unittest.TestCase):
         self.assertEqual({'data_one', 'data_two', 'data_three'}, result)
         self.assertIn('test_url method is Split(keyword=keyword)', mock_logger.info.call_args.args[0])
 
+    def test_analyze_with_result_cache(self):
+        """
+        Test that an identical body is not analyzed again.
+        测试相同的响应体不会被再次分析。
+        """
+        analysis = Analysis(ResultCache())
+        analysis.load('test_url', 'SPLIT(keyword)')
+
+        with patch.object(Split, 'analyze', return_value={'data_one'}) as mock_analyze:
+            self.assertEqual({'data_one'}, analysis.analyze('test_url', 'data_one'))
+            self.assertEqual({'data_one'}, analysis.analyze('test_url', 'data_one'))
+            self.assertEqual(1, mock_analyze.call_count)
+
+            analysis.analyze('test_url', 'data_two')
+            self.assertEqual(2, mock_analyze.call_count)
+
+            # A changed method does not reuse the results of the old one
+            # 方法变化后不会复用旧方法的结果
+            analysis.load('test_url', 'SPLIT(other)')
+            analysis.analyze('test_url', 'data_one')
+            self.assertEqual(3, mock_analyze.call_count)
+
+    def test_analysis_seconds(self):
+        """
+        Test that the analysis time is recorded, except for results reused from the cache.
+        测试分析耗时会被记录，但从缓存中复用的结果除外。
+        """
+        for executor in ('serial', 'thread'):
+            analysis = Analysis(ResultCache(), executor=executor)
+            analysis.load('test_url', 'SPLIT(keyword)')
+            with patch('tracker_collector.analysis.ANALYSIS_SECONDS') as mock_seconds:
+                # Closing the pool waits for the callbacks that record the time and fill the cache
+                # 关闭池会等待记录耗时和填充缓存的回调
+                analysis.submit('test_url', 'data_one keyword data_two').result()
+                analysis.close()
+                analysis.submit('test_url', 'data_one keyword data_two').result()
+                self.assertEqual(1, mock_seconds.observe.call_count)
+                self.assertEqual({'method': 'Split'}, mock_seconds.observe.call_args.kwargs)
+
+    def test_submit_with_executors(self):
+        """
+        Test analyzing data in a thread pool and in a process pool.
+        测试在线程池和进程池中分析数据。
+        """
+        for executor in ('serial', 'thread', 'process'):
+            analysis = Analysis(ResultCache(), executor=executor, workers=2)
+            analysis.load('test_url', 'SPLIT(keyword)')
+            try:
+                futures = [analysis.submit('test_url', f'data_one keyword data_{i}') for i in range(4)]
+                self.assertEqual({'data_one', 'data_0', 'data_1', 'data_2', 'data_3'},
+                                 set().union(*(i.result() for i in futures)))
+                self.assertEqual(set(), analysis.submit('unknown_url', 'some data').result())
+            finally:
+                analysis.close()
+
+            # Results computed in the pool are cached as well
+            # 在池中计算的结果同样会被缓存
+            self.assertEqual({'data_one', 'data_0'}, analysis.cache.get('test_url', analysis.cache.digest(
+                'data_one keyword data_0', analysis.signature('test_url'))))
+
+    def test_invalid_executor(self):
+        """
+        Test creating Analysis with an unknown executor.
+        测试使用未知执行器创建 Analysis。
+        """
+        with self.assertRaises(ValueError):
+            Analysis(executor='invalid')
+
     @patch('tracker_collector.analysis.logger')
     def test_analyze_with_no_method(self, mock_logger):
         """
@@ -139,6 +214,30 @@ class TestSplit(unittest.TestCase):
         self.assertEqual({'data_one', 'data_two', 'data_three'}, result)
         self.assertIn('Splitting data using keyword:', mock_logger.debug.call_args.args[0])
 
+    def test_stream_across_chunks(self):
+        """
+        Test splitting data whose keyword and pieces cross chunk boundaries.
+        测试关键字和片段跨越块边界时的分割。
+        """
+        split = Split('SPLIT(||)')
+        self.assertIsInstance(split.incremental(), IncrementalSplit)
+
+        data = 'data_one||data_two||data_three'
+        for size in range(1, len(data) + 1):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertEqual({'data_one', 'data_two', 'data_three'}, set(split.stream(chunks)))
+
+    def test_stream_with_none_as_keyword(self):
+        """
+        Test splitting data by whitespace chunk by chunk.
+        测试逐块按空白字符分割数据。
+        """
+        parser = IncrementalSplit()
+        self.assertEqual([], parser.feed('data_o'))
+        self.assertEqual(['data_one'], parser.feed('ne\ndata_two'))
+        self.assertEqual(['data_two'], parser.feed(' '))
+        self.assertEqual(['data_three'], parser.feed('data_three') + parser.close())
+
 
 class TestRegex(unittest.TestCase):
 
@@ -186,6 +285,156 @@ class TestRegex(unittest.TestCase):
         self.assertEqual(set(), result)
         self.assertIn('Regex data using keyword', mock_logger.debug.call_args.args[0])
 
+    def test_stream_across_chunks(self):
+        """
+        Test matching data whose matches cross chunk boundaries.
+        测试匹配跨越块边界时的正则提取。
+        """
+        regex = Regex(r'REGEX(udp://[\w.:]+/announce)')
+        self.assertIsInstance(regex.incremental(), IncrementalRegex)
+
+        data = 'a udp://one.example.com:80/announce b udp://two.example.com:6969/announce'
+        for size in range(1, len(data) + 1):
+            chunks = [data[i:i + size] for i in range(0, len(data), size)]
+            self.assertEqual({'udp://one.example.com:80/announce', 'udp://two.example.com:6969/announce'},
+                             set(regex.stream(chunks)))
+
+    def test_stream_yields_early(self):
+        """
+        Test that finished matches are returned before the data ends.
+        测试已完成的匹配在数据结束前即被返回。
+        """
+        parser = Regex('REGEX((.*?) keyword)').incremental()
+        self.assertEqual(['data_one'], parser.feed('data_one keyword data_t'))
+        self.assertEqual([], parser.feed('wo keyw'))
+        self.assertEqual(['data_two'], parser.feed('ord') + parser.close())
+
+
+SCRIPT = """# -*- coding:utf-8 -*-
+# @name: words
+# @author: Sun
+
+# CODE
+from re import compile
+
+PATTERN = compile(r'\\S+')
+
+
+def analysis(text: str) -> set[str]:
+    return set(PATTERN.findall(text)) | {'%s'}
+"""
+
+
+class TestScript(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = join(self.directory.name, 'words.py')
+        self.write('v1', 1_000_000)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, version: str, mtime: int):
+        """
+        Write the test script with a fixed modification time.
+        以固定的修改时间写入测试脚本。
+        """
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(SCRIPT % version)
+        utime(self.path, (mtime, mtime))
+
+    def test_compile_once(self):
+        """
+        Test that a script is compiled once and its imports are visible to analysis.
+        测试脚本只被编译一次，且其导入在 analysis 中可见。
+        """
+        with patch('tracker_collector.analysis.compile_source', wraps=compile_source) as mock_compile:
+            script = Script(f'SCRIPT({self.path})')
+            self.assertEqual('words', script.keyword)
+            self.assertEqual({'data_one', 'data_two', 'v1'}, script.analyze('data_one data_two'))
+            self.assertEqual({'data_one', 'v1'}, script.analyze('data_one'))
+            self.assertEqual(1, mock_compile.call_count)
+
+    def test_recompile_when_modified(self):
+        """
+        Test that a script is compiled again after its file changes.
+        测试脚本文件变化后会被重新编译。
+        """
+        script = Script(f'SCRIPT({self.path})')
+        self.assertEqual({'v1'}, script.analyze(''))
+        signature = script.signature()
+
+        self.write('v2', 2_000_000)
+        self.assertEqual({'v2'}, script.analyze(''))
+
+        # The cached results of the old script are not reused
+        # 不会复用旧脚本的缓存结果
+        self.assertNotEqual(signature, script.signature())
+
+    def test_pickle(self):
+        """
+        Test that a script method can be pickled after it has been compiled.
+        测试脚本方法在编译后仍可被序列化。
+        """
+        script = Script(f'SCRIPT({self.path})')
+        script.analyze('')
+        self.assertEqual({'data_one', 'v1'}, loads(dumps(script)).analyze('data_one'))
+
+
+class TestScriptRegistry(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        for name in ('one', 'two'):
+            with open(join(self.directory.name, f'{name}.py'), 'w', encoding='utf-8') as f:
+                f.write(SCRIPT.replace('words', name) % name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lazy_lookup(self):
+        """
+        Test that nothing is read before the first lookup and code is read only when needed.
+        测试第一次查找之前不读取任何文件，且代码仅在需要时读取。
+        """
+        with patch('tracker_collector.analysis.ScriptFile', wraps=ScriptFile) as mock_file:
+            registry = ScriptRegistry(self.directory.name)
+            mock_file.assert_not_called()
+
+            self.assertIn('one', registry)
+            self.assertNotIn('three', registry)
+
+        script = registry['one']
+        self.assertIs(script, registry['one'])
+        self.assertIsNone(script._code)
+        self.assertEqual({'data_one', 'one'}, set(script.load()('data_one')))
+
+    def test_index(self):
+        """
+        Test building the index and ignoring it once it is out of date.
+        测试建立索引，并在索引过期后忽略它。
+        """
+        ScriptRegistry(self.directory.name).build_index()
+
+        with patch.object(ScriptRegistry, '_scan') as mock_scan:
+            registry = ScriptRegistry(self.directory.name)
+            self.assertEqual({'one': 'one.py', 'two': 'two.py'}, registry.index)
+            mock_scan.assert_not_called()
+
+        utime(join(self.directory.name, 'one.py'), (1_000_000, 1_000_000))
+        with patch.object(ScriptRegistry, '_scan', return_value={}) as mock_scan:
+            ScriptRegistry(self.directory.name).index
+            mock_scan.assert_called_once()
+
+    def test_malformed_index(self):
+        """
+        Test that a malformed index falls back to scanning the directory.
+        测试格式错误的索引会回退到扫描目录。
+        """
+        for content in ('[]', '{}', '{"files": [], "scripts": {}}'):
+            with open(join(self.directory.name, ScriptRegistry.INDEX), 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.assertEqual({'one': 'one.py', 'two': 'two.py'}, ScriptRegistry(self.directory.name).index)
+
 
 if __name__ == '__main__':
     unittest.main()
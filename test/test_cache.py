@@ -0,0 +1,108 @@
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from tracker_collector.cache import SourceCache, ResultCache
+
+
+class TestSourceCache(unittest.TestCase):
+    def test_headers_after_commit(self):
+        """
+        Test that validators are only sent once the trackers are committed.
+        测试只有在追踪器提交之后才发送校验器。
+        """
+        cache = SourceCache()
+        cache.stage('test_url', '"v1"', 'Mon, 01 Jan 2024 00:00:00 GMT')
+        self.assertEqual({}, cache.headers('test_url'))
+        self.assertIsNone(cache.trackers('test_url'))
+
+        cache.commit('test_url', {'udp://tracker.example.com:80/announce'})
+        self.assertEqual({'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+                         cache.headers('test_url'))
+        self.assertEqual({'udp://tracker.example.com:80/announce'}, cache.trackers('test_url'))
+
+    def test_persistence(self):
+        """
+        Test saving the cache to disk and loading it again.
+        测试将缓存保存到磁盘并重新加载。
+        """
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'cache.json')
+
+            cache = SourceCache(path)
+            cache.stage('test_url', '"v1"')
+            cache.commit('test_url', {'udp://tracker.example.com:80/announce'})
+            cache.save()
+
+            cache = SourceCache(path)
+            self.assertEqual({'If-None-Match': '"v1"'}, cache.headers('test_url'))
+            self.assertEqual({'udp://tracker.example.com:80/announce'}, cache.trackers('test_url'))
+
+    def test_forget(self):
+        """
+        Test that a forgotten URL sends no validators and has no trackers.
+        测试被遗忘的 URL 不再发送校验器，也没有追踪器。
+        """
+        cache = SourceCache()
+        cache.stage('test_url', '"v1"')
+        cache.commit('test_url', {'udp://tracker.example.com:80/announce'})
+
+        cache.forget('test_url')
+        self.assertEqual({}, cache.headers('test_url'))
+        self.assertIsNone(cache.trackers('test_url'))
+
+    def test_method(self):
+        """
+        Test that trackers analyzed with another method are not reused.
+        测试不会复用由其他方法分析出的追踪器。
+        """
+        cache = SourceCache()
+        cache.stage('test_url', '"v1"')
+        cache.commit('test_url', {'udp://tracker.example.com:80/announce'}, 'Split(keyword=None)')
+        self.assertEqual({'udp://tracker.example.com:80/announce'}, cache.trackers('test_url', 'Split(keyword=None)'))
+        self.assertIsNone(cache.trackers('test_url', 'Regex(keyword=udp)'))
+
+        cache.check('test_url', 'Split(keyword=None)')
+        self.assertEqual({'If-None-Match': '"v1"'}, cache.headers('test_url'))
+        cache.check('test_url', 'Regex(keyword=udp)')
+        self.assertEqual({}, cache.headers('test_url'))
+
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used result is evicted first.
+        测试最近最少使用的结果最先被淘汰。
+        """
+        cache = ResultCache(size=2)
+        cache.put('url_one', cache.digest('data'), {'one'})
+        cache.put('url_two', cache.digest('data'), {'two'})
+
+        # Touch url_one so that url_two becomes the least recently used
+        # 访问 url_one，使 url_two 成为最近最少使用的结果
+        self.assertEqual({'one'}, cache.get('url_one', cache.digest('data')))
+        cache.put('url_three', cache.digest('data'), {'three'})
+
+        self.assertIsNone(cache.get('url_two', cache.digest('data')))
+        self.assertEqual({'one'}, cache.get('url_one', cache.digest('data')))
+        self.assertEqual({'three'}, cache.get('url_three', cache.digest('data')))
+        self.assertIsNone(cache.get('url_one', cache.digest('other data')))
+
+    def test_persistence(self):
+        """
+        Test saving the cache to disk and loading it again.
+        测试将缓存保存到磁盘并重新加载。
+        """
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'result.json')
+
+            cache = ResultCache(file_path=path)
+            cache.put('test_url', cache.digest('data'), {'one', 'two'})
+            cache.save()
+
+            cache = ResultCache(file_path=path)
+            self.assertEqual({'one', 'two'}, cache.get('test_url', cache.digest('data')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,9 @@
 # AUTHOR: Sun
 
 import unittest
+from configparser import NoOptionError, NoSectionError
 
-from tracker_collector.config import Config
+from tracker_collector.config import Config, DEFAULTS, STRUCTURE
 
 data = """
 [base]
@@ -198,6 +199,41 @@ class TestConfig(unittest.TestCase):
         self.assertEqual('SPLIT()', config.tracker_another.method)
         self.assertEqual({'Authorization': 'Bearer token12345'}, config.tracker_another.headers)
 
+    def test_config_with_defaults(self):
+        """
+        Test that options missing from an older configuration file fall back to their defaults.
+        测试旧配置文件中缺失的选项使用其默认值。
+        """
+        # Every default belongs to an option in STRUCTURE and is valid for its type
+        # 每个默认值都对应 STRUCTURE 中的一个选项，且符合其类型
+        empty = Config('')
+        for section, options in DEFAULTS.items():
+            for option in options:
+                self.assertIn(option, STRUCTURE[section])
+                empty.get(section.replace('*', 'missing'), option)
+
+        # Required options without a default still raise
+        # 没有默认值的必填选项仍然抛出异常
+        with self.assertRaises(NoOptionError):
+            Config('[base]\n').get('base', 'tracker')
+        with self.assertRaises(NoSectionError):
+            Config('[base]\n').get('tracker_missing', 'url')
+
+        config = Config(data)
+
+        # Options the file sets are not overridden
+        # 文件中设置的选项不会被覆盖
+        self.assertEqual(10, config.get('request', 'timeout'))
+
+        # Missing options and sections fall back to the defaults, which keep new features off
+        # 缺失的选项和节使用默认值，新功能保持关闭
+        self.assertEqual('thread', config.get('request', 'engine'))
+        self.assertEqual(0, config.request.retries)
+        self.assertFalse(config['probe.enable'])
+        self.assertFalse(config.get('interval', 'adaptive'))
+        self.assertEqual(2.0, config.get('interval', 'factor'))
+        self.assertEqual('', config.get('history', 'file'))
+        self.assertEqual([], config.get('base', 'plugin'))
 
 if __name__ == '__main__':
     unittest.main()
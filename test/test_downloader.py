@@ -1,9 +1,124 @@
 import unittest
+from asyncio import TimeoutError as AsyncTimeoutError
 from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from gzip import compress
+from threading import Lock, Thread
+from time import monotonic, sleep
+from zlib import compress as deflate
 from unittest.mock import patch
+from urllib.error import HTTPError
 from urllib.request import Request
 
-from tracker_collector.download import Downloader
+from tracker_collector.analysis import IncrementalSplit
+from tracker_collector.cache import SourceCache
+from tracker_collector.download import Downloader, AsyncDownloader, CircuitBreaker, CircuitOpen, DeadlineExceeded, \
+    HostLimiter, NotModified, TokenBucket
+
+BODY = b'udp://tracker.example.com:80/announce\nhttp://tracker.example.org/announce'
+ETAG = '"v1"'
+
+
+class TrackerListHandler(BaseHTTPRequestHandler):
+    """
+    A local HTTP/1.1 server handler that serves a tracker list
+    提供追踪器列表的本地 HTTP/1.1 服务器处理器
+    """
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+    failures = 0
+    in_flight = 0
+    peak = 0
+    lock = Lock()
+
+    def setup(self):
+        TrackerListHandler.connections += 1
+        super().setup()
+
+    def do_GET(self):
+        if self.path == '/list':
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+                self.send_header('ETag', ETAG)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.send_header('ETag', ETAG)
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        elif self.path == '/chunked':
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in (BODY[:10], BODY[10:]):
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+
+        elif self.path in ('/gzip', '/deflate'):
+            body = compress(BODY) if self.path == '/gzip' else deflate(BODY)
+            self.send_response(200)
+            self.send_header('Content-Encoding', self.path[1:])
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        elif self.path == '/slow':
+            # Record how many slow requests are served at the same time
+            # 记录同时处理的慢请求数量
+            with TrackerListHandler.lock:
+                TrackerListHandler.in_flight += 1
+                TrackerListHandler.peak = max(TrackerListHandler.peak, TrackerListHandler.in_flight)
+            sleep(0.2)
+            with TrackerListHandler.lock:
+                TrackerListHandler.in_flight -= 1
+
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        elif self.path == '/drip':
+            # Send a chunk now and then, so that no single read times out
+            # 时不时发送一个数据块，使任何一次读取都不会超时
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for _ in range(50):
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(BODY), BODY))
+                    self.wfile.flush()
+                    sleep(0.1)
+                self.wfile.write(b'0\r\n\r\n')
+            except ConnectionError:
+                pass
+
+        elif self.path == '/flaky':
+            # Fail until the configured number of failures is used up
+            # 在用完设定的失败次数之前一直失败
+            if TrackerListHandler.failures > 0:
+                TrackerListHandler.failures -= 1
+                self.send_error(503)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        elif self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/list')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        else:
+            self.send_error(404)
+
+    def log_message(self, format_, *args):
+        pass
 
 
 class TestDownloader(unittest.TestCase):
@@ -41,6 +156,424 @@ class TestDownloader(unittest.TestCase):
         self.assertEqual(len(futures), 1)
         self.assertIs(futures[0], mock_future)
 
+    def test_content_encoding(self):
+        """
+        Test decoding a gzip body and recording the transfer statistic
+        测试解码 gzip 响应体并记录传输统计
+        """
+        server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/gzip'
+
+        downloader = Downloader()
+        try:
+            downloader.get(url)
+            result, _ = next(downloader.complete())
+            self.assertEqual(BODY.decode(), result)
+            self.assertEqual('gzip', downloader.statistics[url].encoding)
+            self.assertEqual(len(BODY), downloader.statistics[url].decompressed)
+        finally:
+            downloader.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_not_modified(self):
+        """
+        Test conditional requests with a source cache
+        测试使用来源缓存发送条件请求
+        """
+        server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/list'
+
+        cache = SourceCache()
+        downloader = Downloader(cache=cache)
+        try:
+            downloader.get(url)
+            result, _ = next(downloader.complete())
+            self.assertEqual(BODY.decode(), result)
+            cache.commit(url, {'udp://tracker.example.com:80/announce'})
+
+            downloader.get(url)
+            result, _ = next(downloader.complete())
+            self.assertIsInstance(result, NotModified)
+        finally:
+            downloader.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_retry(self):
+        """
+        Test that temporary server errors are retried and other errors are not
+        测试服务器临时错误会被重试，而其他错误不会
+        """
+        server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+
+        downloader = Downloader(retries=2, backoff=0.01)
+        try:
+            TrackerListHandler.failures = 2
+            self.assertEqual(BODY.decode(), downloader.fetch(f'{base}/flaky'))
+
+            TrackerListHandler.failures = 3
+            result = downloader.fetch(f'{base}/flaky')
+            self.assertIsInstance(result, HTTPError)
+            self.assertEqual(503, result.code)
+            TrackerListHandler.failures = 0
+
+            with patch('tracker_collector.download.sleep') as mock_sleep:
+                self.assertEqual(404, downloader.fetch(f'{base}/missing').code)
+                mock_sleep.assert_not_called()
+
+            # Read timeouts of the async engine are retried on every Python version
+            # 异步引擎的读取超时在所有 Python 版本上都会被重试
+            self.assertTrue(downloader._retryable(AsyncTimeoutError()))
+        finally:
+            downloader.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_circuit_breaker(self):
+        """
+        Test that a host which keeps failing is skipped without sending requests
+        测试持续失败的主机被跳过，且不会发送请求
+        """
+        # Nothing listens on the port once the server is closed
+        # 服务器关闭后该端口上没有任何监听
+        server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        url = f'http://127.0.0.1:{server.server_port}/list'
+        server.server_close()
+
+        downloader = Downloader(retries=5, backoff=0.01, breaker=CircuitBreaker(2, 60))
+        try:
+            with patch.object(downloader, '_attempt', wraps=downloader._attempt) as attempt:
+                self.assertIsInstance(downloader.fetch(url), OSError)
+                self.assertEqual(2, attempt.call_count)
+
+                self.assertIsInstance(downloader.fetch(url), CircuitOpen)
+                self.assertEqual(2, attempt.call_count)
+        finally:
+            downloader.close()
+
+    def test_host_limit(self):
+        """
+        Test that a host with a busy slot does not hold up requests to other hosts
+        测试名额已满的主机不会阻碍发往其他主机的请求
+        """
+        TrackerListHandler.peak = 0
+        server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        # The same server under two host names
+        # 同一服务器的两个主机名
+        slow = f'http://127.0.0.1:{server.server_port}/slow'
+        other = f'http://localhost:{server.server_port}/list'
+
+        downloader = Downloader(workers=2, limiter=HostLimiter(slots=1))
+        try:
+            downloader.get(slow, slow, slow, other)
+            order = [request.full_url for _, request in downloader.complete()]
+
+            self.assertEqual(other, order[0])
+            self.assertEqual(1, TrackerListHandler.peak)
+        finally:
+            downloader.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_deadline(self):
+        """
+        Test that a slow-drip response is cancelled at the deadline while the other results are kept
+        测试缓慢发送的响应在截止时间被取消，而其他结果被保留
+        """
+        server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_port}'
+
+        downloader = Downloader()
+        try:
+            start = monotonic()
+            self.assertIsInstance(downloader.fetch(f'{base}/drip', timeout=0.3), DeadlineExceeded)
+            self.assertLess(monotonic() - start, 2)
+
+            downloader.get(f'{base}/list', f'{base}/drip')
+            results = {request.full_url: result for result, request in downloader.complete(timeout=0.5)}
+            self.assertEqual(BODY.decode(), results[f'{base}/list'])
+            self.assertIsInstance(results[f'{base}/drip'], DeadlineExceeded)
+            self.assertEqual({}, downloader._target_requests)
+
+            # The cancelled requests stop at their next chunk
+            # 被取消的请求在下一个数据块处停止
+            sleep(0.5)
+            self.assertEqual(set(), downloader._cancelled)
+        finally:
+            downloader.close()
+            server.shutdown()
+            server.server_close()
+
+
+class TestHostLimiter(unittest.TestCase):
+    def test_token_bucket(self):
+        """
+        Test that a full bucket allows a burst, then tokens are added at the rate
+        测试满桶允许突发请求，之后令牌按速率加入
+        """
+        with patch('tracker_collector.download.monotonic', return_value=100.0) as clock:
+            bucket = TokenBucket(rate=2, burst=2)
+            self.assertEqual(0, bucket.take())
+            self.assertEqual(0, bucket.take())
+            self.assertAlmostEqual(0.5, bucket.take())
+
+            clock.return_value = 100.5
+            self.assertEqual(0, bucket.take())
+
+    def test_slots(self):
+        """
+        Test that each host has its own slots
+        测试每个主机拥有各自的名额
+        """
+        limiter = HostLimiter(slots=2)
+        self.assertEqual(0, limiter.acquire('a'))
+        self.assertEqual(0, limiter.acquire('a'))
+        self.assertEqual(float('inf'), limiter.acquire('a'))
+        self.assertEqual(0, limiter.acquire('b'))
+
+        limiter.release('a')
+        self.assertEqual(0, limiter.acquire('a'))
+        self.assertFalse(HostLimiter().enabled)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_open_and_close(self):
+        """
+        Test that consecutive failures open the circuit of a host until the cooldown ends or the host answers
+        测试连续失败会打开主机的断路器，直到冷却结束或主机应答
+        """
+        breaker = CircuitBreaker(threshold=2, cooldown=60)
+        breaker.failure('a')
+        self.assertTrue(breaker.allow('a'))
+        breaker.failure('a')
+        self.assertFalse(breaker.allow('a'))
+        self.assertTrue(breaker.allow('b'))
+
+        with patch('tracker_collector.download.monotonic', return_value=float('inf')):
+            self.assertTrue(breaker.allow('a'))
+
+        breaker.success('a')
+        self.assertTrue(breaker.allow('a'))
+        breaker.failure('a')
+        self.assertTrue(breaker.allow('a'))
+
+        # A threshold of 0 never opens the circuit
+        # 阈值为 0 时从不打开断路器
+        breaker = CircuitBreaker(threshold=0)
+        for _ in range(10):
+            breaker.failure('a')
+        self.assertTrue(breaker.allow('a'))
+
+    def test_settle(self):
+        """
+        Test that deadlines count as failures, answers as successes and local errors as neither
+        测试截止超时计为失败，应答计为成功，本地错误两者都不计
+        """
+        downloader = Downloader(breaker=CircuitBreaker(threshold=2, cooldown=60))
+        request = Request('http://a/list')
+        try:
+            downloader._settle(request, DeadlineExceeded(request.full_url), 0)
+            downloader._settle(request, ValueError('local'), 0)
+            downloader._settle(request, DeadlineExceeded(request.full_url), 0)
+            self.assertFalse(downloader.breaker.allow('a'))
+
+            downloader._settle(request, NotModified(request.full_url), 0)
+            self.assertTrue(downloader.breaker.allow('a'))
+        finally:
+            downloader.close()
+
+
+class TestAsyncDownloader(unittest.TestCase):
+    def setUp(self):
+        TrackerListHandler.connections = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), TrackerListHandler)
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.downloader = AsyncDownloader(timeout=5, workers=2)
+
+    def tearDown(self):
+        self.downloader.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_and_complete(self):
+        """
+        Test downloading bodies framed by Content-Length and chunked encoding
+        测试下载以 Content-Length 和分块编码分帧的响应体
+        """
+        self.downloader.get(f'{self.base}/list', f'{self.base}/chunked')
+        results = {request.full_url: result for result, request in self.downloader.complete()}
+
+        self.assertEqual(BODY.decode(), results[f'{self.base}/list'])
+        self.assertEqual(BODY.decode(), results[f'{self.base}/chunked'])
+
+    def test_submit_and_result(self):
+        """
+        Test sending requests without waiting and collecting them later, without a thread per request
+        测试发送请求而不等待并稍后获取结果，无需每个请求占用一个线程
+        """
+        sent = [self.downloader.submit(f'{self.base}/list'), self.downloader.submit(f'{self.base}/drip')]
+        self.assertEqual(BODY.decode(), self.downloader.result(*sent[0], timeout=5))
+        self.assertIsInstance(self.downloader.result(*sent[1], timeout=0.3), DeadlineExceeded)
+
+    def test_close_pending(self):
+        """
+        Test that closing cancels the requests still in flight instead of destroying them
+        测试关闭时取消仍在进行的请求，而不是将其销毁
+        """
+        downloader = AsyncDownloader(timeout=5)
+        _, future = downloader.submit(f'{self.base}/drip')
+        sleep(0.1)
+        downloader.close()
+        self.assertTrue(future.cancelled())
+        self.assertTrue(downloader._loop.is_closed())
+
+    def test_content_encoding(self):
+        """
+        Test decoding gzip and deflate bodies and recording the transfer statistic
+        测试解码 gzip 和 deflate 响应体并记录传输统计
+        """
+        self.downloader.get(f'{self.base}/gzip', f'{self.base}/deflate')
+        for result, request in self.downloader.complete():
+            self.assertEqual(BODY.decode(), result)
+
+            statistic = self.downloader.statistics[request.full_url]
+            self.assertEqual(request.full_url.rsplit('/', 1)[1], statistic.encoding)
+            self.assertEqual(len(BODY), statistic.decompressed)
+            self.assertNotEqual(statistic.compressed, statistic.decompressed)
+
+    def test_stream(self):
+        """
+        Test parsing the body while it is downloaded
+        测试在下载的同时解析响应体
+        """
+        self.downloader.get(f'{self.base}/chunked', f'{self.base}/gzip', parser=IncrementalSplit)
+        for result, request in self.downloader.complete():
+            self.assertEqual(set(BODY.decode().split()), result)
+
+            # The time spent in the parser is recorded as the analysis time of a streamed source
+            # 在解析器中花费的时间被记录为流式来源的分析时间
+            self.assertGreater(self.downloader.statistics[request.full_url].parse, 0)
+
+    def test_fetch(self):
+        """
+        Test fetching one source as text or as undecoded bytes
+        测试以文本或未解码字节的形式下载一个来源
+        """
+        self.assertEqual(BODY.decode(), self.downloader.fetch(f'{self.base}/gzip'))
+        self.assertEqual(BODY, self.downloader.fetch(f'{self.base}/deflate', decode=False))
+        self.assertEqual({}, self.downloader._target_requests)
+
+    def test_keep_alive(self):
+        """
+        Test that sequential requests to one host reuse the pooled connection
+        测试对同一主机的连续请求复用连接池中的连接
+        """
+        for _ in range(3):
+            self.downloader.get(f'{self.base}/list')
+            for result, _ in self.downloader.complete():
+                self.assertEqual(BODY.decode(), result)
+
+        self.assertEqual(1, TrackerListHandler.connections)
+
+    def test_redirect_and_error(self):
+        """
+        Test following redirects and returning HTTP errors as results
+        测试跟随重定向，以及将HTTP错误作为结果返回
+        """
+        self.downloader.get(f'{self.base}/redirect', f'{self.base}/missing')
+        results = {request.full_url: result for result, request in self.downloader.complete()}
+
+        self.assertEqual(BODY.decode(), results[f'{self.base}/redirect'])
+        self.assertIsInstance(results[f'{self.base}/missing'], HTTPError)
+        self.assertEqual(404, results[f'{self.base}/missing'].code)
+
+    def test_retry(self):
+        """
+        Test that temporary server errors are retried
+        测试服务器临时错误会被重试
+        """
+        self.downloader.retries = 2
+        self.downloader.backoff = 0.01
+
+        TrackerListHandler.failures = 2
+        self.assertEqual(BODY.decode(), self.downloader.fetch(f'{self.base}/flaky'))
+
+        TrackerListHandler.failures = 3
+        self.assertEqual(503, self.downloader.fetch(f'{self.base}/flaky').code)
+        TrackerListHandler.failures = 0
+
+    def test_host_limit(self):
+        """
+        Test the slots and the rate limit of a host, while requests to other hosts go on
+        测试主机的名额和速率限制，同时发往其他主机的请求照常进行
+        """
+        TrackerListHandler.peak = 0
+        self.downloader.limiter = HostLimiter(slots=1, rate=20, burst=1)
+        slow = f'{self.base}/slow'
+        other = self.base.replace('127.0.0.1', 'localhost') + '/list'
+
+        start = monotonic()
+        self.downloader.get(slow, slow, slow, other)
+        order = [request.full_url for _, request in self.downloader.complete()]
+
+        self.assertEqual(other, order[0])
+        self.assertEqual(1, TrackerListHandler.peak)
+        self.assertGreaterEqual(monotonic() - start, 0.6)
+
+    def test_rate_limit(self):
+        """
+        Test that requests to a host wait for the tokens of its bucket
+        测试发往同一主机的请求等待其令牌桶中的令牌
+        """
+        self.downloader.limiter = HostLimiter(rate=5, burst=1)
+
+        start = monotonic()
+        self.downloader.get(*[f'{self.base}/list'] * 3)
+        for result, _ in self.downloader.complete():
+            self.assertEqual(BODY.decode(), result)
+        self.assertGreaterEqual(monotonic() - start, 0.35)
+
+    def test_deadline(self):
+        """
+        Test that a slow-drip response is cancelled at the deadline
+        测试缓慢发送的响应在截止时间被取消
+        """
+        start = monotonic()
+        self.assertIsInstance(self.downloader.fetch(f'{self.base}/drip', timeout=0.3), DeadlineExceeded)
+        self.assertLess(monotonic() - start, 2)
+
+        # The cancelled request released its slot of the semaphore
+        # 被取消的请求释放了其信号量名额
+        self.downloader.get(f'{self.base}/list', f'{self.base}/list')
+        for result, _ in self.downloader.complete(timeout=5):
+            self.assertEqual(BODY.decode(), result)
+
+    def test_not_modified(self):
+        """
+        Test conditional requests with a source cache
+        测试使用来源缓存发送条件请求
+        """
+        cache = SourceCache()
+        self.downloader.cache = cache
+
+        self.downloader.get(f'{self.base}/list')
+        result, _ = next(self.downloader.complete())
+        self.assertEqual(BODY.decode(), result)
+        cache.commit(f'{self.base}/list', {'udp://tracker.example.com:80/announce'})
+
+        self.downloader.get(f'{self.base}/list')
+        result, _ = next(self.downloader.complete())
+        self.assertIsInstance(result, NotModified)
+
 
 if __name__ == '__main__':
     unittest.main()
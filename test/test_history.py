@@ -0,0 +1,100 @@
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from tracker_collector.history import History, ALIVE
+
+
+class TestHistory(unittest.TestCase):
+    def setUp(self):
+        self.history = History()
+
+    def tearDown(self):
+        self.history.close()
+
+    def test_recent(self):
+        """
+        Test querying the trackers seen in the latest cycles.
+        测试查询最近若干周期中出现过的追踪器。
+        """
+        for trackers in ({'udp://a:1', 'udp://b:1'}, {'udp://a:1'}, {'udp://a:1', 'udp://c:1'}):
+            self.history.update(self.history.begin(), trackers)
+
+        self.assertEqual({'udp://a:1', 'udp://c:1'}, self.history.recent(1))
+        self.assertEqual({'udp://a:1', 'udp://c:1'}, self.history.recent(2))
+        self.assertEqual({'udp://a:1', 'udp://b:1', 'udp://c:1'}, self.history.recent(3))
+        self.assertEqual(set(), self.history.recent(1, ALIVE))
+
+    def test_incremental(self):
+        """
+        Test that unchanged trackers are not written again, and a tracker that comes back opens a new interval.
+        测试未变化的追踪器不会被再次写入，重新出现的追踪器会开启新的区间。
+        """
+        connection = self.history._connection
+        for trackers in ({'udp://a:1', 'udp://b:1'}, {'udp://a:1', 'udp://b:1'}, {'udp://a:1'}, {'udp://a:1', 'udp://b:1'}):
+            self.history.update(self.history.begin(), trackers)
+
+        rows = connection.execute('SELECT url, start, stop FROM interval ORDER BY url, start').fetchall()
+        self.assertEqual([('udp://a:1', 1, None), ('udp://b:1', 1, 2), ('udp://b:1', 4, None)], rows)
+
+    def test_skipped_cycle(self):
+        """
+        Test that cycles without probes do not count as cycles the trackers were alive in.
+        测试未进行探测的周期不会被视为追踪器存活的周期。
+        """
+        first = self.history.begin()
+        self.history.update(first, {'udp://a:1'}, ALIVE)
+        self.history.begin()
+        third = self.history.begin()
+        self.history.update(third, set(), ALIVE)
+
+        rows = self.history._connection.execute('SELECT url, start, stop FROM interval').fetchall()
+        self.assertEqual([('udp://a:1', first, first)], rows)
+        self.assertEqual({'udp://a:1'}, self.history.recent(2, ALIVE))
+        self.assertEqual(set(), self.history.recent(1, ALIVE))
+
+    def test_tracker(self):
+        """
+        Test getting when a tracker was first seen, last seen and last alive.
+        测试获取追踪器首次被收集、最后一次被收集以及最后一次存活的时间。
+        """
+        with TemporaryDirectory() as directory:
+            history = History(join(directory, 'history.sqlite3'))
+            first = history.begin()
+            history.update(first, {'udp://a:1'})
+            history.update(first, {'udp://a:1'}, ALIVE)
+            history.update(history.begin(), {'udp://a:1'})
+            history.close()
+
+            history = History(join(directory, 'history.sqlite3'))
+            times = history._connection.execute('SELECT time FROM cycle ORDER BY id').fetchall()
+            self.assertEqual({'first_seen': times[0][0], 'last_seen': times[1][0], 'last_alive': times[0][0]},
+                             history.tracker('udp://a:1'))
+            self.assertEqual({'first_seen': None, 'last_seen': None, 'last_alive': None},
+                             history.tracker('udp://b:1'))
+            history.close()
+
+    def test_retention(self):
+        """
+        Test that cycles beyond the retention and the intervals that ended in them are deleted.
+        测试超出保留数量的周期以及在其中结束的区间会被删除。
+        """
+        history = History(retention=2)
+        for trackers in ({'udp://a:1', 'udp://b:1'}, {'udp://a:1'}, {'udp://a:1'}, {'udp://a:1'}):
+            history.update(history.begin(), trackers)
+
+        connection = history._connection
+        self.assertEqual([(3,), (4,)], connection.execute('SELECT id FROM cycle ORDER BY id').fetchall())
+        self.assertEqual([('udp://a:1', 1, None)],
+                         connection.execute('SELECT url, start, stop FROM interval').fetchall())
+        self.assertEqual({'udp://a:1'}, history.recent(10))
+
+        # The first seen time of a long-lived tracker is the oldest kept cycle
+        # 长期存在的追踪器的首次收集时间为最早保留的周期
+        oldest = connection.execute('SELECT time FROM cycle WHERE id = 3').fetchone()[0]
+        self.assertEqual(oldest, history.tracker('udp://a:1')['first_seen'])
+        history.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from tracker_collector.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        """
+        Test that counters add up per label value.
+        测试计数器按标签值累加。
+        """
+        counter = Counter('requests_total', 'Requests.', ('path',), registry=self.registry)
+        counter.inc(path='/a')
+        counter.inc(2, path='/a')
+        counter.inc(path='/b')
+
+        self.assertEqual(
+            '# HELP requests_total Requests.\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{path="/a"} 3.0\n'
+            'requests_total{path="/b"} 1.0\n',
+            self.registry.render().decode('utf-8'))
+
+    def test_gauge(self):
+        """
+        Test that gauges keep the last value, and metrics without labels have no selector.
+        测试仪表保留最后的值，且没有标签的指标不带选择器。
+        """
+        gauge = Gauge('trackers', 'Trackers.', registry=self.registry)
+        gauge.set(5)
+        gauge.set(3)
+        self.assertIn('\ntrackers 3.0\n', self.registry.render().decode('utf-8'))
+
+    def test_histogram(self):
+        """
+        Test that histogram buckets are cumulative and end with +Inf.
+        测试直方图的桶是累积的，并以 +Inf 结尾。
+        """
+        histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0), registry=self.registry)
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        lines = self.registry.render().decode('utf-8').splitlines()[2:]
+        self.assertEqual([
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1.0"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            'latency_seconds_sum 2.65',
+            'latency_seconds_count 4',
+        ], lines)
+
+    def test_labels(self):
+        """
+        Test that label values are escaped and label names are checked.
+        测试标签值被转义且标签名称会被检查。
+        """
+        counter = Counter('errors_total', 'Errors.', ('source',), registry=self.registry)
+        counter.inc(source='http://a/"b"\\c\n')
+        self.assertIn('errors_total{source="http://a/\\"b\\"\\\\c\\n"} 1.0', self.registry.render().decode('utf-8'))
+
+        with self.assertRaises(ValueError):
+            counter.inc(path='/a')
+
+
+if __name__ == '__main__':
+    unittest.main()
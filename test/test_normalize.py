@@ -0,0 +1,58 @@
+import unittest
+
+from tracker_collector.normalize import Normalizer
+
+
+class TestNormalizer(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = Normalizer()
+
+    def test_canonical(self):
+        """
+        Test that canonical trackers are kept as they are.
+        测试规范形式的追踪器保持不变。
+        """
+        for tracker in ('udp://tracker.example.com:80/announce',
+                        'http://tracker.example.com:6969/announce',
+                        'https://tracker.example.com/announce?passkey=abc',
+                        'wss://tracker.example.com'):
+            self.assertEqual(tracker, self.normalizer.normalize(tracker))
+
+    def test_normalize(self):
+        """
+        Test that different spellings of a tracker have the same canonical form.
+        测试同一追踪器的不同写法具有相同的规范形式。
+        """
+        cases = {
+            'UDP://Tracker.Example.com:80/announce': 'udp://tracker.example.com:80/announce',
+            'udp://tracker.example.com:80/announce/': 'udp://tracker.example.com:80/announce',
+            '  udp://tracker.example.com:80/announce  # backup': 'udp://tracker.example.com:80/announce',
+            'http://tracker.example.com:80/announce#top': 'http://tracker.example.com/announce',
+            'https://tracker.example.com:443/': 'https://tracker.example.com',
+            'udp://[2001:DB8::1]:6969/announce': 'udp://[2001:db8::1]:6969/announce',
+        }
+        for tracker, expected in cases.items():
+            self.assertEqual(expected, self.normalizer.normalize(tracker), tracker)
+
+    def test_reject(self):
+        """
+        Test that comments, non-tracker schemes and malformed trackers are dropped.
+        测试注释、非追踪器协议以及格式错误的追踪器被丢弃。
+        """
+        for tracker in ('', '   ', '# comment', 'ftp://tracker.example.com/announce', 'tracker.example.com',
+                        'udp://tracker.example.com/announce', 'http://tracker.example.com:99999/announce',
+                        'http:///announce'):
+            self.assertIsNone(self.normalizer.normalize(tracker), tracker)
+
+    def test_call(self):
+        """
+        Test deduplicating a set of trackers.
+        测试对一组追踪器去重。
+        """
+        trackers = {'udp://Tracker.example.com:80/announce', 'udp://tracker.example.com:80/announce/',
+                    'udp://tracker.example.com:80/announce', '# comment', ''}
+        self.assertEqual({'udp://tracker.example.com:80/announce'}, self.normalizer(trackers))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from threading import Event, Timer
+from time import sleep
+
+from tracker_collector.pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+    def test_run(self):
+        """
+        Test that every item passes through every stage and dropped items stop early.
+        测试每个数据项都经过所有阶段，被丢弃的数据项提前停止。
+        """
+        results = []
+        pipeline = Pipeline([
+            Stage('double', lambda x: x * 2, workers=4),
+            Stage('odd', lambda x: x if x % 4 else None, workers=2),
+            Stage('collect', results.append),
+        ])
+        pipeline.run(range(100))
+
+        self.assertEqual(sorted(i * 2 for i in range(100) if i % 2), sorted(results))
+        self.assertEqual([100, 100, 50], [stage.processed for stage in pipeline.stages])
+        self.assertEqual(50, pipeline.stages[1].dropped)
+        self.assertEqual(0, pipeline.stages[2].dropped)
+        self.assertEqual(3, len(pipeline.report()))
+
+    def test_backpressure(self):
+        """
+        Test that a slow stage blocks the previous ones instead of letting its queue grow.
+        测试慢速阶段会阻塞之前的阶段，而不是让其队列无限增长。
+        """
+        release = Event()
+
+        def slow(item):
+            release.wait()
+            sleep(0.001)
+
+        pipeline = Pipeline([
+            Stage('fast', lambda x: x, workers=2, capacity=2),
+            Stage('slow', slow, capacity=3),
+        ])
+
+        # The slow stage starts only after the queues and the workers in front of it are full
+        # 慢速阶段在其前方的队列和工作线程都已占满之后才开始
+        Timer(0.2, release.set).start()
+        pipeline.run(range(50))
+
+        self.assertEqual(50, pipeline.stages[1].processed)
+        self.assertLessEqual(pipeline.stages[0].peak, 2)
+        self.assertLessEqual(pipeline.stages[1].peak, 3)
+        self.assertGreater(pipeline.stages[0].blocked, 0)
+
+    def test_error(self):
+        """
+        Test that an item failing in one stage is dropped without stopping the pipeline.
+        测试在某一阶段处理失败的数据项被丢弃，而不会中断流水线。
+        """
+        results = []
+        pipeline = Pipeline([
+            Stage('invert', lambda x: 1 / x),
+            Stage('collect', results.append),
+        ])
+        pipeline.run([1, 0, 2])
+
+        self.assertEqual([1.0, 0.5], sorted(results, reverse=True))
+        self.assertEqual(1, pipeline.stages[0].dropped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socket import socket, AF_INET, SOCK_DGRAM
+from struct import pack, unpack
+from threading import Thread
+from time import monotonic
+
+from tracker_collector.probe import Prober, PROTOCOL_ID
+
+
+class AnnounceHandler(BaseHTTPRequestHandler):
+    """
+    Fake HTTP tracker answering every announce with a failure reason
+    对每个 announce 请求都回应失败原因的 HTTP 追踪器
+    """
+
+    def do_GET(self):
+        if not self.path.startswith('/announce?info_hash='):
+            self.send_error(404)
+            return
+
+        body = b'd14:failure reason15:unknown torrente'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_udp(sock: socket):
+    """
+    Fake UDP tracker answering BEP 15 connect requests
+    回应 BEP 15 connect 请求的 UDP 追踪器
+    """
+    while True:
+        try:
+            data, address = sock.recvfrom(2048)
+        except OSError:
+            return
+
+        protocol, action, transaction = unpack('>QII', data)
+        if protocol == PROTOCOL_ID and action == 0:
+            sock.sendto(pack('>IIQ', 0, transaction, 0x1234), address)
+
+
+class TestProber(unittest.TestCase):
+    def setUp(self):
+        self.udp = socket(AF_INET, SOCK_DGRAM)
+        self.udp.bind(('127.0.0.1', 0))
+        Thread(target=serve_udp, args=(self.udp,), daemon=True).start()
+
+        # A UDP port that never answers
+        # 从不回应的 UDP 端口
+        self.silent = socket(AF_INET, SOCK_DGRAM)
+        self.silent.bind(('127.0.0.1', 0))
+
+        self.http = ThreadingHTTPServer(('127.0.0.1', 0), AnnounceHandler)
+        Thread(target=self.http.serve_forever, daemon=True).start()
+
+        self.prober = Prober(timeout=0.5, host_interval=0)
+
+    def tearDown(self):
+        self.udp.close()
+        self.silent.close()
+        self.http.shutdown()
+        self.http.server_close()
+
+    def test_probe(self):
+        """
+        Test that responding trackers get a latency and the others None.
+        测试响应的追踪器得到延迟，其他追踪器得到 None。
+        """
+        alive_udp = f'udp://127.0.0.1:{self.udp.getsockname()[1]}/announce'
+        dead_udp = f'udp://127.0.0.1:{self.silent.getsockname()[1]}/announce'
+        alive_http = f'http://127.0.0.1:{self.http.server_port}/announce'
+        missing_http = f'http://127.0.0.1:{self.http.server_port}/missing'
+
+        results = self.prober.probe([alive_udp, dead_udp, alive_http, missing_http, 'wss://127.0.0.1/announce'])
+
+        self.assertEqual({alive_udp, dead_udp, alive_http, missing_http}, set(results))
+        self.assertLess(results[alive_udp], 0.5)
+        self.assertLess(results[alive_http], 0.5)
+        self.assertIsNone(results[dead_udp])
+        self.assertIsNone(results[missing_http])
+
+    def test_host_interval(self):
+        """
+        Test that probes to the same host are spaced by the host interval.
+        测试对同一主机的探测之间间隔至少为主机间隔。
+        """
+        self.prober.host_interval = 0.1
+        port = self.udp.getsockname()[1]
+        trackers = [f'udp://127.0.0.1:{port}/announce{i}' for i in range(3)]
+
+        start = monotonic()
+        results = self.prober.probe(trackers)
+
+        self.assertGreaterEqual(monotonic() - start, 0.2)
+        self.assertTrue(all(i is not None for i in results.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
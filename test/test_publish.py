@@ -0,0 +1,48 @@
+import unittest
+from os import stat
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from tracker_collector.publish import Publisher
+
+
+class TestPublisher(unittest.TestCase):
+    def test_publish(self):
+        """
+        Test writing the tracker list and skipping unchanged content.
+        测试写入追踪器列表并跳过未变化的内容。
+        """
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'tracker.txt')
+            publisher = Publisher(path)
+
+            self.assertTrue(publisher.publish(['udp://a:1', 'udp://b:1']))
+            with open(path, 'r', encoding='utf-8') as f:
+                self.assertEqual('udp://a:1\nudp://b:1', f.read())
+            inode = stat(path).st_ino
+
+            self.assertFalse(publisher.publish(['udp://a:1', 'udp://b:1']))
+            self.assertEqual(inode, stat(path).st_ino)
+
+            # The file is replaced rather than rewritten in place
+            # 文件被替换，而不是原地重写
+            self.assertTrue(publisher.publish(['udp://b:1', 'udp://c:1']))
+            self.assertNotEqual(inode, stat(path).st_ino)
+            self.assertEqual({'udp://b:1', 'udp://c:1'}, publisher.trackers)
+
+    def test_existing_file(self):
+        """
+        Test that the content of an existing file is not written again after a restart.
+        测试重启后已有文件的内容不会被再次写入。
+        """
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'tracker.txt')
+            Publisher(path).publish(['udp://a:1'])
+
+            publisher = Publisher(path)
+            self.assertEqual({'udp://a:1'}, publisher.trackers)
+            self.assertFalse(publisher.publish(['udp://a:1']))
+
+
+if __name__ == '__main__':
+    unittest.main()
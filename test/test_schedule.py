@@ -0,0 +1,122 @@
+import unittest
+
+from tracker_collector.schedule import Scheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def test_due(self):
+        """
+        Test that only the sources that are due are taken, in order of their due time.
+        测试只取出已到期的来源，并按到期时间排序。
+        """
+        scheduler = Scheduler(100)
+        scheduler.add('b', due=20)
+        scheduler.add('a', due=10)
+        scheduler.add('c', due=30)
+
+        self.assertEqual(10, scheduler.next_due())
+        self.assertEqual(['a', 'b'], scheduler.due(25))
+        self.assertEqual([], scheduler.due(25))
+        self.assertEqual(30, scheduler.next_due())
+
+    def test_adapt(self):
+        """
+        Test that the interval grows for unchanged sources and shrinks for changed ones, within the limits.
+        测试未变化来源的间隔增大、变化来源的间隔缩小，且不超出限制。
+        """
+        scheduler = Scheduler(100, minimum=50, maximum=400, factor=2)
+        scheduler.add('stable', due=0)
+        scheduler.add('volatile', due=0)
+        scheduler.due(0)
+
+        self.assertEqual(200, scheduler.reschedule('stable', False, 1))
+        self.assertEqual(50, scheduler.reschedule('volatile', True, 1))
+        self.assertEqual(['volatile'], scheduler.due(100))
+
+        self.assertEqual(50, scheduler.reschedule('volatile', True, 51))
+        self.assertEqual(['volatile'], scheduler.due(100))
+        self.assertEqual(50, scheduler.reschedule('volatile', None, 101))
+        self.assertEqual(['volatile', 'stable'], scheduler.due(200))
+        self.assertEqual(400, scheduler.reschedule('stable', False, 201))
+        self.assertEqual(400, scheduler.reschedule('stable', False, 401))
+
+    def test_slots(self):
+        """
+        Test that runs are due at the slots of the interval, however long each run takes.
+        测试无论每次运行耗时多久，运行都在间隔的时间槽到期。
+        """
+        scheduler = Scheduler(100, offset=30)
+        scheduler.add('a')
+        scheduler.due()
+
+        # The first fetch is aligned to the next slot
+        # 首次下载对齐到下一个时间槽
+        scheduler.reschedule('a', None, 1045)
+        self.assertEqual(1130, scheduler.next_due())
+
+        # A slow run does not delay the next slot
+        # 缓慢的运行不会推迟下一个时间槽
+        scheduler.due(1130)
+        scheduler.reschedule('a', None, 1199)
+        self.assertEqual(1230, scheduler.next_due())
+
+    def test_missed(self):
+        """
+        Test that missed runs are coalesced into one immediate run, or skipped until the next slot.
+        测试错过的运行被合并为一次立即运行，或被跳过直到下一个时间槽。
+        """
+        coalesce = Scheduler(100, missed='coalesce')
+        skip = Scheduler(100, missed='skip')
+        for scheduler in (coalesce, skip):
+            scheduler.add('a', due=100)
+            scheduler.due(100)
+            scheduler.reschedule('a', None, 350)
+
+        # The slots 200 and 300 were missed
+        # 错过了时间槽 200 和 300
+        self.assertEqual(300, coalesce.next_due())
+        self.assertEqual(400, skip.next_due())
+
+        # The coalesced run returns to the slots
+        # 合并后的运行回到时间槽上
+        coalesce.due(350)
+        coalesce.reschedule('a', None, 360)
+        self.assertEqual(400, coalesce.next_due())
+
+        with self.assertRaises(ValueError):
+            Scheduler(100, missed='never')
+
+    def test_jitter(self):
+        """
+        Test that the delay is bounded by the jitter and shared by the sources of a slot.
+        测试延迟不超过抖动，并由同一时间槽的来源共享。
+        """
+        scheduler = Scheduler(100, jitter=10)
+        for source in ('a', 'b'):
+            scheduler.add(source, due=0)
+        scheduler.due(0)
+        scheduler.reschedule('a', None, 1)
+        scheduler.reschedule('b', None, 2)
+
+        due = scheduler.next_due()
+        self.assertTrue(100 <= due <= 110)
+        self.assertEqual(['a', 'b'], sorted(scheduler.due(due)))
+
+    def test_retain(self):
+        """
+        Test that removed sources are never due again and new sources are due immediately.
+        测试被移除的来源不会再到期，新来源立即到期。
+        """
+        scheduler = Scheduler(100)
+        scheduler.add('a', due=10)
+        scheduler.add('b', due=10)
+        scheduler.retain(['b', 'c'])
+
+        self.assertEqual({'b', 'c'}, set(scheduler.intervals))
+        self.assertEqual(['b'], scheduler.due(10))
+        self.assertEqual(['c'], scheduler.due())
+        self.assertIsNone(scheduler.next_due())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from json import load
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from tracker_collector.score import Scores
+
+
+class TestScores(unittest.TestCase):
+    def test_rank(self):
+        """
+        Test ranking by success rate, then by latency, with unprobed trackers last.
+        测试先按成功率、再按延迟排序，未探测的追踪器排在最后。
+        """
+        scores = Scores(window=4)
+        scores.record({'udp://a:1': 0.2, 'udp://b:1': 0.05, 'udp://c:1': None, 'udp://d:1': 0.01})
+        scores.record({'udp://a:1': 0.2, 'udp://b:1': 0.05, 'udp://c:1': 0.01, 'udp://d:1': None})
+
+        self.assertEqual((1.0, 200.0), scores.score('udp://a:1'))
+        self.assertEqual(['udp://b:1', 'udp://a:1', 'udp://c:1', 'udp://d:1', 'udp://e:1'],
+                         scores.rank(['udp://e:1', 'udp://d:1', 'udp://c:1', 'udp://b:1', 'udp://a:1']))
+
+    def test_window(self):
+        """
+        Test that only the latest probes are used.
+        测试只使用最近的探测结果。
+        """
+        scores = Scores(window=2)
+        for latency in (None, None, 0.1, 0.3):
+            scores.record({'udp://a:1': latency})
+
+        self.assertEqual((1.0, 200.0), scores.score('udp://a:1'))
+
+        scores.retain([])
+        self.assertEqual((0.0, None), scores.score('udp://a:1'))
+
+    def test_persistence(self):
+        """
+        Test writing the sidecar file and loading the samples again.
+        测试写入附属文件并重新加载样本。
+        """
+        with TemporaryDirectory() as directory:
+            path = join(directory, 'score.json')
+            scores = Scores(file_path=path)
+            scores.record({'udp://a:1': 0.1, 'udp://b:1': None})
+            scores.save()
+
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = load(f)
+            self.assertEqual(['udp://a:1', 'udp://b:1'], list(entries))
+            self.assertEqual({'success_rate': 1.0, 'latency_ms': 100.0, 'samples': [100.0]}, entries['udp://a:1'])
+
+            self.assertEqual(scores.score('udp://a:1'), Scores(file_path=path).score('udp://a:1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
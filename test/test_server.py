@@ -0,0 +1,375 @@
+import unittest
+from gzip import decompress
+from http.client import HTTPConnection
+from http.server import HTTPServer
+from socket import create_connection
+from os import utime
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from tracker_collector import server
+from tracker_collector.server import HTTPRequestHandler, KeepAliveHTTPRequestHandler, LimitedThreadingHTTPServer, \
+    Snapshot, Version
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = join(self.directory.name, 'tracker.txt')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content: bytes, mtime: int):
+        with open(self.path, 'wb') as f:
+            f.write(content)
+        utime(self.path, (mtime, mtime))
+
+    def test_update(self):
+        """
+        Test that content swapped in by the collector is served without reading the file.
+        测试收集器换入的内容无需读取文件即可提供。
+        """
+        self.write(b'udp://a:1', 1000)
+        snapshot = Snapshot(self.path)
+        self.assertEqual(b'udp://a:1', snapshot.get().content)
+
+        self.write(b'udp://b:1', 2000)
+        snapshot.update(b'udp://b:1')
+        with patch('builtins.open') as mock_open:
+            self.assertEqual(b'udp://b:1', snapshot.get().content)
+            self.assertEqual(b'udp://b:1', snapshot.get().content)
+        mock_open.assert_not_called()
+
+    @patch.object(server, 'CHECK_INTERVAL', 0)
+    def test_update_during_reload(self):
+        """
+        Test that a reload in progress does not swap the old list back in after an update.
+        测试进行中的重新加载不会在更新之后将旧列表换回。
+        """
+        self.write(b'udp://a:1', 1000)
+        snapshot = Snapshot(self.path)
+        self.write(b'udp://a:1\nudp://b:1', 2000)
+
+        with snapshot._lock:
+            # A reload read the file before the collector wrote it
+            # 重新加载在收集器写入文件之前读取了文件
+            thread = Thread(target=snapshot.update, args=(b'udp://a:1\nudp://b:1', {'b': ['udp://b:1']}))
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            snapshot._views = snapshot.build(b'udp://a:1', 1000)
+        thread.join()
+
+        self.assertEqual(b'udp://a:1\nudp://b:1', snapshot.get().content)
+        self.assertEqual(b'udp://b:1', snapshot.get('source/b').content)
+
+    @patch.object(server, 'CHECK_INTERVAL', 0)
+    def test_reload(self):
+        """
+        Test reloading the file when its mtime changes.
+        测试文件修改时间变化时重新加载文件。
+        """
+        snapshot = Snapshot(self.path)
+        self.assertIsNone(snapshot.get())
+
+        self.write(b'udp://a:1', 1000)
+        self.assertEqual(b'udp://a:1', snapshot.get().content)
+
+        self.write(b'udp://b:1', 2000)
+        self.assertEqual(b'udp://b:1', snapshot.get().content)
+
+    def test_throttle(self):
+        """
+        Test that the mtime is not checked again within the check interval.
+        测试在检查间隔内不会再次检查修改时间。
+        """
+        self.write(b'udp://a:1', 1000)
+        snapshot = Snapshot(self.path)
+        self.assertEqual(b'udp://a:1', snapshot.get().content)
+
+        self.write(b'udp://b:1', 2000)
+        self.assertEqual(b'udp://a:1', snapshot.get().content)
+
+
+class TestVersion(unittest.TestCase):
+    def test_negotiate(self):
+        """
+        Test choosing the content coding from Accept-Encoding.
+        测试根据 Accept-Encoding 选择内容编码。
+        """
+        version = Version(b'udp://tracker.example.com:80/announce\n' * 100, 0)
+        self.assertIn('gzip', version.variants)
+
+        self.assertEqual('identity', version.negotiate(None))
+        self.assertEqual('gzip', version.negotiate('gzip, deflate'))
+        self.assertEqual('identity', version.negotiate('gzip;q=0, deflate'))
+        self.assertEqual('gzip', version.negotiate('*'))
+        self.assertEqual(server.ENCODINGS[0], version.negotiate('gzip, br'))
+        self.assertEqual(version.content, decompress(version.variant('gzip')[0]))
+        self.assertNotEqual(version.variant('gzip')[1], version.variant('identity')[1])
+
+    def test_small(self):
+        """
+        Test that codings that do not make the list smaller are not kept.
+        测试不能使列表变小的编码不会被保留。
+        """
+        version = Version(b'udp://a:1', 0)
+        self.assertEqual({'identity'}, set(version.variants))
+        self.assertEqual('identity', version.negotiate('gzip'))
+
+
+    def test_top(self):
+        """
+        Test slicing the first trackers of the list.
+        测试截取列表中的前若干个追踪器。
+        """
+        version = Version(b'udp://a:1\nudp://b:1\nudp://c:1', 0)
+        self.assertEqual(b'udp://a:1', bytes(version.top(1)[0]))
+        self.assertEqual(b'udp://a:1\nudp://b:1', bytes(version.top(2)[0]))
+        self.assertEqual(version.content, bytes(version.top(10)[0]))
+        self.assertNotEqual(version.top(1)[1], version.top(2)[1])
+        self.assertEqual(b'', bytes(Version(b'', 0).top(3)[0]))
+
+    def test_build(self):
+        """
+        Test building the version of every protocol and source.
+        测试构建每个协议和来源的版本。
+        """
+        views = Snapshot.build(b'udp://a:1\nhttp://b/announce\nudp://c:1', 0, {'example': ['udp://c:1']})
+        self.assertEqual(b'udp://a:1\nudp://c:1', views['udp'].content)
+        self.assertEqual(b'http://b/announce', views['http'].content)
+        self.assertEqual(b'', views['wss'].content)
+        self.assertEqual(b'udp://c:1', views['source/example'].content)
+
+
+class TestHTTPRequestHandler(unittest.TestCase):
+    def test_get(self):
+        """
+        Test serving the snapshot and answering 404 without a tracker list.
+        测试提供快照内容，以及在没有追踪器列表时返回 404。
+        """
+        snapshot = Snapshot('/nonexistent/tracker.txt')
+        httpd = HTTPServer(('127.0.0.1', 0), HTTPRequestHandler)
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{httpd.server_port}/all'
+
+        try:
+            with patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}):
+                with self.assertRaises(HTTPError) as context:
+                    urlopen(url, timeout=5)
+                self.assertEqual(404, context.exception.code)
+
+                snapshot.update(b'udp://a:1')
+                with urlopen(url, timeout=5) as response:
+                    self.assertEqual(b'udp://a:1', response.read())
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_conditional(self):
+        """
+        Test answering 304 to clients that already have the current version.
+        测试对已经拥有当前版本的客户端返回 304。
+        """
+        snapshot = Snapshot('/nonexistent/tracker.txt')
+        snapshot.update(b'udp://a:1')
+        snapshot._checked = float('inf')
+        httpd = HTTPServer(('127.0.0.1', 0), HTTPRequestHandler)
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{httpd.server_port}/all'
+
+        try:
+            with patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}):
+                with urlopen(url, timeout=5) as response:
+                    etag = response.headers['ETag']
+                    last_modified = response.headers['Last-Modified']
+                    self.assertEqual('9', response.headers['Content-Length'])
+                    self.assertEqual('text/plain; charset=utf-8', response.headers['Content-Type'])
+                    self.assertIn('Cache-Control', response.headers)
+
+                for headers in ({'If-None-Match': etag}, {'If-None-Match': f'"other", W/{etag}'},
+                                {'If-Modified-Since': last_modified}):
+                    with self.assertRaises(HTTPError) as context:
+                        urlopen(Request(url, headers=headers), timeout=5)
+                    self.assertEqual(304, context.exception.code)
+                    self.assertEqual(etag, context.exception.headers['ETag'])
+
+                # If-None-Match takes precedence over If-Modified-Since
+                # If-None-Match 优先于 If-Modified-Since
+                headers = {'If-None-Match': '"other"', 'If-Modified-Since': last_modified}
+                with urlopen(Request(url, headers=headers), timeout=5) as response:
+                    self.assertEqual(b'udp://a:1', response.read())
+
+                snapshot.update(b'udp://b:1')
+                with urlopen(Request(url, headers={'If-None-Match': etag}), timeout=5) as response:
+                    self.assertEqual(b'udp://b:1', response.read())
+                    self.assertNotEqual(etag, response.headers['ETag'])
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_compressed(self):
+        """
+        Test serving the gzip variant to clients that accept it.
+        测试向接受 gzip 的客户端提供 gzip 变体。
+        """
+        content = b'udp://tracker.example.com:80/announce\n' * 100
+        snapshot = Snapshot('/nonexistent/tracker.txt')
+        snapshot.update(content)
+        snapshot._checked = float('inf')
+        httpd = HTTPServer(('127.0.0.1', 0), HTTPRequestHandler)
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{httpd.server_port}/all'
+
+        try:
+            with patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}):
+                with urlopen(Request(url, headers={'Accept-Encoding': 'gzip'}), timeout=5) as response:
+                    self.assertEqual('gzip', response.headers['Content-Encoding'])
+                    self.assertEqual('Accept-Encoding', response.headers['Vary'])
+                    body = response.read()
+                    self.assertEqual(int(response.headers['Content-Length']), len(body))
+                    self.assertEqual(content, decompress(body))
+                    etag = response.headers['ETag']
+
+                with self.assertRaises(HTTPError) as context:
+                    urlopen(Request(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}), timeout=5)
+                self.assertEqual(304, context.exception.code)
+
+                # The identity variant has another ETag, so the gzip ETag does not match it
+                # identity 变体具有不同的 ETag，因此 gzip 的 ETag 与其不匹配
+                with urlopen(Request(url, headers={'If-None-Match': etag}), timeout=5) as response:
+                    self.assertIsNone(response.headers['Content-Encoding'])
+                    self.assertEqual(content, response.read())
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+    def test_endpoints(self):
+        """
+        Test the protocol, source and top endpoints.
+        测试协议、来源和排名端点。
+        """
+        snapshot = Snapshot('/nonexistent/tracker.txt')
+        snapshot.update(b'udp://a:1\nhttp://b/announce\nudp://c:1', {'example': ['http://b/announce', 'udp://c:1']})
+        snapshot._checked = float('inf')
+        httpd = HTTPServer(('127.0.0.1', 0), HTTPRequestHandler)
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{httpd.server_port}'
+
+        cases = {
+            '/udp': b'udp://a:1\nudp://c:1',
+            '/https': b'',
+            '/source/example': b'http://b/announce\nudp://c:1',
+            '/top/2': b'udp://a:1\nhttp://b/announce',
+            '/all?format=txt': b'udp://a:1\nhttp://b/announce\nudp://c:1',
+        }
+        try:
+            with patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}):
+                for path, expected in cases.items():
+                    with urlopen(base + path, timeout=5) as response:
+                        self.assertEqual(expected, response.read(), path)
+
+                for path in ('/source/missing', '/top/0', '/top/x', '/ftp'):
+                    with self.assertRaises(HTTPError) as context:
+                        urlopen(base + path, timeout=5)
+                    self.assertEqual(404, context.exception.code, path)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def test_metrics(self):
+        """
+        Test that the metrics endpoint exposes the request metrics of earlier requests.
+        测试指标端点展示之前请求的请求指标。
+        """
+        snapshot = Snapshot('/nonexistent/tracker.txt')
+        snapshot.update(b'udp://a:1')
+        snapshot._checked = float('inf')
+        httpd = HTTPServer(('127.0.0.1', 0), HTTPRequestHandler)
+        Thread(target=httpd.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{httpd.server_port}'
+
+        try:
+            with patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}):
+                urlopen(base + '/udp', timeout=5).read()
+                with self.assertRaises(HTTPError):
+                    urlopen(base + '/ftp', timeout=5)
+
+                with urlopen(base + '/metrics', timeout=5) as response:
+                    self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+                    body = response.read().decode('utf-8')
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+        self.assertIn('# TYPE tracker_collector_fetch_duration_seconds histogram', body)
+        self.assertRegex(body, r'tracker_collector_http_requests_total\{path="udp",status="200"\} [1-9]')
+        self.assertRegex(body, r'tracker_collector_http_requests_total\{path="unknown",status="404"\} [1-9]')
+        self.assertIn('tracker_collector_http_request_duration_seconds_count{path="udp"}', body)
+
+
+class TestLimitedThreadingHTTPServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        snapshot = Snapshot(join(self.directory.name, 'tracker.txt'))
+        with open(snapshot.file_path, 'wb') as f:
+            f.write(b'udp://a:1')
+
+        self.patches = [patch.object(server, 'SNAPSHOT', snapshot), patch.object(server, 'REQUIRE_HEADERS', {}),
+                        patch.object(KeepAliveHTTPRequestHandler, 'timeout', 0.3)]
+        for i in self.patches:
+            i.start()
+
+        self.httpd = LimitedThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHTTPRequestHandler, max_connections=1)
+        Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.port = self.httpd.server_port
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for i in self.patches:
+            i.stop()
+        self.directory.cleanup()
+
+    def test_keep_alive(self):
+        """
+        Test serving several requests over one connection.
+        测试在一个连接上处理多个请求。
+        """
+        connection = HTTPConnection('127.0.0.1', self.port, timeout=5)
+        for _ in range(3):
+            connection.request('GET', '/all')
+            response = connection.getresponse()
+            self.assertEqual(b'udp://a:1', response.read())
+            self.assertFalse(response.will_close)
+        connection.close()
+
+    def test_max_connections(self):
+        """
+        Test that a connection waits while the only slot is held by an idle connection.
+        测试唯一的名额被空闲连接占用时，新连接需要等待。
+        """
+        idle = create_connection(('127.0.0.1', self.port))
+        try:
+            start = perf_counter()
+            connection = HTTPConnection('127.0.0.1', self.port, timeout=5)
+            connection.request('GET', '/all')
+            self.assertEqual(b'udp://a:1', connection.getresponse().read())
+            connection.close()
+
+            # The idle connection is closed after the keep-alive timeout, which frees the slot
+            # 空闲连接在保持连接超时后关闭，从而释放名额
+            self.assertGreaterEqual(perf_counter() - start, 0.25)
+        finally:
+            idle.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,21 +2,54 @@
 # AUTHOR: Sun
 
 from abc import ABC, abstractmethod
-from os.path import exists, isfile, join
+from builtins import compile as compile_source
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from json import dump, load
+from os.path import abspath, dirname, exists, getmtime, isfile, join
 from os import listdir
-from typing import Callable
-from re import compile
+from typing import Callable, Iterable, Iterator
+from re import compile, Match, Pattern
 from logging import getLogger
+from threading import Lock
+from time import perf_counter
 
 from config import Config
+from cache import ResultCache
+from metrics import ANALYSIS_SECONDS
 
 logger = getLogger(__name__)
 
-SCRIPT = {}
+# Directory of the built-in scripts, independent of the working directory
+# 内置脚本所在的目录，与工作目录无关
+SCRIPT_DIRECTORY = join(dirname(abspath(__file__)), 'script')
 
 config = Config()
 plugins = config.get('base', 'plugin')
 
+# Ways to run the analysis methods: on the calling thread, in a thread pool or in a process pool
+# 分析方法的运行方式：在调用线程中、在线程池中或在进程池中
+EXECUTORS = ('serial', 'thread', 'process')
+
+# Methods loaded in a process pool worker, sent once when the worker starts
+# 进程池工作进程中加载的方法，在工作进程启动时发送一次
+_worker_methods: dict[str, Callable] = {}
+
+
+def _init_worker(methods: dict[str, Callable]):
+    """
+    Receive the analysis methods in a process pool worker.
+    在进程池工作进程中接收分析方法。
+    """
+    _worker_methods.update(methods)
+
+
+def _analyze_in_worker(url: str, data: str) -> set[str]:
+    """
+    Analyze data in a process pool worker, compiled scripts stay cached in the worker between calls.
+    在进程池工作进程中分析数据，编译后的脚本在多次调用之间保留在工作进程中。
+    """
+    return _worker_methods[url](data)
+
 
 class Analysis(object):
     """
@@ -24,15 +57,29 @@ class Analysis(object):
     用于使用不同方法处理数据的 Analysis 类。
     """
 
-    def __init__(self):
+    def __init__(self, cache: ResultCache = None, executor: str = 'serial', workers: int = None):
         """
         Initialize the Analysis object.
         初始化 Analysis 对象。
+
+        :param cache: Cache of results keyed by URL and body hash, identical bodies are not analyzed again.
+                      以 URL 和响应体哈希为键的结果缓存，相同的响应体不会被再次分析。
+        :param executor: How submit() runs the methods, one of EXECUTORS.
+                         submit() 运行方法的方式，取值为 EXECUTORS 之一。
+        :param workers: The size of the thread or process pool, None means the number of CPUs.
+                        线程池或进程池的大小，None 表示 CPU 数量。
         """
+        if executor not in EXECUTORS:
+            raise ValueError(f'{executor} is not a valid analysis executor, available: {", ".join(EXECUTORS)}')
 
         # A dictionary mapping URLs to callable methods.
         # 映射 URL 到可调用方法的字典。
         self._method: dict[str, Callable] = {}
+        self.cache = cache
+
+        self.executor = executor
+        self.workers = workers
+        self._executor: Executor | None = None
 
     def load(self, url: str, method: str = None):
         """
@@ -44,6 +91,12 @@ class Analysis(object):
         :param: The name of the method to use.
                 要使用的方法名称。
         """
+        if self.executor == 'process' and self._executor is not None:
+            # Workers received the methods when they started, so restart the pool with the new method
+            # 工作进程在启动时接收方法，因此需要重启进程池以加载新方法
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
         if not method:
             logger.warning(f'{url} method is empty, use default method: SPLIT()')
             # If no method is specified, use the default method, i.e., SPLIT(None)
@@ -104,10 +157,24 @@ class Analysis(object):
                 分析的结果或如果没有找到方法则返回空列表。
         """
         if url in self._method:
-            # If a method is found, log the method and use it to analyze the data
-            # 如果找到方法，记录方法并使用它分析数据
+            if self.cache is None:
+                # If a method is found, log the method and use it to analyze the data
+                # 如果找到方法，记录方法并使用它分析数据
+                logger.info(f'{url} method is {self._method[url]}')
+                return self._run(url, data)
+
+            # Reuse the result if the same body of the same URL has been analyzed before
+            # 如果同一 URL 的相同响应体已被分析过，则复用结果
+            digest = self.cache.digest(data, self.signature(url))
+            result = self.cache.get(url, digest)
+            if result is not None:
+                logger.info(f'{url} body is unchanged, reuse {len(result)} cached trackers')
+                return result
+
             logger.info(f'{url} method is {self._method[url]}')
-            return self._method[url](data)
+            result = self._run(url, data)
+            self.cache.put(url, digest, result)
+            return result
 
         else:
             # If no method is found, log a warning and return an empty list
@@ -115,6 +182,166 @@ class Analysis(object):
             logger.warning(f'{url} method is not found, so the data will be dropped')
             return set()
 
+    def submit(self, url: str, data: str) -> Future:
+        """
+        Analyze data with the configured executor.
+        使用配置的执行器分析数据。
+
+        :param url: The URL associated with a specific analysis method.
+                    与特定分析方法关联的 URL。
+        :param data: The data to be analyzed.
+                     待分析的数据。
+        :return: A Future whose result is the set of trackers.
+                 结果为追踪器集合的 Future 对象。
+        """
+        future = Future()
+
+        if self.executor == 'serial' or url not in self._method:
+            # Analyze on the calling thread
+            # 在调用线程中分析
+            try:
+                future.set_result(self.analyze(url, data))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        digest = None
+        if self.cache is not None:
+            # Reuse the result if the same body of the same URL has been analyzed before
+            # 如果同一 URL 的相同响应体已被分析过，则复用结果
+            digest = self.cache.digest(data, self.signature(url))
+            result = self.cache.get(url, digest)
+            if result is not None:
+                logger.info(f'{url} body is unchanged, reuse {len(result)} cached trackers')
+                future.set_result(result)
+                return future
+
+        logger.info(f'{url} method is {self._method[url]}, submit to {self.executor} pool')
+        start = perf_counter()
+        if self.executor == 'process':
+            # Only the URL and the data are sent, the workers already hold the methods
+            # 只发送 URL 和数据，工作进程已持有分析方法
+            future = self._get_executor().submit(_analyze_in_worker, url, data)
+        else:
+            future = self._get_executor().submit(self._method[url], data)
+
+        if self.cache is not None:
+            def store(done: Future):
+                # Cache the result once the worker finishes
+                # 工作线程或进程完成后缓存结果
+                if not done.cancelled() and done.exception() is None:
+                    self.cache.put(url, digest, done.result())
+
+            future.add_done_callback(store)
+
+        def observe(done: Future):
+            # Record the analysis time, including the wait for a free worker
+            # 记录分析耗时，包括等待空闲工作线程或进程的时间
+            if not done.cancelled():
+                ANALYSIS_SECONDS.observe(perf_counter() - start, method=self.method_type(url))
+
+        future.add_done_callback(observe)
+        return future
+
+    def _run(self, url: str, data: str) -> set[str]:
+        """
+        Analyze data on the calling thread and record how long it took, results reused from the cache are not
+        recorded.
+        在调用线程中分析数据并记录耗时，从缓存中复用的结果不会被记录。
+        """
+        start = perf_counter()
+        result = self._method[url](data)
+        ANALYSIS_SECONDS.observe(perf_counter() - start, method=self.method_type(url))
+        return result
+
+    def _get_executor(self) -> Executor:
+        """
+        Get the thread or process pool, creating it on first use.
+        获取线程池或进程池，在第一次使用时创建。
+        """
+        if self._executor is None:
+            logger.info(f'Create analysis {self.executor} pool with {self.workers or "cpu count"} workers')
+            if self.executor == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                     initargs=(self._method,))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        """
+        Shut down the thread or process pool.
+        关闭线程池或进程池。
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def method_type(self, url: str) -> str:
+        """
+        Get the name of the method type of the given URL, e.g. Split or Regex.
+        获取给定 URL 的方法类型名称，例如 Split 或 Regex。
+
+        :param url: The URL associated with a specific analysis method.
+                    与特定分析方法关联的 URL。
+        :return: The class name of the method, or 'none' if no method is loaded.
+                 方法的类名，若未加载方法则为 'none'。
+        """
+        return type(self._method[url]).__name__ if url in self._method else 'none'
+
+    def signature(self, url: str) -> str:
+        """
+        Get the signature of the method of the given URL, it changes whenever the method would analyze differently.
+        获取给定 URL 的方法签名，方法的分析结果可能不同时签名就会变化。
+
+        :param url: The URL associated with a specific analysis method.
+                    与特定分析方法关联的 URL。
+        :return: The signature, or an empty string if no method is loaded.
+                 签名，若未加载方法则为空字符串。
+        """
+        return self._method[url].signature() if url in self._method else ''
+
+    def streamable(self, url: str) -> bool:
+        """
+        Whether the method of the given URL can analyze data chunk by chunk.
+        给定 URL 的方法是否可以逐块分析数据。
+
+        :param url: The URL associated with a specific analysis method.
+                    与特定分析方法关联的 URL。
+        """
+        return url in self._method and self._method[url].incremental() is not None
+
+    def incremental(self, url: str) -> 'Incremental | None':
+        """
+        Create a new incremental parser for the given URL.
+        为给定的 URL 创建新的增量解析器。
+
+        :param url: The URL associated with a specific analysis method.
+                    与特定分析方法关联的 URL。
+        :return: The incremental parser, or None if the method cannot analyze data chunk by chunk.
+                 增量解析器，若该方法无法逐块分析数据则返回 None。
+        """
+        if url not in self._method:
+            return None
+        return self._method[url].incremental()
+
+    def stream(self, url: str, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Analyze data chunk by chunk, yielding trackers as soon as they are found.
+        逐块分析数据，在找到追踪器后立即产出。
+
+        :param url: The URL associated with a specific analysis method.
+                    与特定分析方法关联的 URL。
+        :param chunks: The data to be analyzed, in chunks.
+                       分块的待分析数据。
+        """
+        if url in self._method:
+            logger.info(f'{url} method is {self._method[url]}, analyze data in stream')
+            yield from self._method[url].stream(chunks)
+
+        else:
+            logger.warning(f'{url} method is not found, so the data will be dropped')
+
 
 class Base(ABC):
     def __init__(self):
@@ -127,6 +354,13 @@ class Base(ABC):
         """
         return f'{self.__class__.__name__}(keyword={self.keyword})'
 
+    def signature(self) -> str:
+        """
+        Return a string that changes whenever the method would analyze differently.
+        返回一个在方法的分析结果可能不同时就会变化的字符串。
+        """
+        return repr(self)
+
     def __call__(self, *args, **kwargs):
         """
         通过调用analyze方法实现相应逻辑
@@ -140,6 +374,55 @@ class Base(ABC):
     def analyze(self, data: str) -> set[str]:
         pass
 
+    def incremental(self) -> 'Incremental | None':
+        """
+        Create an incremental parser, or return None if the method needs the whole data.
+        创建增量解析器，若该方法需要完整数据则返回 None。
+        """
+        return None
+
+    def stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Analyze data chunk by chunk, yielding trackers as soon as they are found.
+        逐块分析数据，在找到追踪器后立即产出。
+
+        :param chunks: The data to be analyzed, in chunks.
+                       分块的待分析数据。
+        """
+        parser = self.incremental()
+        if parser is None:
+            # Methods that need the whole data fall back to buffering
+            # 需要完整数据的方法回退为缓冲全部数据
+            yield from self.analyze(''.join(chunks))
+            return
+
+        for chunk in chunks:
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+
+class Incremental(ABC):
+    """
+    Base class of parsers that receive data chunk by chunk.
+    逐块接收数据的解析器基类。
+    """
+
+    @abstractmethod
+    def feed(self, data: str) -> list[str]:
+        """
+        Feed the next chunk and return the trackers completed by it.
+        输入下一块数据，并返回因此完整的追踪器。
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> list[str]:
+        """
+        Signal the end of the data and return the remaining trackers.
+        标记数据结束，并返回剩余的追踪器。
+        """
+        pass
+
 
 class Split(Base):
     """
@@ -226,6 +509,57 @@ class Split(Base):
         # 使用关键字分割数据，并过滤掉任何空字符串
         return set(i.strip() for i in data.split(self.keyword) if i)
 
+    def incremental(self) -> 'IncrementalSplit':
+        """
+        Create an incremental splitter with the same keyword.
+        创建使用相同关键字的增量分割器。
+        """
+        return IncrementalSplit(self.keyword)
+
+
+class IncrementalSplit(Incremental):
+    """
+    Split data chunk by chunk, keeping the unfinished tail between chunks
+    逐块分割数据，在块之间保留未完成的尾部
+    """
+
+    def __init__(self, keyword: str = None):
+        """
+        Initialize the IncrementalSplit object.
+        初始化 IncrementalSplit 对象。
+
+        :param keyword: The keyword used to split the data, None means any whitespace.
+                        用于分割数据的关键字，None 表示任意空白字符。
+        """
+        self.keyword = keyword
+        self._buffer = ''
+
+    def feed(self, data: str) -> list[str]:
+        """
+        Feed the next chunk and return the pieces completed by it.
+        输入下一块数据，并返回因此完整的片段。
+        """
+        self._buffer += data
+        pieces = self._buffer.split(self.keyword)
+
+        # The last piece may continue in the next chunk, unless the data ends with whitespace
+        # 最后一个片段可能在下一块中继续，除非数据以空白字符结尾
+        if self.keyword is None and self._buffer and self._buffer[-1].isspace():
+            self._buffer = ''
+        else:
+            self._buffer = pieces.pop() if pieces else ''
+
+        return [i.strip() for i in pieces if i]
+
+    def close(self) -> list[str]:
+        """
+        Return the last piece.
+        返回最后一个片段。
+        """
+        pieces = self._buffer.split(self.keyword)
+        self._buffer = ''
+        return [i.strip() for i in pieces if i]
+
 
 class Regex(Base):
     """
@@ -274,6 +608,73 @@ class Regex(Base):
         # 使用正则表达式在数据中找到所有匹配项
         return set(i.strip() for i in self.regex.findall(data) if i)
 
+    def incremental(self) -> 'IncrementalRegex':
+        """
+        Create an incremental matcher with the same regular expression.
+        创建使用相同正则表达式的增量匹配器。
+        """
+        return IncrementalRegex(self.regex)
+
+
+class IncrementalRegex(Incremental):
+    """
+    Match a regular expression chunk by chunk, handling matches that cross chunk boundaries.
+    Anchors such as ^ refer to the start of the retained buffer, not of the whole data.
+    逐块匹配正则表达式，处理跨越块边界的匹配。
+    ^ 等锚点指向保留缓冲区的开头，而非整个数据的开头。
+    """
+
+    # Maximum number of characters kept after the last match, longer matches may be missed
+    # 最后一次匹配后最多保留的字符数，更长的匹配可能被遗漏
+    WINDOW = 64 * 1024
+
+    def __init__(self, regex: Pattern):
+        """
+        Initialize the IncrementalRegex object.
+        初始化 IncrementalRegex 对象。
+
+        :param regex: The compiled regular expression.
+                      已编译的正则表达式。
+        """
+        self.regex = regex
+        self._buffer = ''
+
+    def _value(self, match: Match) -> str:
+        """
+        Get the value of a match in the same way as findall.
+        以与 findall 相同的方式获取匹配的值。
+        """
+        return match.group(1) if self.regex.groups == 1 else match.group()
+
+    def feed(self, data: str) -> list[str]:
+        """
+        Feed the next chunk and return the matches that cannot change any more.
+        输入下一块数据，并返回不会再变化的匹配。
+        """
+        self._buffer += data
+        values = []
+        end = 0
+
+        for match in self.regex.finditer(self._buffer):
+            if match.end() == len(self._buffer):
+                # A match touching the end of the buffer may grow with the next chunk
+                # 触及缓冲区末尾的匹配可能随下一块数据而变长
+                break
+            values.append(self._value(match))
+            end = match.end()
+
+        self._buffer = self._buffer[end:][-self.WINDOW:]
+        return [i.strip() for i in values if i]
+
+    def close(self) -> list[str]:
+        """
+        Return the matches left in the buffer.
+        返回缓冲区中剩余的匹配。
+        """
+        values = [self._value(match) for match in self.regex.finditer(self._buffer)]
+        self._buffer = ''
+        return [i.strip() for i in values if i]
+
 
 class Script(Base):
     """
@@ -322,13 +723,16 @@ class Script(Base):
         :return: A set of strings representing the analysis results.
                  表示分析结果的字符串集合。
         """
-        var = {}
-        # Execute the script's code in a local namespace
-        # 在本地命名空间中执行脚本的代码
-        exec(self.script.code, {}, var)
-        # Call the 'analysis' function from the executed script and return its results
-        # 调用从执行脚本中得到的 'analysis' 函数并返回其结果
-        return set(var['analysis'](data))
+        # Call the 'analysis' function compiled from the script and return its results
+        # 调用从脚本编译得到的 'analysis' 函数并返回其结果
+        return set(self.script.load()(data))
+
+    def signature(self) -> str:
+        """
+        Return the name of the script and the modification time of its file, editing the script changes it.
+        返回脚本名称及其文件的修改时间，编辑脚本会使其变化。
+        """
+        return f'{self!r}@{self.script.mtime}'
 
 
 class Xpath(Base):
@@ -441,29 +845,140 @@ class ScriptFile(object):
             raise FileNotFoundError(f'{file_path} is not found')
 
         self._file_path = file_path
+        self._code: list[str] | None = None
+        self._data = {}
+        self._source: str | None = None
+
+        # The compiled 'analysis' function and the modification time of the file it was compiled from
+        # 已编译的 'analysis' 函数，以及编译时文件的修改时间
+        self._function: Callable | None = None
+        self._mtime: float | None = None
+        self._lock = Lock()
+
+        # Only the metadata header is read here, the code is read when it is needed
+        # 此处只读取元数据头部，代码在需要时才读取
+        self._read_header()
+
+    def _read_header(self):
+        """
+        Read the metadata of the script file, stopping at the '# CODE' line.
+        读取脚本文件的元数据，在 '# CODE' 行处停止。
+        """
+        with open(self._file_path, 'r', encoding='utf-8') as f:
+            self._parse(f)
+
+    def _read(self):
+        """
+        Read the metadata and the code of the script file.
+        读取脚本文件的元数据和代码。
+        """
+        with open(self._file_path, 'r', encoding='utf-8') as f:
+            self._source = f.read()
+
         self._code = []
+        self._parse(self._source.splitlines(), self._code)
+
+    def _parse(self, lines: Iterable[str], code: list[str] = None):
+        """
+        Parse the metadata comments, and collect the code if a list is given.
+        解析元数据注释，若给定列表则收集代码。
+
+        :param lines: The lines of the script file.
+                      脚本文件的各行。
+        :param code: The list that receives the code lines, parsing stops at the code if it is None.
+                     接收代码行的列表，为 None 时在代码处停止解析。
+        """
         comment_description_regex = compile(r'^#\s*@(.*?)\s*:\s*(.*)$')
+        self._data = {}
+        in_code = False
+
+        for line in lines:
+            line = line.rstrip('\r\n')
+            if in_code:
+                # Keep the code after '# CODE' as it is, including indentation
+                # 原样保留 '# CODE' 之后的代码，包括缩进
+                code.append(line)
+                continue
+
+            stripped = line.strip()
+            if stripped == '# CODE' or (stripped and not stripped.startswith('#')):
+                # Scripts without '# CODE' are code from the first non-comment line
+                # 没有 '# CODE' 的脚本从第一个非注释行开始都是代码
+                if code is None:
+                    return
+                in_code = True
+                if stripped != '# CODE':
+                    code.append(line)
+
+            elif stripped.startswith('#'):
+                # Extract metadata from comments
+                # 从注释中提取元数据
+                match = comment_description_regex.match(stripped)
+                if match:
+                    key, value = match.groups()
+                    self._data[key] = value
 
-        with open(self._file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-
-                if not line:
-                    # Skip empty lines
-                    # 跳过空行
-                    continue
-
-                if line.startswith('#'):
-                    # Extract metadata from comments
-                    # 从注释中提取元数据
-                    match = comment_description_regex.match(line)
-                    if match:
-                        key, value = match.groups()
-                        self._data[key] = value
-                else:
-                    # Add non-comment lines to the script code
-                    # 将非注释行添加到脚本代码中
-                    self._code.append(line)
+    @property
+    def mtime(self) -> float | None:
+        """
+        The current modification time of the script file, None if it cannot be read.
+        脚本文件当前的修改时间，无法读取时为 None。
+        """
+        try:
+            return getmtime(self._file_path)
+        except OSError:
+            return None
+
+    def load(self) -> Callable[[str], Iterable[str]]:
+        """
+        Get the 'analysis' function of the script, compiling the file only when it has changed.
+        获取脚本的 'analysis' 函数，仅在文件变化时重新编译。
+
+        :return: The 'analysis' function defined by the script.
+                 脚本定义的 'analysis' 函数。
+        """
+        mtime = getmtime(self._file_path)
+        if self._function is not None and mtime == self._mtime:
+            return self._function
+
+        with self._lock:
+            if self._function is None or mtime != self._mtime:
+                logger.info(f'Compile script {self._file_path}')
+                self._read()
+
+                # Compile the whole file so that tracebacks point at the right lines, and run it once
+                # in its own module namespace, so that imports are visible inside its functions
+                # 编译整个文件，使回溯信息指向正确的行，并在独立的模块命名空间中执行一次，使导入在函数内可见
+                code = compile_source(self._source, self._file_path, 'exec')
+                namespace = {'__name__': f'script.{self._data.get("name", "unknown")}', '__file__': self._file_path}
+                exec(code, namespace)
+
+                if not callable(namespace.get('analysis')):
+                    raise ValueError(f'{self._file_path} does not define an analysis function')
+
+                self._function = namespace['analysis']
+                self._mtime = mtime
+
+        return self._function
+
+    def __getstate__(self):
+        """
+        Drop the compiled function and the lock when pickling, they are rebuilt on demand.
+        序列化时丢弃已编译的函数和锁，它们会按需重建。
+        """
+        state = self.__dict__.copy()
+        state['_function'] = None
+        state['_mtime'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the object and create a new lock.
+        恢复对象并创建新的锁。
+        """
+        self.__dict__.update(state)
+        self._lock = Lock()
 
     def __getitem__(self, item):
         """
@@ -477,6 +992,10 @@ class ScriptFile(object):
         Retrieve metadata as attributes.
         获取元数据作为属性。
         """
+        if item.startswith('_'):
+            # Private and special attributes are never metadata
+            # 私有属性和特殊属性不是元数据
+            raise AttributeError(item)
         return self._data.get(item)
 
     @property
@@ -490,9 +1009,11 @@ class ScriptFile(object):
     @property
     def code(self):
         """
-        Get the compiled code of the script.
-        获取脚本的编译代码。
+        Get the code of the script.
+        获取脚本的代码。
         """
+        if self._code is None:
+            self._read()
         return '\n'.join(self._code)
 
     def get(self, key, default=None):
@@ -510,15 +1031,145 @@ class ScriptFile(object):
         return self._data.get(key, default)
 
 
-# Load all script files from the './script' directory
-# 从 './script' 目录加载所有脚本文件
-for filename in listdir('./script'):
-    filepath = join('./script', filename)
-    if isfile(filepath):
-        # Create a ScriptFile object
-        # 创建一个 ScriptFile 对象
-        file = ScriptFile(filepath)
-        SCRIPT[file.name] = file
+class ScriptRegistry(object):
+    """
+    Lazy registry of the scripts in a directory, indexed by their @name metadata.
+    目录中脚本的惰性注册表，以 @name 元数据为索引。
+    """
+
+    # Name of the optional precomputed index file inside the script directory
+    # 脚本目录中可选的预计算索引文件名
+    INDEX = 'index.json'
+
+    def __init__(self, directory: str = SCRIPT_DIRECTORY):
+        """
+        Initialize the ScriptRegistry object, no file is read until a script is looked up.
+        初始化 ScriptRegistry 对象，在查找脚本之前不读取任何文件。
+
+        :param directory: The directory containing the scripts.
+                          包含脚本的目录。
+        """
+        self.directory = directory
+        self._lock = Lock()
+
+        # A mapping from script name to file name, built on the first lookup
+        # 脚本名称到文件名的映射，在第一次查找时建立
+        self._index: dict[str, str] | None = None
+
+        # ScriptFile objects created so far
+        # 已创建的 ScriptFile 对象
+        self._files: dict[str, ScriptFile] = {}
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Whether a script with the given name exists.
+        是否存在给定名称的脚本。
+        """
+        return name in self.index
+
+    def __getitem__(self, name: str) -> ScriptFile:
+        """
+        Get the script with the given name.
+        获取给定名称的脚本。
+        """
+        with self._lock:
+            if name not in self._files:
+                self._files[name] = ScriptFile(join(self.directory, self.index[name]))
+            return self._files[name]
+
+    @property
+    def index(self) -> dict[str, str]:
+        """
+        Get the mapping from script name to file name, building it on first use.
+        获取脚本名称到文件名的映射，在第一次使用时建立。
+        """
+        if self._index is None:
+            self._index = self._load_index()
+            if self._index is None:
+                self._index = self._scan()
+        return self._index
+
+    def _script_files(self) -> list[str]:
+        """
+        List the script files in the directory.
+        列出目录中的脚本文件。
+        """
+        if not exists(self.directory):
+            logger.warning(f'Script directory {self.directory} is not found')
+            return []
+        return sorted(i for i in listdir(self.directory)
+                      if i.endswith('.py') and isfile(join(self.directory, i)))
+
+    def _scan(self) -> dict[str, str]:
+        """
+        Read the metadata header of every script file and index them by name.
+        读取每个脚本文件的元数据头部，并按名称建立索引。
+        """
+        index = {}
+        for filename in self._script_files():
+            file = ScriptFile(join(self.directory, filename))
+            if not file.name:
+                logger.warning(f'Script {filename} has no @name metadata, so it is ignored')
+                continue
+            index[file.name] = filename
+
+        logger.debug(f'Scan {len(index)} scripts in {self.directory}')
+        return index
+
+    def _load_index(self) -> dict[str, str] | None:
+        """
+        Load the precomputed index file, or return None if it is missing or out of date.
+        加载预计算的索引文件，若不存在或已过期则返回 None。
+        """
+        path = join(self.directory, self.INDEX)
+        if not exists(path):
+            return None
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load script index {path}: {e}')
+            return None
+
+        if not (isinstance(data, dict) and isinstance(data.get('files'), dict)
+                and isinstance(data.get('scripts'), dict)):
+            logger.warning(f'Script index {path} is malformed, scan the script directory instead')
+            return None
+
+        # The index is valid only if the same files exist with the same modification times
+        # 只有当相同的文件以相同的修改时间存在时，索引才有效
+        files = self._script_files()
+        if sorted(data['files']) != files or any(
+                getmtime(join(self.directory, i)) != data['files'][i] for i in files):
+            logger.info(f'Script index {path} is out of date, scan the script directory instead')
+            return None
+
+        logger.debug(f'Load {len(data["scripts"])} scripts from index {path}')
+        return data['scripts']
+
+    def build_index(self) -> str:
+        """
+        Scan the directory and write the precomputed index file.
+        扫描目录并写入预计算的索引文件。
+
+        :return: The path of the index file.
+                 索引文件的路径。
+        """
+        files = {i: getmtime(join(self.directory, i)) for i in self._script_files()}
+        self._index = self._scan()
+
+        path = join(self.directory, self.INDEX)
+        with open(path, 'w', encoding='utf-8') as f:
+            dump({'files': files, 'scripts': self._index}, f, indent=2)
+
+        logger.info(f'Write {len(self._index)} scripts to index {path}')
+        return path
+
+
+SCRIPT = ScriptRegistry()
 
 if __name__ == '__main__':
-    pass
+    # Build the precomputed script index
+    # 建立预计算的脚本索引
+    print(f'Script index is written to {SCRIPT.build_index()}')
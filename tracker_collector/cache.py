@@ -0,0 +1,312 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from collections import OrderedDict
+from hashlib import blake2b
+from json import dump, load
+from logging import getLogger
+from os import replace
+from os.path import exists
+from threading import Lock
+
+logger = getLogger(__name__)
+
+
+class SourceCache(object):
+    """
+    Persistent cache of HTTP validators and analyzed trackers, keyed by source URL.
+    以来源 URL 为键、持久化保存 HTTP 校验器和分析结果的缓存。
+    """
+
+    def __init__(self, file_path: str = None):
+        """
+        Initialize the SourceCache object and load it from disk.
+        初始化 SourceCache 对象并从磁盘加载。
+
+        :param file_path: The path of the cache file, the cache is kept in memory only if it is empty.
+                          缓存文件路径，为空时缓存仅保存在内存中。
+        """
+        self.file_path = file_path
+        self._lock = Lock()
+        self._dirty = False
+
+        # A mapping from URL to {'etag': ..., 'last_modified': ..., 'trackers': [...], 'method': ...}
+        # URL 到 {'etag': ..., 'last_modified': ..., 'trackers': [...], 'method': ...} 的映射
+        self._entries: dict[str, dict] = {}
+
+        # Validators received in this cycle whose trackers have not been analyzed yet
+        # 本周期收到、但对应追踪器尚未分析完成的校验器
+        self._staged: dict[str, dict] = {}
+
+        self.load()
+
+    def load(self):
+        """
+        Load the cache from the cache file.
+        从缓存文件加载缓存。
+        """
+        if not self.file_path or not exists(self.file_path):
+            return
+
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                self._entries = load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load source cache {self.file_path}, start with an empty cache: {e}')
+            self._entries = {}
+        else:
+            logger.info(f'Load {len(self._entries)} entries from source cache {self.file_path}')
+
+    def save(self):
+        """
+        Write the cache to the cache file if anything has changed.
+        如果缓存有变化，则写入缓存文件。
+        """
+        if not self.file_path or not self._dirty:
+            return
+
+        with self._lock:
+            # Write to a temporary file first, so that a crash never leaves a truncated cache
+            # 先写入临时文件，避免崩溃时留下不完整的缓存
+            temp = f'{self.file_path}.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                dump(self._entries, f)
+            replace(temp, self.file_path)
+            self._dirty = False
+
+        logger.debug(f'Save {len(self._entries)} entries to source cache {self.file_path}')
+
+    def headers(self, url: str) -> dict[str, str]:
+        """
+        Get the conditional request headers for a URL.
+        获取某个 URL 的条件请求头部。
+
+        :param url: The source URL.
+                    来源 URL。
+        :return: The If-None-Match / If-Modified-Since headers, empty if nothing is cached.
+                 If-None-Match / If-Modified-Since 头部，若无缓存则为空。
+        """
+        entry = self._entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def stage(self, url: str, etag: str = None, last_modified: str = None):
+        """
+        Remember the validators of a fresh response until its trackers are committed.
+        记录新响应的校验器，直到其追踪器被提交。
+
+        :param url: The source URL.
+                    来源 URL。
+        :param etag: The ETag header of the response.
+                     响应的 ETag 头部。
+        :param last_modified: The Last-Modified header of the response.
+                              响应的 Last-Modified 头部。
+        """
+        with self._lock:
+            self._staged[url] = {'etag': etag, 'last_modified': last_modified}
+
+    def commit(self, url: str, trackers: set[str], method: str = None):
+        """
+        Store the trackers analyzed from a fresh response together with its staged validators.
+        将新响应分析出的追踪器与其暂存的校验器一起保存。
+
+        :param url: The source URL.
+                    来源 URL。
+        :param trackers: The trackers analyzed from the response.
+                         从响应中分析出的追踪器。
+        :param method: The signature of the analysis method the trackers were analyzed with.
+                       分析出这些追踪器所用的分析方法的签名。
+        """
+        with self._lock:
+            entry = self._staged.pop(url, {'etag': None, 'last_modified': None})
+            entry['trackers'] = sorted(trackers)
+            entry['method'] = method
+            self._entries[url] = entry
+            self._dirty = True
+
+    def trackers(self, url: str, method: str = None) -> set[str] | None:
+        """
+        Get the trackers previously analyzed from a URL.
+        获取之前从某个 URL 分析出的追踪器。
+
+        :param url: The source URL.
+                    来源 URL。
+        :param method: The signature of the current analysis method, trackers analyzed with another method are not
+                       returned. Any method is accepted if it is None.
+                       当前分析方法的签名，不返回由其他方法分析出的追踪器。为 None 时接受任何方法。
+        :return: The cached trackers, or None if the URL is not cached.
+                 缓存的追踪器，若该 URL 未被缓存则返回 None。
+        """
+        entry = self._entries.get(url)
+        if not entry or entry.get('trackers') is None:
+            return None
+        if method is not None and entry.get('method') != method:
+            return None
+        return set(entry['trackers'])
+
+    def check(self, url: str, method: str):
+        """
+        Forget a URL whose trackers were analyzed with another method, e.g. after the configuration changed.
+        遗忘其追踪器由其他方法分析出的 URL，例如在配置变化之后。
+
+        :param url: The source URL.
+                    来源 URL。
+        :param method: The signature of the current analysis method.
+                       当前分析方法的签名。
+        """
+        entry = self._entries.get(url)
+        if entry is not None and entry.get('method') != method:
+            logger.info(f'Analysis method of {url} changed, forget its cached trackers')
+            self.forget(url)
+
+    def forget(self, url: str):
+        """
+        Drop the validators and the trackers of a URL, so that its next request is a full GET.
+        丢弃某个 URL 的校验器和追踪器，使其下一次请求为完整的 GET 请求。
+
+        :param url: The source URL.
+                    来源 URL。
+        """
+        with self._lock:
+            self._staged.pop(url, None)
+            if self._entries.pop(url, None) is not None:
+                self._dirty = True
+
+
+class ResultCache(object):
+    """
+    Size-bounded LRU cache of analyzed trackers, keyed by source URL and a hash of the response body.
+    以来源 URL 和响应体哈希为键、有容量上限的 LRU 分析结果缓存。
+    """
+
+    def __init__(self, size: int = 256, file_path: str = None):
+        """
+        Initialize the ResultCache object and load it from disk.
+        初始化 ResultCache 对象并从磁盘加载。
+
+        :param size: The maximum number of results kept, the least recently used ones are evicted first.
+                     最多保留的结果数量，最近最少使用的结果最先被淘汰。
+        :param file_path: The path of the cache file, the cache is kept in memory only if it is empty.
+                          缓存文件路径，为空时缓存仅保存在内存中。
+        """
+        self.size = size
+        self.file_path = file_path
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = Lock()
+        self._dirty = False
+        self._entries: OrderedDict[tuple[str, str], frozenset[str]] = OrderedDict()
+
+        self.load()
+
+    @staticmethod
+    def digest(data: str, method: str = '') -> str:
+        """
+        Hash the response body together with the analysis method, so that a changed method misses the cache.
+        将响应体与分析方法一起计算哈希，使分析方法变化后不会命中缓存。
+
+        :param data: The response body.
+                     响应体。
+        :param method: The signature of the analysis method.
+                       分析方法的签名。
+        :return: The hex digest of the body.
+                 响应体的十六进制摘要。
+        """
+        digest = blake2b(method.encode('utf-8', 'surrogatepass'), digest_size=16)
+        digest.update(b'\0')
+        digest.update(data.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, url: str, digest: str) -> set[str] | None:
+        """
+        Get the trackers analyzed from the same body of the same URL.
+        获取从同一 URL 的相同响应体中分析出的追踪器。
+
+        :param url: The source URL.
+                    来源 URL。
+        :param digest: The digest of the response body.
+                       响应体的摘要。
+        :return: The cached trackers, or None on a cache miss.
+                 缓存的追踪器，若未命中则返回 None。
+        """
+        with self._lock:
+            result = self._entries.get((url, digest))
+            if result is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end((url, digest))
+            return set(result)
+
+    def put(self, url: str, digest: str, trackers: set[str]):
+        """
+        Store the trackers analyzed from a response body.
+        保存从响应体中分析出的追踪器。
+
+        :param url: The source URL.
+                    来源 URL。
+        :param digest: The digest of the response body.
+                       响应体的摘要。
+        :param trackers: The analyzed trackers.
+                         分析出的追踪器。
+        """
+        with self._lock:
+            self._entries[(url, digest)] = frozenset(trackers)
+            self._entries.move_to_end((url, digest))
+            while len(self._entries) > self.size:
+                # Evict the least recently used result
+                # 淘汰最近最少使用的结果
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def load(self):
+        """
+        Load the cache from the cache file.
+        从缓存文件加载缓存。
+        """
+        if not self.file_path or not exists(self.file_path):
+            return
+
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                entries = load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load result cache {self.file_path}, start with an empty cache: {e}')
+            return
+
+        # Entries are stored from the least to the most recently used
+        # 条目按从最近最少使用到最近使用的顺序保存
+        for url, digest, trackers in entries[-self.size:]:
+            self._entries[(url, digest)] = frozenset(trackers)
+        logger.info(f'Load {len(self._entries)} entries from result cache {self.file_path}')
+
+    def save(self):
+        """
+        Write the cache to the cache file if anything has changed.
+        如果缓存有变化，则写入缓存文件。
+        """
+        if not self.file_path or not self._dirty:
+            return
+
+        with self._lock:
+            entries = [[url, digest, sorted(trackers)] for (url, digest), trackers in self._entries.items()]
+            temp = f'{self.file_path}.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                dump(entries, f)
+            replace(temp, self.file_path)
+            self._dirty = False
+
+        logger.debug(f'Save {len(entries)} entries to result cache {self.file_path}')
+
+
+if __name__ == '__main__':
+    pass
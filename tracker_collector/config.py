@@ -45,12 +45,28 @@ STRUCTURE = {
     'request': {
         'default_headers': json,
         'timeout': int,
+        'engine': str,
+        'concurrency': int,
+        'pool_size': int,
+        'stream': bool,
+        'retries': int,
+        'backoff': float,
+        'breaker_threshold': int,
+        'breaker_cooldown': int,
+        'host_concurrency': int,
+        'host_rate': float,
+        'host_burst': int,
+        'deadline': int,
     },
 
     'server': {
         'enable': bool,
         'port': int,
         'require_headers': json,
+        'mode': str,
+        'max_connections': int,
+        'keep_alive': int,
+        'max_age': int,
     },
 
     'interval': {
@@ -58,6 +74,43 @@ STRUCTURE = {
         'minute': int,
         'hour': int,
         'day': int,
+        'adaptive': bool,
+        'min_interval': int,
+        'max_interval': int,
+        'factor': float,
+        'offset': int,
+        'missed': str,
+        'jitter': int,
+    },
+
+    'analysis': {
+        'executor': str,
+        'workers': int,
+    },
+
+    'cache': {
+        'source_file': str,
+        'result_size': int,
+        'result_file': str,
+    },
+
+    'pipeline': {
+        'capacity': int,
+    },
+
+    'probe': {
+        'enable': bool,
+        'timeout': int,
+        'concurrency': int,
+        'host_interval': int,
+        'window': int,
+        'score_file': str,
+    },
+
+    'history': {
+        'file': str,
+        'keep_cycles': int,
+        'retention': int,
     },
 
     'logger': {
@@ -72,6 +125,132 @@ STRUCTURE = {
     }
 }
 
+# Values of the options a configuration file may leave out, as they would be written in it. They keep a file written
+# before an option existed working as it did, so new features are off unless they are configured. Options without a
+# default are required.
+# 配置文件可以省略的选项的值，按其在文件中的写法给出。它们使选项出现之前编写的文件照常工作，因此新功能在配置之前保持关闭。
+# 没有默认值的选项为必填项。
+DEFAULTS = {
+    'base': {
+        'thread_pool_size': '8',
+        'save_file': 'tracker.txt',
+        'plugin': '',
+    },
+
+    'request': {
+        'default_headers': '{}',
+        'timeout': '8',
+        'engine': 'thread',
+        'concurrency': '64',
+        'pool_size': '4',
+        'stream': 'false',
+        'retries': '0',
+        'backoff': '1',
+        'breaker_threshold': '0',
+        'breaker_cooldown': '3600',
+        'host_concurrency': '0',
+        'host_rate': '0',
+        'host_burst': '1',
+        'deadline': '0',
+    },
+
+    'server': {
+        'enable': 'false',
+        'port': '8080',
+        'require_headers': '{}',
+        'mode': 'single',
+        'max_connections': '64',
+        'keep_alive': '5',
+        'max_age': '0',
+    },
+
+    'interval': {
+        'second': '0',
+        'minute': '0',
+        'hour': '0',
+        'day': '1',
+        'adaptive': 'false',
+        'min_interval': '3600',
+        'max_interval': '604800',
+        'factor': '2',
+        'offset': '0',
+        'missed': 'coalesce',
+        'jitter': '0',
+    },
+
+    'analysis': {
+        'executor': 'serial',
+        'workers': '0',
+    },
+
+    'cache': {
+        'source_file': '',
+        'result_size': '0',
+        'result_file': '',
+    },
+
+    'pipeline': {
+        'capacity': '8',
+    },
+
+    'probe': {
+        'enable': 'false',
+        'timeout': '2000',
+        'concurrency': '256',
+        'host_interval': '200',
+        'window': '10',
+        'score_file': '',
+    },
+
+    'history': {
+        'file': '',
+        'keep_cycles': '1',
+        'retention': '10000',
+    },
+
+    'logger': {
+        'log_file': '',
+        'log_level': 'INFO',
+    },
+
+    'tracker_*': {
+        'method': '',
+        'headers': '{}',
+    }
+}
+
+
+def read(parser: ConfigParser, section: str, template: str, option: str):
+    """
+    Read an option and convert it to the type defined in STRUCTURE, falling back to its default if it is missing.
+    读取选项并转换为 STRUCTURE 中定义的类型，缺失时使用其默认值。
+
+    :param parser: The parsed configuration file.
+                   已解析的配置文件
+    :param section: The section of the configuration file.
+                    配置文件的节
+    :param template: The key of the section in STRUCTURE, e.g. tracker_* for every tracker section.
+                     该节在 STRUCTURE 中的键，例如所有追踪器节均为 tracker_*
+    :param option: The option within the section.
+                   节中的选项
+    :return: The configuration value.
+             配置值
+    """
+    default = DEFAULTS.get(template, {}).get(option)
+    if default is not None and not parser.has_option(section, option):
+        value = default
+    else:
+        # Raises NoSectionError or NoOptionError for a missing required option
+        # 缺少必填选项时抛出 NoSectionError 或 NoOptionError
+        value = parser.get(section, option)
+
+    kind = STRUCTURE[template][option]
+    if kind is bool:
+        if value.lower() not in parser.BOOLEAN_STATES:
+            raise ValueError(f'Not a boolean: {section}:{option} = {value}')
+        return parser.BOOLEAN_STATES[value.lower()]
+    return kind(value)
+
 
 class Config(object):
     """
@@ -156,20 +335,15 @@ class Config(object):
             if option in STRUCTURE[section]:
                 # Apply the data type defined in STRUCTURE
                 # 应用 STRUCTURE 中定义的数据类型
-                if isinstance(STRUCTURE[section][option], bool):
-                    return self.config.getboolean(section, option)
-                return STRUCTURE[section][option](self.config.get(section, option))
+                return read(self.config, section, section, option)
 
         elif section.startswith('tracker_'):
             # If the section starts with 'tracker_'...
             # 如果是以tracker_开头的配置...
-            template = STRUCTURE['tracker_*']
-            if option in template:
+            if option in STRUCTURE['tracker_*']:
                 # Apply the data type defined in STRUCTURE
                 # 应用 STRUCTURE 中定义的数据类型
-                if isinstance(template[option], bool):
-                    return self.config.getboolean(section, option)
-                return template[option](self.config.get(section, option))
+                return read(self.config, section, 'tracker_*', option)
 
         # Raise an exception if the key is invalid
         # 如果不符合上述条件，则抛出异常
@@ -228,19 +402,14 @@ class OptionGetter(object):
         :return: The option value associated with the name.
                  选项名称关联的值
         """
-        if self.section.startswith('tracker_'):
-            template = STRUCTURE['tracker_*']
-        else:
-            template = STRUCTURE[self.section]
+        template = 'tracker_*' if self.section.startswith('tracker_') else self.section
 
-        if option not in template:
+        if option not in STRUCTURE[template]:
             # Raise an exception if the option is invalid
             # 如果选项无效，则抛出异常
             raise KeyError(f'Invalid config option: {self.section}:{option}')
 
-        if isinstance(template[option], bool):
-            return self._config.getboolean(self.section, option)
-        return template[option](self._config.get(self.section, option))
+        return read(self._config, self.section, template, option)
 
 
 if __name__ == '__main__':
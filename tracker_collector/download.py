@@ -1,50 +1,483 @@
 # -*- coding:utf-8 -*-
 # AUTHOR: Sun
 
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
+from abc import ABC, abstractmethod
+from codecs import getincrementaldecoder
+from asyncio import (new_event_loop, run_coroutine_threadsafe, open_connection, wait_for, sleep as async_sleep,
+                     all_tasks, current_task, gather, CancelledError, Condition, Semaphore, StreamReader, StreamWriter,
+                     TimeoutError as AsyncTimeoutError)
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, Future, TimeoutError as FutureTimeoutError
+from functools import partial
+from http.client import HTTPException, HTTPMessage
+from random import uniform
+from ssl import create_default_context
+from threading import Lock, RLock, Thread, Timer
+from time import monotonic, perf_counter, sleep
+from typing import Callable, TYPE_CHECKING
+from urllib.error import HTTPError
+from urllib.parse import urljoin, urlsplit
 from urllib.request import build_opener, Request
+from zlib import decompressobj, error as ZlibError, MAX_WBITS
 from logging import getLogger
 
+from cache import SourceCache
+
+if TYPE_CHECKING:
+    from analysis import Incremental
+
+try:
+    from brotli import Decompressor as BrotliDecompressor
+except ImportError:
+    BrotliDecompressor = None
+
 logger = getLogger(__name__)
 
+# Status codes that make the asynchronous engine follow the Location header
+# 让异步引擎跟随 Location 头部的状态码
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# Maximum number of redirects followed for one request, the same as urllib
+# 单个请求最多跟随的重定向次数，与 urllib 相同
+MAX_REDIRECTS = 10
+
+# Size of each read from the response body
+# 每次读取响应体的大小
+CHUNK_SIZE = 64 * 1024
+
+# Content codings advertised to servers, brotli only when the library is installed
+# 向服务器声明支持的内容编码，仅在安装了 brotli 库时包含 br
+ACCEPT_ENCODING = 'gzip, deflate, br' if BrotliDecompressor else 'gzip, deflate'
+
+# Status codes of temporary server failures, which are retried
+# 表示服务器临时故障的状态码，会被重试
+RETRY_CODES = (408, 429, 500, 502, 503, 504)
 
-class Downloader:
+
+class NotModified(Exception):
     """
-    A simple multithreading downloader class for concurrent HTTP requests.
-    一个简单的多线程下载器类，用于并发地发送HTTP请求并获取响应。
+    Returned instead of the content when the server answers 304 Not Modified.
+    服务器返回 304 Not Modified 时，代替响应内容返回。
+    """
+
+    def __init__(self, url: str):
+        super().__init__(f'{url} is not modified')
+        self.url = url
+
+
+class CircuitOpen(Exception):
+    """
+    Returned instead of sending the request when its host failed too often recently.
+    当请求的主机最近失败次数过多时，代替发送请求返回。
+    """
+
+    def __init__(self, url: str):
+        super().__init__(f'Circuit of {url} is open, skip the request')
+        self.url = url
+
+
+class DeadlineExceeded(Exception):
+    """
+    Returned instead of the content when a request was cancelled because it did not finish in time.
+    请求因未能按时完成而被取消时，代替响应内容返回。
+    """
+
+    def __init__(self, url: str):
+        super().__init__(f'{url} did not finish before the deadline')
+        self.url = url
+
+
+class CircuitBreaker(object):
+    """
+    Count the consecutive failures of each host, and stop sending requests to a host that keeps failing for a while.
+    统计每个主机的连续失败次数，并在一段时间内停止向持续失败的主机发送请求。
+
+    After the cooldown requests are let through again, the first success closes the circuit and another failure
+    opens it for another cooldown.
+    冷却时间过后请求会再次被放行，第一次成功会关闭断路器，再次失败则会将其再打开一个冷却时间。
     """
 
-    def __init__(self, default_headers: dict = None, timeout: int = 8, workers: int = 8):
+    def __init__(self, threshold: int = 3, cooldown: float = 300.0):
         """
-        Initialize Downloader object.
-        初始化Downloader对象。
+        Initialize the CircuitBreaker object.
+        初始化 CircuitBreaker 对象。
+
+        :param threshold: 打开断路器所需的连续失败次数，0 表示从不打开。
+                          The number of consecutive failures that opens the circuit, 0 means never.
+        :param cooldown: 断路器保持打开的秒数。
+                         The seconds the circuit stays open.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: dict[str, int] = {}
+        self._until: dict[str, float] = {}
+        self._lock = Lock()
+
+    def allow(self, host: str) -> bool:
+        """
+        Whether requests to a host may be sent.
+        是否可以向某个主机发送请求。
+        """
+        return monotonic() >= self._until.get(host, 0.0)
+
+    def success(self, host: str):
+        """
+        Record that a host answered, which closes its circuit.
+        记录某个主机已响应，这会关闭其断路器。
+        """
+        with self._lock:
+            self._failures.pop(host, None)
+            self._until.pop(host, None)
+
+    def failure(self, host: str):
+        """
+        Record that a host failed, which opens its circuit once the threshold is reached.
+        记录某个主机失败，达到阈值后会打开其断路器。
+        """
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if self.threshold and failures >= self.threshold:
+                self._until[host] = monotonic() + self.cooldown
+                logger.warning(f'Host {host} failed {failures} times in a row, '
+                               f'skip it for {self.cooldown:.0f} seconds')
+
+
+class TokenBucket(object):
+    """
+    Token bucket rate limiter, tokens are added at a fixed rate up to the size of the bucket.
+    令牌桶限速器，令牌以固定速率加入，最多不超过桶的容量。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize the TokenBucket object, the bucket starts full.
+        初始化 TokenBucket 对象，桶初始为满。
+
+        :param rate: 每秒加入的令牌数量。
+                     The number of tokens added per second.
+        :param burst: 桶的容量，即可以连续发送的请求数量。
+                      The size of the bucket, i.e. the number of requests that may be sent back to back.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._time = monotonic()
+
+    def take(self) -> float:
+        """
+        Take a token if one is available.
+        若有可用令牌则取走一个。
+
+        :return: 取到令牌时为 0，否则为距下一个令牌的秒数。
+                 0 if a token was taken, otherwise the seconds until the next token.
+        """
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._time) * self.rate)
+        self._time = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class HostLimiter(object):
+    """
+    Limit the requests in flight and the request rate of each host.
+    限制每个主机同时进行的请求数量和请求速率。
+    """
+
+    def __init__(self, slots: int = 0, rate: float = 0.0, burst: int = 1):
+        """
+        Initialize the HostLimiter object.
+        初始化 HostLimiter 对象。
+
+        :param slots: 每个主机同时进行的请求数量上限，0 表示不限制。
+                      Maximum number of requests in flight for each host, 0 means unlimited.
+        :param rate: 每个主机每秒开始的请求数量上限，0 表示不限制。
+                     Maximum number of requests started per second for each host, 0 means unlimited.
+        :param burst: 每个主机可以连续开始的请求数量。
+                      The number of requests that may be started back to back for each host.
+        """
+        self.slots = slots
+        self.rate = rate
+        self.burst = burst
+        self._busy: dict[str, int] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether any limit is set.
+        是否设置了任何限制。
+        """
+        return bool(self.slots or self.rate)
+
+    def acquire(self, host: str) -> float:
+        """
+        Take a slot and a token of a host if both are available.
+        若主机的名额和令牌都可用，则同时取走。
+
+        :return: 取到时为 0；没有空闲名额时为 inf，需等待 release()；否则为距下一个令牌的秒数。
+                 0 if they were taken, inf if no slot is free, which waits for release(), otherwise the seconds
+                 until the next token.
+        """
+        with self._lock:
+            busy = self._busy.get(host, 0)
+            if self.slots and busy >= self.slots:
+                return float('inf')
+
+            if self.rate:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+                wait = bucket.take()
+                if wait:
+                    return wait
+
+            self._busy[host] = busy + 1
+            return 0.0
+
+    def release(self, host: str):
+        """
+        Give back the slot of a finished request.
+        归还已完成请求的名额。
+        """
+        with self._lock:
+            busy = self._busy.get(host, 0) - 1
+            if busy > 0:
+                self._busy[host] = busy
+            else:
+                self._busy.pop(host, None)
+
+
+class ContentDecoder(object):
+    """
+    Streaming decoder for the Content-Encoding of a response body.
+    响应体 Content-Encoding 的流式解码器。
+    """
+
+    def __init__(self, encoding: str = None):
+        """
+        Initialize ContentDecoder object.
+        初始化ContentDecoder对象。
+
+        :param encoding: Content-Encoding 头部的值。
+                         The value of the Content-Encoding header.
+        """
+        self.encoding = (encoding or 'identity').strip().lower()
+
+        if self.encoding in ('gzip', 'x-gzip'):
+            self._decoder = decompressobj(16 + MAX_WBITS)
+        elif self.encoding == 'deflate':
+            self._decoder = decompressobj(MAX_WBITS)
+        elif self.encoding == 'br' and BrotliDecompressor:
+            self._decoder = BrotliDecompressor()
+        elif self.encoding == 'identity':
+            self._decoder = None
+        else:
+            raise ValueError(f'Unsupported content encoding: {self.encoding}')
+
+        # Whether any data has been fed, used to detect raw deflate streams
+        # 是否已输入过数据，用于识别原始 deflate 数据流
+        self._started = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        """
+        Decode the next chunk of the body.
+        解码响应体的下一块数据。
+        """
+        if self._decoder is None:
+            return chunk
+
+        if self.encoding == 'br':
+            return self._decoder.process(chunk)
+
+        if self.encoding == 'deflate' and not self._started:
+            self._started = True
+            try:
+                return self._decoder.decompress(chunk)
+            except ZlibError:
+                # Some servers send raw deflate data without the zlib header
+                # 部分服务器发送不带 zlib 头部的原始 deflate 数据
+                self._decoder = decompressobj(-MAX_WBITS)
+
+        return self._decoder.decompress(chunk)
+
+    def flush(self) -> bytes:
+        """
+        Return the data remaining in the decoder.
+        返回解码器中剩余的数据。
+        """
+        if self._decoder is None or self.encoding == 'br':
+            return b''
+        return self._decoder.flush()
+
+
+class TransferStatistic(object):
+    """
+    Bytes received on the wire and after decoding for one source.
+    单个来源在传输中接收和解码后的字节数。
+    """
+
+    def __init__(self, encoding: str = 'identity', compressed: int = 0, decompressed: int = 0, parse: float = 0.0):
+        self.encoding = encoding
+        self.compressed = compressed
+        self.decompressed = decompressed
+
+        # Seconds spent in the incremental parser while the body was streamed
+        # 流式接收响应体时在增量解析器中花费的秒数
+        self.parse = parse
+
+    def __repr__(self):
+        return (f'TransferStatistic(encoding={self.encoding}, compressed={self.compressed}, '
+                f'decompressed={self.decompressed}, parse={self.parse:.3f})')
+
+    @property
+    def ratio(self) -> float:
+        """
+        Compressed size divided by decompressed size.
+        压缩后大小与解压后大小之比。
+        """
+        return self.compressed / self.decompressed if self.decompressed else 1.0
+
+
+class BodyReader(object):
+    """
+    Decode a response body chunk by chunk, collecting the text or feeding it to an incremental parser.
+    逐块解码响应体，收集文本或将其输入增量解析器。
+    """
+
+    def __init__(self, encoding: str = None, parser: 'Incremental' = None, decode: bool = True):
+        """
+        Initialize BodyReader object.
+        初始化BodyReader对象。
+
+        :param encoding: Content-Encoding 头部的值。
+                         The value of the Content-Encoding header.
+        :param parser: 增量解析器，为空时收集完整文本。
+                       The incremental parser, the whole text is collected if it is empty.
+        :param decode: 是否将收集的响应体解码为文本，否则返回解压后的字节。
+                       Whether to decode the collected body to text, otherwise the decompressed bytes are returned.
+        """
+        self._decoder = ContentDecoder(encoding)
+        self.statistic = TransferStatistic(self._decoder.encoding)
+        self.parser = parser
+        self.decode = decode
+
+        self._chunks: list[bytes] = []
+        self._trackers: set[str] = set()
+        self._text = getincrementaldecoder('utf-8')()
+
+    def feed(self, chunk: bytes):
+        """
+        Feed the next chunk received from the wire.
+        输入从网络接收的下一块数据。
+        """
+        self.statistic.compressed += len(chunk)
+        self._consume(self._decoder.feed(chunk))
+
+    def close(self) -> str | bytes | set[str]:
+        """
+        Finish the body.
+        结束响应体。
+
+        :return: 完整文本（或未解码的字节），或使用增量解析器时得到的追踪器集合。
+                 The whole text (or the undecoded bytes), or the set of trackers when an incremental parser is used.
+        """
+        self._consume(self._decoder.flush(), final=True)
+
+        if self.parser is None:
+            body = b''.join(self._chunks)
+            return body.decode('utf-8') if self.decode else body
+
+        start = perf_counter()
+        self._trackers.update(self.parser.close())
+        self.statistic.parse += perf_counter() - start
+        return self._trackers
+
+    def _consume(self, data: bytes, final: bool = False):
+        """
+        Handle decompressed data.
+        处理解压后的数据。
+        """
+        self.statistic.decompressed += len(data)
+
+        if self.parser is None:
+            self._chunks.append(data)
+        else:
+            # Only the unfinished tail of the body is kept in memory
+            # 内存中只保留响应体未完成的尾部
+            text = self._text.decode(data, final)
+            start = perf_counter()
+            self._trackers.update(self.parser.feed(text))
+            self.statistic.parse += perf_counter() - start
+
+
+class BaseDownloader(ABC):
+    """
+    Base class of downloaders, shared by all download engines.
+    下载器基类，由所有下载引擎共享。
+    """
+
+    def __init__(self, default_headers: dict = None, timeout: int = 8, cache: SourceCache = None,
+                 retries: int = 0, backoff: float = 1.0, breaker: CircuitBreaker = None, limiter: HostLimiter = None):
+        """
+        Initialize BaseDownloader object.
+        初始化BaseDownloader对象。
 
         :param default_headers: 默认的HTTP头部信息字典。
                                 Default HTTP header information dictionary.
         :param timeout: 每个请求的超时时间（秒）。
                         Timeout for each request (in seconds).
-        :param workers: 线程池中的线程数量。
-                        Thread pool size.
+        :param cache: 用于发送条件请求的来源缓存。
+                      Source cache used to send conditional requests.
+        :param retries: 临时失败后的最大重试次数。
+                        Maximum number of retries after a temporary failure.
+        :param backoff: 第一次重试前的最长等待秒数，此后每次重试加倍，实际等待时间在其中随机选取。
+                        The longest wait in seconds before the first retry, doubled for every further retry, the
+                        actual wait is chosen at random below it.
+        :param breaker: 跳过持续失败主机的断路器，默认从不跳过。
+                        Circuit breaker that skips hosts which keep failing, never skips by default.
+        :param limiter: 每个主机的并发和速率限制，默认不限制。
+                        Concurrency and rate limits of each host, unlimited by default.
         """
         self.timeout = timeout
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker if breaker else CircuitBreaker(0)
+        self.limiter = limiter if limiter else HostLimiter()
 
         # Use provided default headers or empty dictionary
         # 使用提供的默认头部或空字典
         self.default_headers = default_headers if default_headers else {}
 
-        # Create thread pool executor
-        # 创建线程池执行器
-        self._executor = ThreadPoolExecutor(max_workers=workers)
-
-        # Construct URL opener
-        # 构建URL打开器
-        self._opener = build_opener()
-
         # Create a mapping from Future to Request object
         # 创建一个Future到Request对象的映射
         self._target_requests: dict[Future, Request] = {}
 
-    def get(self, *args: (str | Request), headers: dict = None) -> list[Future]:
+        # Transfer statistic of the latest response from each URL
+        # 每个 URL 最近一次响应的传输统计
+        self.statistics: dict[str, TransferStatistic] = {}
+
+        # A mapping from Request object to the factory of its incremental parser
+        # Request对象到其增量解析器工厂的映射
+        self._parsers: dict[Request, Callable[[], 'Incremental']] = {}
+
+        # Requests whose body is returned as bytes instead of text
+        # 响应体以字节而非文本返回的请求
+        self._raw: set[Request] = set()
+
+        # Requests that were cancelled while running, they stop at the next chunk and are removed once their
+        # future is done
+        # 运行中被取消的请求，会在下一个数据块处停止，并在其 Future 完成后被移除
+        self._cancelled: set[Request] = set()
+
+    def get(self, *args: (str | Request), headers: dict = None,
+            parser: Callable[[], 'Incremental'] = None) -> list[Future]:
         """
         Send GET requests and return a list of Future objects.
         发送GET请求，并返回Future对象列表。
@@ -53,9 +486,103 @@ class Downloader:
                      A list of URL strings or Request objects.
         :param headers: 要添加到每个请求的额外头部信息。
                         Additional headers to add to each request.
+        :param parser: 创建增量解析器的工厂。给定时响应体会被流式解析，结果为追踪器集合而非文本。
+                       Factory of incremental parsers. When given, the body is parsed while streaming
+                       and the result is a set of trackers instead of the text.
         :return: 一个Future对象列表，代表异步任务。
                  A list of Future objects representing asynchronous tasks.
         """
+        requests = self._build(args, headers)
+
+        futures = []
+        for request in requests:
+            logger.debug(f'Submit request {request} to executor')
+            if parser:
+                self._parsers[request] = parser
+
+            # Submit task to the download engine
+            # 提交任务到下载引擎
+            future = self._submit(request)
+            futures.append(future)
+
+            self._target_requests[future] = request
+
+        return futures
+
+    def fetch(self, url: str | Request, headers: dict = None, parser: Callable[[], 'Incremental'] = None,
+              decode: bool = True, timeout: float = None) -> str | bytes | set[str] | Exception:
+        """
+        Send one GET request and wait for its result, without going through complete().
+        发送一个GET请求并等待其结果，不经过 complete()。
+
+        :param url: URL字符串或Request对象。
+                    A URL string or a Request object.
+        :param headers: 要添加到请求的额外头部信息。
+                        Additional headers to add to the request.
+        :param parser: 创建增量解析器的工厂，参见 get()。
+                       Factory of incremental parsers, see get().
+        :param decode: 是否将响应体解码为文本，否则返回解压后的字节。
+                       Whether to decode the body to text, otherwise the decompressed bytes are returned.
+        :param timeout: 等待的最长秒数，包括重试，超时后请求被取消并返回 DeadlineExceeded。None 表示一直等待。
+                        The longest wait in seconds including retries, after which the request is cancelled and
+                        DeadlineExceeded is returned. None waits until the request finishes.
+        :return: 响应的内容或在出现错误时返回异常对象。
+                 The response content or an exception object on failure.
+        """
+        request, future = self.submit(url, headers, parser, decode)
+        return self.result(request, future, timeout)
+
+    def submit(self, url: str | Request, headers: dict = None, parser: Callable[[], 'Incremental'] = None,
+               decode: bool = True) -> tuple[Request, Future]:
+        """
+        Send one GET request without waiting for it, without going through complete().
+        发送一个GET请求但不等待，不经过 complete()。
+
+        :param url: URL字符串或Request对象。
+                    A URL string or a Request object.
+        :param headers: 要添加到请求的额外头部信息。
+                        Additional headers to add to the request.
+        :param parser: 创建增量解析器的工厂，参见 get()。
+                       Factory of incremental parsers, see get().
+        :param decode: 是否将响应体解码为文本，否则返回解压后的字节。
+                       Whether to decode the body to text, otherwise the decompressed bytes are returned.
+        :return: Request对象和代表该请求的Future对象，将它们传给 result() 获取结果。
+                 The Request object and the Future of the request, pass them to result() to get the result.
+        """
+        request = self._build((url,), headers)[0]
+        if parser:
+            self._parsers[request] = parser
+        if not decode:
+            self._raw.add(request)
+
+        logger.debug(f'Submit request {request} to executor')
+        return request, self._submit(request)
+
+    def result(self, request: Request, future: Future, timeout: float = None) -> str | bytes | set[str] | Exception:
+        """
+        Wait for the result of a request sent by submit().
+        等待由 submit() 发送的请求的结果。
+
+        :param request: 由 submit() 返回的Request对象。
+                        The Request object returned by submit().
+        :param future: 由 submit() 返回的Future对象。
+                       The Future returned by submit().
+        :param timeout: 等待的最长秒数，超时后请求被取消并返回 DeadlineExceeded。None 表示一直等待。
+                        The longest wait in seconds, after which the request is cancelled and DeadlineExceeded is
+                        returned. None waits until the request finishes.
+        :return: 响应的内容或在出现错误时返回异常对象。
+                 The response content or an exception object on failure.
+        """
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            return self._cancel(request, future)
+
+    def _build(self, args: tuple[str | Request, ...], headers: dict = None) -> list[Request]:
+        """
+        Construct GET Request objects with the default, compression and conditional headers.
+        构建带有默认头部、压缩头部和条件头部的GET Request对象。
+        """
         if headers is None:
             headers = {}
 
@@ -76,40 +603,334 @@ class Downloader:
             else:
                 item = Request(item, method='GET', headers=headers)
 
-            logger.debug(f'Construct request {item}')
-            requests.append(item)
-
-        futures = []
-        for request in requests:
-            logger.debug(f'Submit request {request} to executor')
+            if not item.has_header('Accept-encoding'):
+                # Ask for a compressed body unless the source overrides it
+                # 除非来源自行指定，否则请求压缩的响应体
+                item.add_header('Accept-Encoding', ACCEPT_ENCODING)
 
-            # Submit task to executor
-            # 提交任务到线程池
-            future = self._executor.submit(self._load_request, request)
-            futures.append(future)
+            if self.cache:
+                # Add If-None-Match / If-Modified-Since for sources seen before
+                # 为之前获取过的来源添加 If-None-Match / If-Modified-Since
+                for key, value in self.cache.headers(item.full_url).items():
+                    item.add_header(key, value)
 
-            self._target_requests[future] = request
+            logger.debug(f'Construct request {item}')
+            requests.append(item)
 
-        return futures
+        return requests
 
-    def complete(self) -> list[tuple[str, Request]]:
+    def complete(self, timeout: float = None) -> list[tuple[str, Request]]:
         """
         Get completed requests and their results.
         获取已完成的请求及其结果。
 
+        :param timeout: 等待所有请求的最长秒数，超时后剩余的请求被取消，其结果为 DeadlineExceeded。None 表示一直等待。
+                        The longest wait in seconds for all requests, after which the remaining requests are
+                        cancelled and their result is DeadlineExceeded. None waits until every request finishes.
         :return: 一个生成器，每次迭代返回一个元组，包含响应内容和对应的Request对象。
                  A generator that yields a tuple for each completed request,
         """
-        for future in as_completed(self._target_requests):
-            logger.debug(f'Get response from {self._target_requests[future]}')
-            # Get result from future
-            # 从Future中获取结果
-            yield future.result(), self._target_requests.pop(future)
+        try:
+            for future in as_completed(list(self._target_requests), timeout):
+                logger.debug(f'Get response from {self._target_requests[future]}')
+                # Get result from future
+                # 从Future中获取结果
+                yield future.result(), self._target_requests.pop(future)
+
+        except FutureTimeoutError:
+            for future, request in list(self._target_requests.items()):
+                del self._target_requests[future]
+                yield self._cancel(request, future), request
+
+    def _cancel(self, request: Request, future: Future) -> DeadlineExceeded:
+        """
+        Cancel a request that did not finish in time.
+        取消未能按时完成的请求。
+
+        :param request: 要取消的Request对象。
+                        The Request object to cancel.
+        :param future: 代表该请求的Future对象。
+                       The Future of the request.
+        :return: 代替响应内容的结果。
+                 The result in place of the response content.
+        """
+        logger.warning(f'Cancel request {request}, it did not finish before the deadline')
+        if not future.cancel():
+            # Already running, it stops at its next chunk or attempt
+            # 已在运行，会在下一个数据块或下一次尝试时停止
+            self._cancelled.add(request)
+
+            # Forget the request once it has stopped, at once if it already has
+            # 请求停止后将其遗忘，若已停止则立即遗忘
+            future.add_done_callback(lambda _: self._cancelled.discard(request))
+        return DeadlineExceeded(request.full_url)
+
+    def _stage(self, request: Request, headers):
+        """
+        Remember the validators of a fresh response in the source cache.
+        将新响应的校验器记录到来源缓存中。
+
+        :param request: 已加载的Request对象。
+                        The loaded Request object.
+        :param headers: 响应头部。
+                        The response headers.
+        """
+        if self.cache:
+            self.cache.stage(request.full_url, headers.get('ETag'), headers.get('Last-Modified'))
+
+    def _reader(self, request: Request, encoding: str = None) -> BodyReader:
+        """
+        Create the body reader for a request.
+        为请求创建响应体读取器。
+
+        :param request: 要加载的Request对象。
+                        The Request object to load.
+        :param encoding: Content-Encoding 头部的值。
+                         The value of the Content-Encoding header.
+        """
+        parser = self._parsers.get(request)
+        return BodyReader(encoding, parser() if parser else None, request not in self._raw)
+
+    def _record(self, request: Request, statistic: TransferStatistic):
+        """
+        Record the transfer statistic of a response.
+        记录响应的传输统计。
+        """
+        self.statistics[request.full_url] = statistic
+        logger.debug(f'Receive {statistic.compressed} bytes ({statistic.encoding}) and decode to '
+                     f'{statistic.decompressed} bytes from {request}')
+
+    def _rejected(self, request: Request) -> CircuitOpen | None:
+        """
+        Get the result of a request whose host circuit is open, or None if it may be sent.
+        获取主机断路器已打开的请求的结果，若可以发送则返回 None。
+        """
+        if self.breaker.allow(urlsplit(request.full_url).netloc):
+            return None
+        logger.warning(f'Skip request {request}, its host failed too often recently')
+        return CircuitOpen(request.full_url)
+
+    def _settle(self, request: Request, result, attempt: int) -> float | None:
+        """
+        Record the outcome of an attempt in the circuit breaker and decide whether to retry.
+        在断路器中记录一次尝试的结果，并决定是否重试。
+
+        :param request: 已加载的Request对象。
+                        The loaded Request object.
+        :param result: 本次尝试的结果。
+                       The result of the attempt.
+        :param attempt: 从 0 开始的尝试序号。
+                        The number of the attempt, starting from 0.
+        :return: 重试前等待的秒数，不重试时为 None。
+                 The seconds to wait before retrying, or None if the request is not retried.
+        """
+        host = urlsplit(request.full_url).netloc
+        if isinstance(result, DeadlineExceeded):
+            # A host that hangs past the deadline is failing, and there is no time left to retry
+            # 拖过截止时间的主机视为故障，且已没有时间重试
+            self.breaker.failure(host)
+            return None
+
+        if not self._retryable(result):
+            # Any answer, even an error status, shows the host is up, local errors say nothing about it
+            # 任何应答，即使是错误状态，都表明主机在线，本地错误则与主机无关
+            if isinstance(result, (HTTPError, NotModified)) or not isinstance(result, Exception):
+                self.breaker.success(host)
+            return None
+
+        self.breaker.failure(host)
+        if attempt >= self.retries or not self.breaker.allow(host):
+            return None
+
+        # Full jitter, so that requests failing together do not retry together
+        # 完全抖动，使一起失败的请求不会一起重试
+        delay = uniform(0.0, self.backoff * 2 ** attempt)
+        logger.info(f'Retry request {request} in {delay:.2f} seconds ({attempt + 1}/{self.retries})')
+        return delay
+
+    @staticmethod
+    def _retryable(result) -> bool:
+        """
+        Whether a result is a temporary failure: a network error, a timeout or a temporary server error.
+        结果是否为临时故障：网络错误、超时或服务器临时错误。
+        """
+        if isinstance(result, HTTPError):
+            return result.code in RETRY_CODES
+
+        # Before Python 3.11 asyncio.TimeoutError is not the builtin TimeoutError
+        # 在 Python 3.11 之前 asyncio.TimeoutError 不是内置的 TimeoutError
+        return isinstance(result, (OSError, TimeoutError, AsyncTimeoutError, HTTPException))
+
+    @abstractmethod
+    def _submit(self, request: Request) -> Future:
+        """
+        Hand a request over to the download engine.
+        将请求交给下载引擎。
+
+        :param request: 要加载的Request对象。
+                        The Request object to load.
+        :return: 代表该请求的Future对象，其结果为响应内容或异常对象。
+                 A Future whose result is the response content or an exception object.
+        """
+        pass
+
+    @abstractmethod
+    def close(self):
+        """
+        Release the resources held by the download engine.
+        释放下载引擎持有的资源。
+        """
+        pass
+
+
+class Downloader(BaseDownloader):
+    """
+    A simple multithreading downloader class for concurrent HTTP requests.
+    一个简单的多线程下载器类，用于并发地发送HTTP请求并获取响应。
+    """
+
+    def __init__(self, default_headers: dict = None, timeout: int = 8, workers: int = 8, cache: SourceCache = None,
+                 retries: int = 0, backoff: float = 1.0, breaker: CircuitBreaker = None, limiter: HostLimiter = None):
+        """
+        Initialize Downloader object.
+        初始化Downloader对象。
+
+        :param default_headers: 默认的HTTP头部信息字典。
+                                Default HTTP header information dictionary.
+        :param timeout: 每个请求的超时时间（秒）。
+                        Timeout for each request (in seconds).
+        :param workers: 线程池中的线程数量。
+                        Thread pool size.
+        :param cache: 用于发送条件请求的来源缓存。
+                      Source cache used to send conditional requests.
+        :param retries: 临时失败后的最大重试次数，参见 BaseDownloader。
+                        Maximum number of retries after a temporary failure, see BaseDownloader.
+        :param backoff: 第一次重试前的最长等待秒数。
+                        The longest wait in seconds before the first retry.
+        :param breaker: 跳过持续失败主机的断路器。
+                        Circuit breaker that skips hosts which keep failing.
+        :param limiter: 每个主机的并发和速率限制。
+                        Concurrency and rate limits of each host.
+        """
+        super().__init__(default_headers, timeout, cache, retries, backoff, breaker, limiter)
+
+        # Requests waiting for their host, they do not occupy a thread until they may start
+        # 等待其主机的请求，在可以开始之前不占用线程
+        self._waiting: dict[str, deque[tuple[Request, Future]]] = {}
+        self._timers: dict[str, Timer] = {}
+        self._lock = RLock()
+
+        # Create thread pool executor
+        # 创建线程池执行器
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+        # Construct URL opener
+        # 构建URL打开器
+        self._opener = build_opener()
+
+    def _submit(self, request: Request) -> Future:
+        """
+        Submit a request to the thread pool, once its host has a free slot and a token.
+        在请求的主机有空闲名额和令牌后，将请求提交到线程池。
+        """
+        if not self.limiter.enabled:
+            return self._executor.submit(self._load_request, request)
+
+        future = Future()
+        host = urlsplit(request.full_url).netloc
+        with self._lock:
+            self._waiting.setdefault(host, deque()).append((request, future))
+        self._dispatch(host)
+        return future
+
+    def _dispatch(self, host: str):
+        """
+        Start the waiting requests of a host as far as its limits allow.
+        在主机限制允许的范围内开始其等待中的请求。
+        """
+        with self._lock:
+            self._timers.pop(host, None)
+            waiting = self._waiting.get(host)
+            while waiting:
+                wait = self.limiter.acquire(host)
+                if wait:
+                    # Out of slots: the next release dispatches again. Out of tokens: dispatch when one is added.
+                    # 没有名额：下一次释放时再次分派。没有令牌：在加入令牌时分派。
+                    if wait != float('inf') and host not in self._timers:
+                        timer = self._timers[host] = Timer(wait, self._dispatch, (host,))
+                        timer.daemon = True
+                        timer.start()
+                    return
+
+                request, future = waiting.popleft()
+                if not future.set_running_or_notify_cancel():
+                    # Cancelled while waiting for its host
+                    # 在等待其主机时被取消
+                    self.limiter.release(host)
+                    self._parsers.pop(request, None)
+                    self._raw.discard(request)
+                    continue
+
+                inner = self._executor.submit(self._load_request, request)
+                inner.add_done_callback(partial(self._done, host, future))
+
+            self._waiting.pop(host, None)
+
+    def _done(self, host: str, future: Future, inner: Future):
+        """
+        Pass on the result of a finished request and let the next request of its host start.
+        传递已完成请求的结果，并让其主机的下一个请求开始。
+        """
+        self.limiter.release(host)
+        if inner.exception() is not None:
+            future.set_exception(inner.exception())
+        else:
+            future.set_result(inner.result())
+        self._dispatch(host)
+
+    def close(self):
+        """
+        Shut down the thread pool.
+        关闭线程池。
+        """
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+        self._executor.shutdown(wait=False)
 
     def _load_request(self, request: Request):
         """
-        Load a single request and return the response content.
-        加载单个请求并返回响应内容。
+        Load a single request and return the response content, retrying temporary failures.
+        加载单个请求并返回响应内容，临时故障会被重试。
+
+        :param request: 要加载的Request对象。
+                        The Request object to load.
+        :return: 响应的内容或在出现错误时返回异常对象。
+                 The response content or an exception object on failure.
+        """
+        try:
+            rejected = self._rejected(request)
+            if rejected is not None:
+                return rejected
+
+            attempt = 0
+            while True:
+                result = self._attempt(request)
+                delay = self._settle(request, result, attempt)
+                if delay is None or request in self._cancelled:
+                    return result
+
+                sleep(delay)
+                attempt += 1
+
+        finally:
+            self._parsers.pop(request, None)
+            self._raw.discard(request)
+
+    def _attempt(self, request: Request):
+        """
+        Send a request once.
+        发送一次请求。
 
         :param request: 要加载的Request对象。
                         The Request object to load.
@@ -122,14 +943,448 @@ class Downloader:
             # Open request and read response
             # 打开请求并读取响应
             with self._opener.open(request, timeout=self.timeout) as response:
-                response = response.read().decode('utf-8')
+                self._stage(request, response.headers)
+
+                # Decompress and decode the body while reading it, read1() returns as soon as data arrives so that
+                # a cancelled request stops at the next chunk
+                # 在读取响应体的同时解压和解码，read1() 在数据到达时立即返回，使被取消的请求在下一个数据块处停止
+                reader = self._reader(request, response.headers.get('Content-Encoding'))
+                while chunk := response.read1(CHUNK_SIZE):
+                    if request in self._cancelled:
+                        return DeadlineExceeded(request.full_url)
+                    reader.feed(chunk)
+
+                response = reader.close()
+                self._record(request, reader.statistic)
                 logger.debug(f'Load request {request} successfully')
                 return response
 
+        except HTTPError as e:
+            if e.code == 304:
+                logger.info(f'Request {request} is not modified')
+                return NotModified(request.full_url)
+
+            logger.error(f'Failed to load request: {request} due to {e}')
+            return e
+
+        except Exception as e:
+            logger.error(f'Failed to load request: {request} due to {e}')
+            return e
+
+
+class ConnectionPool(object):
+    """
+    Per-host pool of idle keep-alive connections for the asynchronous engine.
+    异步引擎使用的、按主机划分的空闲长连接池。
+    """
+
+    def __init__(self, size: int = 4):
+        """
+        Initialize ConnectionPool object.
+        初始化ConnectionPool对象。
+
+        :param size: 每个主机最多保留的空闲连接数量。
+                     Maximum number of idle connections kept for each host.
+        """
+        self.size = size
+        self._ssl_context = create_default_context()
+
+        # A mapping from (scheme, host, port) to idle (reader, writer) pairs
+        # (协议, 主机, 端口) 到空闲 (reader, writer) 对的映射
+        self._idle: dict[tuple[str, str, int], list[tuple[StreamReader, StreamWriter]]] = {}
+
+    async def acquire(self, key: tuple[str, str, int]) -> tuple[StreamReader, StreamWriter, bool]:
+        """
+        Take an idle connection for the host, or open a new one.
+        取出该主机的一个空闲连接，或新建一个连接。
+
+        :param key: 由协议、主机和端口组成的元组。
+                    A tuple of scheme, host and port.
+        :return: reader、writer 以及该连接是否为复用连接。
+                 The reader, the writer and whether the connection is reused.
+        """
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if writer.is_closing() or reader.at_eof():
+                # Drop connections closed by the server while idle
+                # 丢弃空闲期间被服务器关闭的连接
+                writer.close()
+                continue
+
+            logger.debug(f'Reuse connection to {key[1]}:{key[2]}')
+            return reader, writer, True
+
+        scheme, host, port = key
+        logger.debug(f'Open connection to {host}:{port}')
+        if scheme == 'https':
+            reader, writer = await open_connection(host, port, ssl=self._ssl_context, server_hostname=host)
+        else:
+            reader, writer = await open_connection(host, port)
+        return reader, writer, False
+
+    def release(self, key: tuple[str, str, int], reader: StreamReader, writer: StreamWriter, reusable: bool):
+        """
+        Return a connection to the pool, or close it if it cannot be reused.
+        将连接归还连接池，若无法复用则关闭。
+
+        :param key: 由协议、主机和端口组成的元组。
+                    A tuple of scheme, host and port.
+        :param reusable: 连接是否可以继续使用。
+                         Whether the connection can be used again.
+        """
+        idle = self._idle.setdefault(key, [])
+        if reusable and len(idle) < self.size and not writer.is_closing():
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        """
+        Close all idle connections.
+        关闭所有空闲连接。
+        """
+        for idle in self._idle.values():
+            for _, writer in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class AsyncDownloader(BaseDownloader):
+    """
+    An asyncio downloader with per-host keep-alive pools and a global concurrency limit.
+    基于 asyncio 的下载器，拥有按主机划分的长连接池和全局并发上限。
+    """
+
+    def __init__(self, default_headers: dict = None, timeout: int = 8, workers: int = 64, pool_size: int = 4,
+                 cache: SourceCache = None, retries: int = 0, backoff: float = 1.0, breaker: CircuitBreaker = None,
+                 limiter: HostLimiter = None):
+        """
+        Initialize AsyncDownloader object.
+        初始化AsyncDownloader对象。
+
+        :param default_headers: 默认的HTTP头部信息字典。
+                                Default HTTP header information dictionary.
+        :param timeout: 每次网络操作的超时时间（秒）。
+                        Timeout for each network operation (in seconds).
+        :param workers: 同时进行的请求数量上限。
+                        Maximum number of requests in flight.
+        :param pool_size: 每个主机最多保留的空闲连接数量。
+                          Maximum number of idle connections kept for each host.
+        :param cache: 用于发送条件请求的来源缓存。
+                      Source cache used to send conditional requests.
+        :param retries: 临时失败后的最大重试次数，参见 BaseDownloader。
+                        Maximum number of retries after a temporary failure, see BaseDownloader.
+        :param backoff: 第一次重试前的最长等待秒数。
+                        The longest wait in seconds before the first retry.
+        :param breaker: 跳过持续失败主机的断路器。
+                        Circuit breaker that skips hosts which keep failing.
+        :param limiter: 每个主机的并发和速率限制。
+                        Concurrency and rate limits of each host.
+        """
+        super().__init__(default_headers, timeout, cache, retries, backoff, breaker, limiter)
+
+        self._semaphore = Semaphore(workers)
+
+        # Requests waiting for a slot of their host are woken up when one is released
+        # 等待主机名额的请求会在名额释放时被唤醒
+        self._conditions: dict[str, Condition] = {}
+        self._pool = ConnectionPool(pool_size)
+
+        # Run the event loop in a background thread, so that get() and complete() stay synchronous
+        # 在后台线程中运行事件循环，使 get() 和 complete() 保持同步接口
+        self._loop = new_event_loop()
+        self._thread = Thread(target=self._loop.run_forever, name='AsyncDownloader', daemon=True)
+        self._thread.start()
+
+    def _submit(self, request: Request) -> Future:
+        """
+        Schedule a request on the event loop.
+        将请求调度到事件循环中。
+        """
+        return run_coroutine_threadsafe(self._load_request(request), self._loop)
+
+    def close(self):
+        """
+        Cancel the pending requests, close the pooled connections and stop the event loop.
+        取消未完成的请求，关闭连接池中的连接并停止事件循环。
+        """
+        run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _shutdown(self):
+        """
+        Cancel every other task on the event loop and wait for them, so that none is destroyed while pending.
+        取消事件循环中的其他所有任务并等待其结束，使任何任务都不会在未完成时被销毁。
+        """
+        tasks = [i for i in all_tasks() if i is not current_task()]
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, return_exceptions=True)
+
+        self._pool.close()
+        await self._loop.shutdown_asyncgens()
+
+    async def _load_request(self, request: Request):
+        """
+        Load a single request and return the response content, retrying temporary failures.
+        加载单个请求并返回响应内容，临时故障会被重试。
+
+        :param request: 要加载的Request对象。
+                        The Request object to load.
+        :return: 响应的内容或在出现错误时返回异常对象。
+                 The response content or an exception object on failure.
+        """
+        host = urlsplit(request.full_url).netloc
+        acquired = False
+        try:
+            rejected = self._rejected(request)
+            if rejected is not None:
+                return rejected
+
+            if self.limiter.enabled:
+                await self._acquire(host)
+                acquired = True
+
+            attempt = 0
+            while True:
+                try:
+                    result = await self._attempt(request)
+                except CancelledError:
+                    # Cancelled at the deadline while waiting on the host, which counts against it
+                    # 在等待主机时因截止时间被取消，计为该主机的一次失败
+                    self._settle(request, DeadlineExceeded(request.full_url), attempt)
+                    raise
+                delay = self._settle(request, result, attempt)
+                if delay is None:
+                    return result
+
+                # Wait without holding a slot of the semaphore
+                # 等待时不占用信号量的名额
+                await async_sleep(delay)
+                attempt += 1
+
+        finally:
+            if acquired:
+                await self._release(host)
+            self._parsers.pop(request, None)
+            self._raw.discard(request)
+
+    async def _acquire(self, host: str):
+        """
+        Wait until the host has a free slot and a token, requests to other hosts go on meanwhile.
+        等待主机有空闲名额和令牌，其间发往其他主机的请求照常进行。
+        """
+        condition = self._conditions.setdefault(host, Condition())
+        async with condition:
+            while wait := self.limiter.acquire(host):
+                try:
+                    await wait_for(condition.wait(), None if wait == float('inf') else wait)
+                except (TimeoutError, AsyncTimeoutError):
+                    # The next token is due, asyncio.TimeoutError differs from the builtin before Python 3.11
+                    # 下一个令牌已到期，在 Python 3.11 之前 asyncio.TimeoutError 与内置异常不同
+                    pass
+
+    async def _release(self, host: str):
+        """
+        Give back the slot of the host and wake up the requests waiting for it.
+        归还主机的名额并唤醒等待它的请求。
+        """
+        self.limiter.release(host)
+        condition = self._conditions[host]
+        async with condition:
+            condition.notify_all()
+
+    async def _attempt(self, request: Request):
+        """
+        Send a request once, following redirects.
+        发送一次请求，并跟随重定向。
+
+        :param request: 要加载的Request对象。
+                        The Request object to load.
+        :return: 响应的内容或在出现错误时返回异常对象。
+                 The response content or an exception object on failure.
+        """
+        try:
+            async with self._semaphore:
+                logger.info(f'Start to load request: {request}')
+
+                url = request.full_url
+                for _ in range(MAX_REDIRECTS + 1):
+                    status, reason, headers, body, statistic = await self._fetch(request, url)
+
+                    if status in REDIRECT_CODES and headers.get('Location'):
+                        # Follow redirects like urllib does
+                        # 像 urllib 一样跟随重定向
+                        url = urljoin(url, headers['Location'])
+                        logger.debug(f'Redirect {request} to {url}')
+                        continue
+
+                    if status == 304:
+                        logger.info(f'Request {request} is not modified')
+                        return NotModified(request.full_url)
+
+                    if status >= 400:
+                        raise HTTPError(url, status, reason, headers, None)
+
+                    self._stage(request, headers)
+                    self._record(request, statistic)
+                    logger.debug(f'Load request {request} successfully')
+                    return body
+
+                raise HTTPError(url, status, 'Too many redirects', headers, None)
+
         except Exception as e:
             logger.error(f'Failed to load request: {request} due to {e}')
             return e
 
+    async def _fetch(self, request: Request,
+                     url: str) -> tuple[int, str, HTTPMessage, str | set[str] | None, TransferStatistic | None]:
+        """
+        Send one GET request over a pooled connection, retrying once if a reused connection was stale.
+        通过连接池中的连接发送一次GET请求，若复用的连接已失效则重试一次。
+
+        :param request: 原始的Request对象，提供请求头部。
+                        The original Request object, which provides the headers.
+        :param url: 本次请求的URL，重定向后可能与原始URL不同。
+                    The URL to request, which may differ from the original one after redirects.
+        :return: 状态码、原因短语、响应头部、响应结果和传输统计，非2xx响应的结果和统计为空。
+                 The status code, the reason phrase, the response headers, the result and the transfer statistic.
+                 The result and the statistic are None for non-2xx responses.
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f'Unsupported scheme: {parts.scheme}')
+
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        selector = parts.path or '/'
+        if parts.query:
+            selector = f'{selector}?{parts.query}'
+
+        lines = [f'GET {selector} HTTP/1.1', f'Host: {parts.netloc.rpartition("@")[2]}']
+        lines.extend(f'{name}: {value}' for name, value in request.header_items()
+                     if name.lower() not in ('host', 'connection'))
+        lines.append('Connection: keep-alive')
+        payload = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        while True:
+            reader, writer, reused = await wait_for(self._pool.acquire(key), self.timeout)
+            try:
+                writer.write(payload)
+                await wait_for(writer.drain(), self.timeout)
+                version, status, reason, headers = await self._read_head(reader)
+
+                # Decompress and decode the body of successful responses while reading it,
+                # the bodies of other responses are only drained
+                # 在读取成功响应的响应体的同时解压和解码，其他响应的响应体仅被读完
+                body = self._reader(request, headers.get('Content-Encoding')) if 200 <= status < 300 else None
+                async for chunk in self._iter_body(reader, status, headers):
+                    if body:
+                        body.feed(chunk)
+
+            except (ConnectionError, EOFError) as e:
+                writer.close()
+                if reused:
+                    # The server closed the idle connection, try again with a new one
+                    # 服务器关闭了空闲连接，使用新连接重试
+                    logger.debug(f'Stale connection to {key[1]}:{key[2]}: {e}')
+                    continue
+                raise
+
+            except BaseException:
+                writer.close()
+                raise
+
+            self._pool.release(key, reader, writer, self._reusable(version, status, headers))
+            if body is None:
+                return status, reason, headers, None, None
+            return status, reason, headers, body.close(), body.statistic
+
+    async def _read_head(self, reader: StreamReader) -> tuple[str, int, str, HTTPMessage]:
+        """
+        Read the status line and the headers of a response.
+        读取响应的状态行和头部。
+
+        :return: 协议版本、状态码、原因短语和响应头部。
+                 The protocol version, the status code, the reason phrase and the response headers.
+        """
+        line = await wait_for(reader.readline(), self.timeout)
+        if not line:
+            raise EOFError('Connection closed before the status line')
+
+        version, status, *reason = line.decode('latin-1').split(None, 2)
+        headers = HTTPMessage()
+
+        while True:
+            line = await wait_for(reader.readline(), self.timeout)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip()] = value.strip()
+
+        return version, int(status), reason[0].strip() if reason else '', headers
+
+    async def _iter_body(self, reader: StreamReader, status: int, headers: HTTPMessage):
+        """
+        Yield the response body chunk by chunk according to its framing.
+        根据响应的分帧方式逐块产出响应体。
+        """
+        if not self._has_body(status):
+            return
+
+        if 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            while True:
+                size = await wait_for(reader.readline(), self.timeout)
+                if not size:
+                    raise EOFError('Connection closed inside a chunked body')
+                size = int(size.split(b';')[0].strip(), 16)
+                if size == 0:
+                    # Skip trailers
+                    # 跳过尾部头部
+                    while await wait_for(reader.readline(), self.timeout) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return
+                yield await wait_for(reader.readexactly(size), self.timeout)
+                await wait_for(reader.readexactly(2), self.timeout)
+
+        elif headers.get('Content-Length') is not None:
+            remain = int(headers['Content-Length'])
+            while remain > 0:
+                chunk = await wait_for(reader.read(min(remain, CHUNK_SIZE)), self.timeout)
+                if not chunk:
+                    raise EOFError('Connection closed before the end of the body')
+                remain -= len(chunk)
+                yield chunk
+
+        else:
+            # The body ends when the server closes the connection
+            # 服务器关闭连接时响应体结束
+            while chunk := await wait_for(reader.read(CHUNK_SIZE), self.timeout):
+                yield chunk
+
+    @staticmethod
+    def _has_body(status: int) -> bool:
+        """
+        Whether a response with this status code carries a body.
+        该状态码的响应是否带有响应体。
+        """
+        return not (100 <= status < 200 or status in (204, 304))
+
+    def _reusable(self, version: str, status: int, headers: HTTPMessage) -> bool:
+        """
+        Whether the connection can be kept alive after this response.
+        该响应之后连接是否可以保持。
+        """
+        connection = headers.get('Connection', '').lower()
+        if connection == 'close' or (version != 'HTTP/1.1' and connection != 'keep-alive'):
+            return False
+
+        if not self._has_body(status):
+            return True
+        return 'chunked' in headers.get('Transfer-Encoding', '').lower() or headers.get('Content-Length') is not None
+
 
 if __name__ == '__main__':
     pass
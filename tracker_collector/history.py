@@ -0,0 +1,196 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from logging import getLogger
+from sqlite3 import connect
+from time import time
+from typing import Iterable
+
+logger = getLogger(__name__)
+
+# Kinds of presence recorded for each tracker
+# 为每个追踪器记录的出现类型
+SEEN = 'seen'
+ALIVE = 'alive'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cycle (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    time REAL NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 0,
+    alive INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS interval (
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    stop INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS interval_open ON interval (kind, stop);
+CREATE INDEX IF NOT EXISTS interval_url ON interval (url, kind);
+'''
+
+
+class History(object):
+    """
+    SQLite store of when each tracker was seen and alive.
+    记录每个追踪器何时被收集到以及何时存活的 SQLite 存储。
+
+    Presence is kept as intervals of cycles, an interval is opened when a tracker appears and closed when it
+    disappears, so a cycle only writes the trackers that changed.
+    出现情况以周期区间的形式保存，追踪器出现时开启区间，消失时关闭区间，因此每个周期只写入发生变化的追踪器。
+    """
+
+    def __init__(self, file_path: str = ':memory:', retention: int = 0):
+        """
+        Initialize the History object and open the database.
+        初始化 History 对象并打开数据库。
+
+        :param file_path: The path of the database file.
+                          数据库文件路径。
+        :param retention: The number of latest cycles kept, older cycles are deleted when a cycle begins. 0 keeps
+                          every cycle.
+                          保留的最近周期数量，开始新周期时删除更早的周期。0 表示保留所有周期。
+        """
+        self.file_path = file_path
+        self.retention = retention
+        self._connection = connect(file_path)
+        self._connection.executescript(SCHEMA)
+
+    def begin(self) -> int:
+        """
+        Start a new cycle, deleting the cycles beyond the retention in the same transaction.
+        开始一个新周期，并在同一事务中删除超出保留数量的周期。
+
+        :return: The ID of the cycle.
+                 周期 ID。
+        """
+        with self._connection:
+            cycle = self._connection.execute('INSERT INTO cycle (time) VALUES (?)', (time(),)).lastrowid
+            if self.retention > 0:
+                self._prune(cycle - self.retention + 1)
+            return cycle
+
+    def _prune(self, oldest: int):
+        """
+        Delete the cycles before the oldest kept one and the intervals that ended before it.
+        删除最早保留周期之前的周期，以及在其之前结束的区间。
+
+        Intervals that are still open or end later keep their start, which then refers to a deleted cycle and reads
+        as the oldest kept cycle.
+        仍未关闭或更晚结束的区间保留其开始周期，该周期已被删除，读取时视为最早保留的周期。
+        """
+        intervals = self._connection.execute(
+            'DELETE FROM interval WHERE kind IN (?, ?) AND stop < ?', (SEEN, ALIVE, oldest)).rowcount
+        cycles = self._connection.execute('DELETE FROM cycle WHERE id < ?', (oldest,)).rowcount
+        if cycles:
+            logger.debug(f'Prune {cycles} cycles and {intervals} intervals of history before cycle {oldest}')
+
+    def update(self, cycle: int, trackers: Iterable[str], kind: str = SEEN):
+        """
+        Record the trackers present in a cycle, only the difference from the previous cycle is written.
+        记录某个周期中出现的追踪器，只写入与上一周期的差异。
+
+        :param cycle: The ID of the cycle returned by begin().
+                      begin() 返回的周期 ID。
+        :param trackers: The trackers present in the cycle.
+                         该周期中出现的追踪器。
+        :param kind: SEEN for gathered trackers, ALIVE for trackers that responded to the probes.
+                     SEEN 表示收集到的追踪器，ALIVE 表示响应探测的追踪器。
+        """
+        if kind not in (SEEN, ALIVE):
+            raise ValueError(f'{kind} is not a valid history kind')
+
+        trackers = set(trackers)
+        with self._connection:
+            # The last cycle this kind was recorded in, e.g. probing may be disabled in some cycles
+            # 上一次记录此类型的周期，例如某些周期可能未启用探测
+            previous = self._connection.execute(
+                f'SELECT MAX(id) FROM cycle WHERE {kind} = 1 AND id < ?', (cycle,)).fetchone()[0]
+            self._connection.execute(f'UPDATE cycle SET {kind} = 1 WHERE id = ?', (cycle,))
+
+            present = {row[0] for row in self._connection.execute(
+                'SELECT url FROM interval WHERE kind = ? AND stop IS NULL', (kind,))}
+
+            added = trackers - present
+            removed = present - trackers
+
+            self._connection.executemany(
+                'INSERT INTO interval (url, kind, start) VALUES (?, ?, ?)',
+                ((url, kind, cycle) for url in added))
+
+            # The interval ends at the last cycle the tracker was present in
+            # 区间结束于追踪器最后一次出现的周期
+            self._connection.executemany(
+                'UPDATE interval SET stop = ? WHERE url = ? AND kind = ? AND stop IS NULL',
+                ((previous, url, kind) for url in removed))
+
+        logger.debug(f'History of cycle {cycle}: {len(added)} {kind} trackers added, {len(removed)} removed')
+
+    def recent(self, cycles: int, kind: str = SEEN) -> set[str]:
+        """
+        Get the trackers present in any of the latest cycles.
+        获取在最近若干周期中出现过的追踪器。
+
+        :param cycles: The number of latest cycles this kind was recorded in, including the current one.
+                       记录了此类型的最近周期数量，包括当前周期。
+        :param kind: SEEN or ALIVE.
+                     SEEN 或 ALIVE。
+        """
+        if kind not in (SEEN, ALIVE):
+            raise ValueError(f'{kind} is not a valid history kind')
+
+        row = self._connection.execute(
+            f'SELECT MIN(id) FROM (SELECT id FROM cycle WHERE {kind} = 1 ORDER BY id DESC LIMIT ?)',
+            (cycles,)).fetchone()
+        if row[0] is None:
+            return set()
+
+        return {row[0] for row in self._connection.execute(
+            'SELECT DISTINCT url FROM interval WHERE kind = ? AND (stop IS NULL OR stop >= ?)', (kind, row[0]))}
+
+    def tracker(self, url: str) -> dict[str, float | None]:
+        """
+        Get when a tracker was first seen, last seen and last alive.
+        获取追踪器首次被收集、最后一次被收集以及最后一次存活的时间。
+
+        :param url: The tracker.
+                    追踪器。
+        :return: A mapping with first_seen, last_seen and last_alive timestamps, None if it never happened.
+                 包含 first_seen、last_seen 和 last_alive 时间戳的映射，从未发生时为 None。
+        """
+        # An open interval lasts until the latest cycle its kind was recorded in
+        # 未关闭的区间持续到最近一次记录其类型的周期
+        (first_seen, last_seen), (_, last_alive) = (self._connection.execute(
+            f'SELECT MIN(start), MAX(COALESCE(stop, (SELECT MAX(id) FROM cycle WHERE {kind} = 1))) '
+            f'FROM interval WHERE url = ? AND kind = ?', (url, kind)).fetchone() for kind in (SEEN, ALIVE))
+
+        return {
+            'first_seen': self._time(first_seen),
+            'last_seen': self._time(last_seen),
+            'last_alive': self._time(last_alive),
+        }
+
+    def _time(self, cycle: int | None) -> float | None:
+        """
+        Get the start time of a cycle, or of the oldest kept cycle if it was pruned.
+        获取周期的开始时间，若该周期已被删除则获取最早保留周期的开始时间。
+        """
+        if cycle is None:
+            return None
+        row = self._connection.execute(
+            'SELECT time FROM cycle WHERE id >= ? ORDER BY id LIMIT 1', (cycle,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        """
+        Close the database.
+        关闭数据库。
+        """
+        self._connection.close()
+
+
+if __name__ == '__main__':
+    pass
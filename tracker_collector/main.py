@@ -1,14 +1,31 @@
 # -*- coding:utf-8 -*-
 # AUTHOR: Sun
 
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from functools import partial
+from itertools import zip_longest
 from logging import getLogger
-from time import sleep
+from os import cpu_count
+from time import monotonic, perf_counter, sleep, time
+from typing import Iterable, Iterator
+from urllib.parse import urlsplit
+from urllib.request import Request
 
 from log import LogConfig, read_config
 from config import Config
-from download import Downloader
+from download import BaseDownloader, Downloader, AsyncDownloader, CircuitBreaker, DeadlineExceeded, HostLimiter, \
+    NotModified
+from history import History, ALIVE
+from metrics import CYCLE_SECONDS, LAST_CYCLE, FETCH_SECONDS, FETCH_BYTES, FETCH_ERRORS, ANALYSIS_SECONDS, TRACKERS
 from analysis import Analysis
-from server import Run
+from cache import SourceCache, ResultCache
+from normalize import Normalizer
+from pipeline import Pipeline, Stage
+from probe import Prober
+from publish import Publisher
+from schedule import Scheduler, MISSED
+from score import Scores
+from server import Run, SNAPSHOT
 
 logger = getLogger(__name__)
 
@@ -26,8 +43,27 @@ class Main(object):
     def __init__(self):
         self.config = Config()
         self.log_config = LogConfig(*read_config())
+        self.cache = SourceCache(self.config.get('cache', 'source_file'))
+        self.result_cache = self.create_result_cache()
         self.downloader = self.create_downloader()
         self.analysis = self.create_analysis()
+        self.normalizer = Normalizer()
+        self.prober = self.create_prober()
+        self.scores = Scores(self.config.get('probe', 'window'), self.config.get('probe', 'score_file'))
+        self.history = self.create_history()
+        self.publisher = Publisher(self.config.get('base', 'save_file'))
+
+        # Trackers of the last successful fetch of each source, by source URL.
+        # 每个来源最近一次成功下载的追踪器，以来源URL为键。
+        self.sources: dict[str, set[str]] = {}
+
+        # Digest of the list and the source groups last swapped into the server, so unchanged cycles skip the rebuild.
+        # 最近一次换入服务器的列表摘要和来源分组，使未变化的周期跳过重建。
+        self.served: tuple[str, dict[str, list[str]]] | None = None
+
+        # Monotonic time the downloads of the current cycle must finish by, None for no limit.
+        # 当前周期的下载必须完成的单调时间，None表示不限制。
+        self.deadline: float | None = None
 
         plugin = self.config.get('base', 'plugin')
         for i in plugin:
@@ -44,96 +80,535 @@ class Main(object):
         thread = Run()
         thread.start()
 
-    def run(self):
+    def run(self, urls: list[str] = None) -> dict[str, bool | None]:
         """
         Runs the main process of fetching data, analyzing it, and saving the results.
         运行主流程，包括获取数据、分析数据以及保存结果。
+
+        :param urls: The source URLs to fetch, the other sources keep the trackers of their last fetch. All sources
+                     are fetched if it is None.
+                     需要下载的来源URL，其他来源保留其上次下载的追踪器。为None时下载所有来源。
+        :return: A mapping from each fetched source URL to whether its trackers changed since its last fetch, None if
+                 it failed or was fetched for the first time.
+                 每个已下载来源URL到其追踪器自上次下载以来是否变化的映射，下载失败或首次下载时为None。
         """
         logger.info('Starting fetching data...')
+        start = perf_counter()
+
+        if urls is None:
+            urls = [url for url, _ in self.gather_url()]
+
+        # Downloads still running at the deadline are cancelled, so that the list is published on time.
+        # 截止时间时仍在进行的下载会被取消，使列表按时发布。
+        budget = self.config.get('request', 'deadline')
+        self.deadline = monotonic() + budget if budget > 0 else None
 
         # Store unique trackers.
         # 存储唯一追踪器。
         trackers: set[str] = set()
-
-        # Fetch URLs and headers from the configuration.
-        # 获取URL和头部信息。
-        for url, headers in self.gather_url():
-            self.downloader.get(url, headers=headers)
-
-        # Process completed requests.
-        # 处理已完成的请求。
-        for result, request in self.downloader.complete():
-            if isinstance(result, Exception):
-                # Skip any failed requests.
-                # 跳过任何失败的请求。
+        self.downloader.statistics.clear()
+
+        # Trackers found in each fetched source, by source URL.
+        # 每个已下载来源中找到的追踪器，以来源URL为键。
+        fetched: dict[str, set[str]] = {}
+
+        # Each source flows through fetch -> decode -> analyze -> normalize -> merge, the bounded queues between
+        # the stages cap how many downloaded bodies are held in memory.
+        # 每个来源依次经过 下载 -> 解码 -> 分析 -> 规范化 -> 合并，阶段之间的有界队列限制了内存中保存的响应体数量。
+        pipeline = self.create_pipeline(trackers, fetched)
+        items = self.gather_url(urls)
+        if isinstance(self.downloader, AsyncDownloader):
+            items = self.drain(items)
+        pipeline.run(items)
+
+        # Log the throughput of every stage.
+        # 记录每个阶段的吞吐量。
+        for line in pipeline.report():
+            logger.info(f'Pipeline stage {line}')
+
+        # Log how many bytes compression saved in this cycle.
+        # 记录本周期压缩节省的字节数。
+        statistics = self.downloader.statistics.values()
+        logger.info(f'Received {sum(i.compressed for i in statistics)} bytes, '
+                    f'{sum(i.decompressed for i in statistics)} bytes after decompression')
+
+        # Persist the validators and the analysis results for the next cycle.
+        # 持久化校验器和分析结果，供下一个周期使用。
+        self.cache.save()
+        if self.result_cache:
+            logger.info(f'Result cache hits: {self.result_cache.hits}, misses: {self.result_cache.misses}')
+            self.result_cache.save()
+
+        # Sources that were not due or failed keep the trackers of their last successful fetch, so the output stays
+        # stable while a source is down.
+        # 未到期或下载失败的来源保留其上次成功下载的追踪器，使来源故障期间输出保持稳定。
+        changes = {}
+        for url in urls:
+            if url in fetched:
+                previous = self.sources.get(url)
+                changes[url] = None if previous is None else previous != fetched[url]
+                self.sources[url] = fetched[url]
                 continue
 
-            # Analyze the response and update the trackers set.
-            # 分析响应，并更新追踪器集合。
-            trackers.update(self.analysis.analyze(request.full_url, result))
+            changes[url] = None
+            cached = self.cache.trackers(url, self.analysis.signature(url))
+            if url not in self.sources and cached:
+                # The last good trackers of the previous run of the program.
+                # 程序上一次运行时最后一次成功获取的追踪器。
+                self.sources[url] = self.normalizer(cached)
+            if url in self.sources:
+                logger.warning(f'Failed to fetch {url}, reuse its {len(self.sources[url])} last good trackers')
+        trackers = set().union(*self.sources.values())
 
         # Log the number of trackers found.
         # 记录找到的追踪器数量。
-        logger.info(f'Successfully gathered {len(trackers)} trackers')
+        logger.info(f'Successfully gathered {len(trackers)} trackers, '
+                    f'{sum(1 for i in changes.values() if i)} of {len(urls)} fetched sources changed')
+        TRACKERS.set(len(trackers), state='gathered')
+
+        # Record the difference from the previous cycle, and keep the trackers that were seen recently but are
+        # missing from this cycle, e.g. because a source failed to download.
+        # 记录与上一周期的差异，并保留最近出现过、但本周期缺失的追踪器，例如因为某个来源下载失败。
+        cycle = None
+        if self.history:
+            cycle = self.history.begin()
+            self.history.update(cycle, trackers)
+
+            keep_cycles = self.config.get('history', 'keep_cycles')
+            if keep_cycles > 1:
+                recent = self.history.recent(keep_cycles)
+                logger.info(f'Keep {len(recent - trackers)} trackers seen in the last {keep_cycles} cycles')
+                trackers |= recent
+
+        # Drop the trackers that do not respond.
+        # 丢弃不响应的追踪器。
+        if self.prober:
+            trackers = self.probe(trackers, cycle)
+            TRACKERS.set(len(trackers), state='alive')
+
+        # Save the trackers to a file, the most reliable and fastest trackers first.
+        # 将追踪器保存到文件中，最可靠、最快的追踪器排在最前。
+        ranked = self.scores.rank(trackers)
+        self.publisher.publish(ranked)
+        TRACKERS.set(len(ranked), state='published')
+
+        # Serve the new list and the list of each source without waiting for the server to notice the file has
+        # changed, unless neither of them changed.
+        # 无需等待服务器发现文件变化，立即提供新列表以及每个来源的列表，除非两者都没有变化。
+        served = self.publisher.digest, self.group_sources(ranked, self.sources)
+        if served != self.served:
+            SNAPSHOT.update(self.publisher.content, served[1])
+            self.served = served
+
+        CYCLE_SECONDS.observe(perf_counter() - start)
+        LAST_CYCLE.set(time())
+        return changes
+
+    def group_sources(self, ranked: list[str], sources: dict[str, set[str]]) -> dict[str, list[str]]:
+        """
+        Groups the published trackers by the tracker section of their source, keeping the published order.
+        按来源的追踪器配置节对发布的追踪器分组，并保持发布顺序。
+
+        :param ranked: The published trackers.
+                       发布的追踪器。
+        :param sources: The trackers found in each source, by source URL.
+                        每个来源中找到的追踪器，以来源URL为键。
+        """
+        groups = {}
+        for name in self.config.get('base', 'tracker'):
+            found = sources.get(self.config.get(f'tracker_{name}', 'url'), set())
+            groups[name] = [i for i in ranked if i in found]
+        return groups
 
-        # Save the trackers to a file.
-        # 将追踪器保存到文件中。
-        file = self.config.get('base', 'save_file')
-        logger.info(f'Writing trackers to file: {file}')
-        with open(file, 'w') as f:
-            f.write('\n'.join(trackers))
+    def create_pipeline(self, trackers: set[str], sources: dict[str, set[str]]) -> Pipeline:
+        """
+        Creates the pipeline of one cycle based on the configuration.
+        根据配置创建一个周期的流水线。
+
+        :param trackers: The set the merge stage adds trackers to.
+                         合并阶段向其中添加追踪器的集合。
+        :param sources: The mapping the merge stage adds the trackers of each source URL to.
+                        合并阶段向其中添加每个来源URL的追踪器的映射。
+        """
+        capacity = self.config.get('pipeline', 'capacity')
+
+        # The thread engine blocks a fetcher on each download, so the fetch stage is as wide as its pool. The async
+        # engine is fed by drain() without a thread per download, and the fetch stage only records the results.
+        # 线程引擎的每个下载都会阻塞一个下载者，因此下载阶段与其线程池大小相同。异步引擎由 drain() 供料，无需每个下载
+        # 占用一个线程，下载阶段只记录结果。
+        if isinstance(self.downloader, AsyncDownloader):
+            fetchers, fetch = 1, self.record
+        else:
+            fetchers, fetch = self.config.get('base', 'thread_pool_size'), self.fetch
 
-    def create_downloader(self) -> Downloader:
+        # The analyze stage is as wide as the analysis pool.
+        # 分析阶段与分析池的大小相同。
+        if self.analysis.executor == 'serial':
+            analyzers = 1
+        else:
+            analyzers = self.analysis.workers or cpu_count() or 1
+
+        def merge(item: tuple[str, set[str]]):
+            url, result = item
+            trackers.update(result)
+            sources.setdefault(url, set()).update(result)
+
+        logger.info(f'Create pipeline with args: capacity={capacity}, fetchers={fetchers}, analyzers={analyzers}')
+        return Pipeline([
+            Stage('fetch', fetch, fetchers, capacity),
+            Stage('decode', self.decode, 1, capacity),
+            Stage('analyze', self.analyze, analyzers, capacity),
+            Stage('normalize', self.normalize, 1, capacity),
+            Stage('merge', merge, 1, capacity),
+        ])
+
+    def fetch(self, item: tuple[str, dict]) -> tuple[str, object]:
+        """
+        Pipeline stage: download one source.
+        流水线阶段：下载一个来源。
+        """
+        url, headers = item
+        if self.expired(url):
+            return url, DeadlineExceeded(url)
+
+        timeout = self.remaining()
+        start = perf_counter()
+        request, future = self.submit(url, headers)
+        return self.record((url, start, self.downloader.result(request, future, timeout)))
+
+    def drain(self, items: Iterable[tuple[str, dict]]) -> Iterator[tuple[str, float | None, object]]:
+        """
+        Feeds the async engine, keeping up to [request] concurrency downloads in flight, and yields each download as
+        it completes.
+        为异步引擎供料，保持最多 [request] concurrency 个下载同时进行，并在每个下载完成时将其产出。
+
+        :param items: The source URLs and their headers.
+                      来源URL及其头部信息。
+        :return: The source URL, the time its download started or None if it was skipped, and the result.
+                 来源URL、其下载开始的时间（被跳过时为None）以及结果。
+        """
+        items = iter(items)
+        limit = self.config.get('request', 'concurrency')
+        pending: dict[Future, tuple[str, Request, float]] = {}
+        exhausted = False
+
+        while not exhausted or pending:
+            # Top up the downloads in flight.
+            # 补充进行中的下载。
+            while not exhausted and len(pending) < limit:
+                item = next(items, None)
+                if item is None:
+                    exhausted = True
+                elif self.expired(item[0]):
+                    yield item[0], None, DeadlineExceeded(item[0])
+                else:
+                    start = perf_counter()
+                    request, future = self.submit(*item)
+                    pending[future] = item[0], request, start
+            if not pending:
+                continue
+
+            # Nothing completes before the deadline, so every remaining download is cancelled.
+            # 截止时间前没有下载完成，则取消所有剩余的下载。
+            timeout = self.remaining()
+            done, _ = wait(pending, None if timeout is None else max(0.0, timeout), FIRST_COMPLETED)
+            for future in done or list(pending):
+                url, request, start = pending.pop(future)
+                yield url, start, self.downloader.result(request, future, 0)
+
+    def submit(self, url: str, headers: dict) -> tuple[Request, Future]:
+        """
+        Sends the request of one source without waiting for it.
+        发送一个来源的请求但不等待。
+        """
+        if self.config.get('request', 'stream') and self.analysis.streamable(url):
+            # Parse the body while it is downloaded.
+            # 在下载的同时解析响应体。
+            return self.downloader.submit(url, headers=headers, parser=partial(self.analysis.incremental, url))
+        return self.downloader.submit(url, headers=headers, decode=False)
+
+    def remaining(self) -> float | None:
+        """
+        Gets the seconds left until the deadline of this cycle, None if there is no deadline.
+        获取距本周期截止时间的剩余秒数，没有截止时间时为None。
+        """
+        return None if self.deadline is None else self.deadline - monotonic()
+
+    def expired(self, url: str) -> bool:
+        """
+        Checks whether the deadline of this cycle has passed before a source is sent, counting it as a failure.
+        在发送来源之前检查本周期的截止时间是否已过，已过时将其计为一次失败。
+        """
+        timeout = self.remaining()
+        if timeout is None or timeout > 0:
+            return False
+        logger.warning(f'Skip fetching {url}, the deadline of this cycle has passed')
+        FETCH_ERRORS.inc(source=url)
+        return True
+
+    def record(self, item: tuple[str, float | None, object]) -> tuple[str, object]:
+        """
+        Pipeline stage: record the latency, the bytes on the wire and the failures of one download.
+        流水线阶段：记录一个下载的延迟、传输字节数和失败次数。
+
+        :param item: The source URL, the time its download started or None if it was skipped, and the result.
+                     来源URL、其下载开始的时间（被跳过时为None）以及结果。
+        """
+        url, start, result = item
+        if start is None:
+            # Skipped at the deadline, already counted.
+            # 因截止时间而跳过，已计数。
+            return url, result
+
+        FETCH_SECONDS.observe(perf_counter() - start, source=url)
+        statistic = self.downloader.statistics.get(url)
+        if statistic is not None:
+            FETCH_BYTES.inc(statistic.compressed, source=url)
+        if isinstance(result, Exception) and not isinstance(result, NotModified):
+            FETCH_ERRORS.inc(source=url)
+        return url, result
+
+    @staticmethod
+    def decode(item: tuple[str, object]) -> tuple[str, object]:
+        """
+        Pipeline stage: decode the body to text, other results pass through.
+        流水线阶段：将响应体解码为文本，其他结果直接传递。
+        """
+        url, result = item
+        if isinstance(result, bytes):
+            return url, result.decode('utf-8')
+        return item
+
+    def analyze(self, item: tuple[str, object]) -> tuple[str, set[str]] | None:
+        """
+        Pipeline stage: analyze the text, or reuse the trackers of an unchanged source.
+        流水线阶段：分析文本，或复用未变化来源的追踪器。
+        """
+        url, result = item
+        if isinstance(result, NotModified):
+            # Reuse the trackers analyzed from the unchanged source.
+            # 复用从未变化的来源中分析出的追踪器。
+            cached = self.cache.trackers(url, self.analysis.signature(url))
+            if cached is None:
+                # The cache lost the trackers or they were analyzed with another method, keep the last good ones and
+                # fetch the whole source next cycle.
+                # 缓存丢失了追踪器或它们由其他方法分析得出，保留上次成功获取的追踪器，并在下个周期完整下载该来源。
+                logger.warning(f'{url} is not modified but its trackers are not cached with its current method, '
+                               f'drop its validators')
+                self.cache.forget(url)
+                return None
+            logger.info(f'Reuse {len(cached)} cached trackers of {url}')
+            return url, cached
+
+        if isinstance(result, Exception):
+            # Skip any failed requests.
+            # 跳过任何失败的请求。
+            return None
+
+        # Streamed responses are already analyzed while they were downloaded, the others may be analyzed in a thread
+        # or process pool, which records the analysis time itself.
+        # 流式响应已在下载时分析完成，其余响应可能在线程池或进程池中分析，其分析耗时由分析器自行记录。
+        if isinstance(result, set):
+            statistic = self.downloader.statistics.get(url)
+            if statistic is not None:
+                ANALYSIS_SECONDS.observe(statistic.parse, method=self.analysis.method_type(url))
+        else:
+            result = self.analysis.submit(url, result).result()
+
+        self.cache.commit(url, result, self.analysis.signature(url))
+        return url, result
+
+    def normalize(self, item: tuple[str, set[str]]) -> tuple[str, set[str]]:
+        """
+        Pipeline stage: convert the trackers to their canonical form and drop the invalid ones.
+        流水线阶段：将追踪器转换为规范形式并丢弃无效的追踪器。
+        """
+        url, result = item
+        normalized = self.normalizer(result)
+        logger.debug(f'Normalize {len(result)} trackers of {url} to {len(normalized)} trackers')
+        return url, normalized
+
+    def probe(self, trackers: set[str], cycle: int = None) -> set[str]:
+        """
+        Probes the trackers and keeps the ones that respond within the latency budget.
+        探测追踪器，保留在延迟预算内响应的追踪器。
+
+        :param trackers: The trackers to probe.
+                         需要探测的追踪器。
+        :param cycle: The history cycle the responding trackers are recorded in.
+                      记录响应追踪器的历史周期。
+        """
+        latencies = self.prober.probe(trackers)
+        dead = {tracker for tracker, latency in latencies.items() if latency is None}
+        logger.info(f'Probed {len(latencies)} trackers, {len(latencies) - len(dead)} responded')
+
+        if cycle is not None:
+            self.history.update(cycle, latencies.keys() - dead, ALIVE)
+
+        # Keep the latest results of each tracker to rank the output.
+        # 保留每个追踪器的最近结果，用于对输出排序。
+        self.scores.retain(trackers)
+        self.scores.record(latencies)
+        self.scores.save()
+
+        if latencies and len(dead) == len(latencies):
+            # Most likely the network of this host is down rather than every tracker.
+            # 更可能是本机网络故障，而不是所有追踪器都失效。
+            logger.warning('No tracker responded to the probes, keep all trackers')
+            return trackers
+
+        return trackers - dead
+
+    def create_downloader(self) -> BaseDownloader:
         """
         Creates a Downloader instance based on the configuration.
         根据配置创建下载器实例。
         """
-        thread_pool_size = self.config.get('base', 'thread_pool_size')
+        engine = self.config.get('request', 'engine')
         default_headers = self.config.get('request', 'default_headers')
         timeout = self.config.get('request', 'timeout')
 
+        # Temporary failures are retried, hosts that keep failing are skipped for a while.
+        # 临时故障会被重试，持续失败的主机会被跳过一段时间。
+        retries = self.config.get('request', 'retries')
+        backoff = self.config.get('request', 'backoff')
+        breaker = CircuitBreaker(self.config.get('request', 'breaker_threshold'),
+                                 self.config.get('request', 'breaker_cooldown'))
+        logger.info(f'Create circuit breaker with args: threshold={breaker.threshold}, cooldown={breaker.cooldown}')
+
+        # Sources hosted on the same site share its limits.
+        # 托管在同一网站上的来源共享该网站的限制。
+        limiter = HostLimiter(self.config.get('request', 'host_concurrency'),
+                              self.config.get('request', 'host_rate'),
+                              self.config.get('request', 'host_burst'))
+        logger.info(f'Create host limiter with args: concurrency={limiter.slots}, rate={limiter.rate}, '
+                    f'burst={limiter.burst}')
+
+        if engine == 'async':
+            concurrency = self.config.get('request', 'concurrency')
+            pool_size = self.config.get('request', 'pool_size')
+
+            # Log the creation of the downloader.
+            # 记录下载器的创建信息。
+            logger.info(f'Create async downloader with args: concurrency={concurrency}, pool_size={pool_size}, '
+                        f'default_headers={default_headers}, timeout={timeout}, retries={retries}, backoff={backoff}')
+
+            # Instantiate and return the AsyncDownloader.
+            # 实例化并返回异步下载器。
+            return AsyncDownloader(default_headers=default_headers, timeout=timeout,
+                                   workers=concurrency, pool_size=pool_size, cache=self.cache,
+                                   retries=retries, backoff=backoff, breaker=breaker, limiter=limiter)
+
+        if engine != 'thread':
+            logger.warning(f'Download engine {engine} is not recognized, use default engine: thread')
+
+        thread_pool_size = self.config.get('base', 'thread_pool_size')
+
         # Log the creation of the downloader.
         # 记录下载器的创建信息。
         logger.info(f'Create downloader with args: thread_pool_size={thread_pool_size}, '
-                    f'default_headers={default_headers}, timeout={timeout}')
+                    f'default_headers={default_headers}, timeout={timeout}, retries={retries}, backoff={backoff}')
 
         # Instantiate and return the Downloader.
         # 实例化并返回下载器。
-        return Downloader(default_headers=default_headers, timeout=timeout, workers=thread_pool_size)
+        return Downloader(default_headers=default_headers, timeout=timeout, workers=thread_pool_size, cache=self.cache,
+                          retries=retries, backoff=backoff, breaker=breaker, limiter=limiter)
+
+    def create_result_cache(self) -> ResultCache | None:
+        """
+        Creates a ResultCache instance based on the configuration, or None if it is disabled.
+        根据配置创建结果缓存实例，若被禁用则返回None。
+        """
+        size = self.config.get('cache', 'result_size')
+        if size <= 0:
+            return None
+
+        file = self.config.get('cache', 'result_file')
+        logger.info(f'Create result cache with args: size={size}, file={file}')
+        return ResultCache(size, file)
+
+    def create_prober(self) -> Prober | None:
+        """
+        Creates a Prober instance based on the configuration, or None if probing is disabled.
+        根据配置创建探测器实例，若探测被禁用则返回None。
+        """
+        if not self.config.get('probe', 'enable'):
+            return None
+
+        timeout = self.config.get('probe', 'timeout')
+        concurrency = self.config.get('probe', 'concurrency')
+        host_interval = self.config.get('probe', 'host_interval')
+        logger.info(f'Create prober with args: timeout={timeout}ms, concurrency={concurrency}, '
+                    f'host_interval={host_interval}ms')
+        return Prober(timeout / 1000, concurrency, host_interval / 1000)
+
+    def create_history(self) -> History | None:
+        """
+        Creates a History instance based on the configuration, or None if it is disabled.
+        根据配置创建历史记录实例，若被禁用则返回None。
+        """
+        file = self.config.get('history', 'file')
+        if not file:
+            return None
+
+        retention = self.config.get('history', 'retention')
+        logger.info(f'Create history with args: file={file}, retention={retention}')
+        return History(file, retention)
 
     def create_analysis(self) -> Analysis:
         """
         Creates an Analysis instance and loads trackers from the configuration.
         创建分析器实例，并从配置中加载追踪器。
         """
-        analysis = Analysis()
+        executor = self.config.get('analysis', 'executor')
+        workers = self.config.get('analysis', 'workers') or None
+        logger.info(f'Create analysis with args: executor={executor}, workers={workers}')
+
+        analysis = Analysis(self.result_cache, executor, workers)
         tracker = self.config.get('base', 'tracker')
 
         # Load each tracker into the Analysis instance.
         # 将每个追踪器加载到分析器实例中。
         for i in tracker:
             method = self.config.get(f'tracker_{i}', 'method')
-            analysis.load(self.config.get(f'tracker_{i}', 'url'), method)
+            url = self.config.get(f'tracker_{i}', 'url')
+            analysis.load(url, method)
             logger.info(f'Load tracker {i} with method {method}')
 
+            # Trackers cached with another method must not be reused, so the source is fetched in full again.
+            # 不能复用由其他方法缓存的追踪器，因此该来源会被重新完整下载。
+            self.cache.check(url, analysis.signature(url))
+
         return analysis
 
-    def gather_url(self) -> list[tuple[str, dict]]:
+    def gather_url(self, urls: list[str] = None) -> list[tuple[str, dict]]:
         """
         Yields URLs and their corresponding headers from the configuration.
         从配置中生成URL及其对应的头部信息。
+
+        URLs of different hosts are interleaved, so that the fetchers do not all wait for the same host.
+        不同主机的URL交错排列，使下载者不会都在等待同一个主机。
+
+        :param urls: Only yield these URLs, all URLs if it is None.
+                     只生成这些URL，为None时生成所有URL。
         """
         logger.info('Gathering url...')
         tracker = self.config.get('base', 'tracker')
 
+        hosts: dict[str, list[tuple[str, dict]]] = {}
         for i in tracker:
-            yield self.config.get(f'tracker_{i}', 'url'), self.config.get(f'tracker_{i}', 'headers')
+            url = self.config.get(f'tracker_{i}', 'url')
+            if urls is None or url in urls:
+                hosts.setdefault(urlsplit(url).netloc, []).append((url, self.config.get(f'tracker_{i}', 'headers')))
+
+        for group in zip_longest(*hosts.values()):
+            yield from (i for i in group if i is not None)
 
 
 class Loop(object):
     """
-    A class to handle looping execution of the Main class at regular intervals.
-    循环执行主类的类，以固定的时间间隔运行。
+    A class to handle looping execution of the Main class, fetching each source when its refresh interval is due.
+    循环执行主类的类，在每个来源的刷新间隔到期时下载该来源。
     """
     def __init__(self, target: Main, interval: int = None):
         self.target = target
@@ -143,6 +618,8 @@ class Loop(object):
         else:
             self.interval = self.calculate_interval()
 
+        self.scheduler = self.create_scheduler()
+
     @staticmethod
     def calculate_interval():
         """
@@ -157,6 +634,35 @@ class Loop(object):
                 config.get('interval', 'day') * 60 * 60 * 24
         )
 
+    def create_scheduler(self) -> Scheduler:
+        """
+        Creates the Scheduler of the sources based on the configuration, every source is due immediately.
+        根据配置创建来源的调度器，每个来源都立即到期。
+        """
+        config = Config()
+        if config.get('interval', 'adaptive'):
+            minimum = config.get('interval', 'min_interval')
+            maximum = config.get('interval', 'max_interval')
+            factor = config.get('interval', 'factor')
+        else:
+            # Every source keeps the same interval, so all of them are due together.
+            # 每个来源保持相同的间隔，因此它们同时到期。
+            minimum = maximum = self.interval
+            factor = 1.0
+
+        offset = config.get('interval', 'offset')
+        missed = config.get('interval', 'missed')
+        jitter = config.get('interval', 'jitter')
+        if missed not in MISSED:
+            logger.warning(f'Missed run policy {missed} is not recognized, use default policy: coalesce')
+            missed = 'coalesce'
+
+        logger.info(f'Create scheduler with args: interval={self.interval}, min_interval={minimum}, '
+                    f'max_interval={maximum}, factor={factor}, offset={offset}, missed={missed}, jitter={jitter}')
+        scheduler = Scheduler(self.interval, minimum, maximum, factor, offset, missed, jitter)
+        scheduler.retain(url for url, _ in self.target.gather_url())
+        return scheduler
+
     def run(self):
         """
         Runs the loop, handling exceptions and keyboard interrupts.
@@ -170,16 +676,32 @@ class Loop(object):
 
     def _main(self):
         """
-        The main loop that repeatedly runs the target's `run` method.
-        主循环，重复运行目标的 `run` 方法。
+        The main loop that runs the target's `run` method with the sources that are due.
+        主循环，使用已到期的来源运行目标的 `run` 方法。
         """
         while True:
-            try:
-                self.target.run()
-            except Exception as e:
-                logger.error(f'An error occurred while running main: {e}', exc_info=True)
-            finally:
-                sleep(self.interval)
+            due = self.scheduler.due()
+            if due:
+                changes = {}
+                try:
+                    changes = self.target.run(due)
+                except Exception as e:
+                    logger.error(f'An error occurred while running main: {e}', exc_info=True)
+                finally:
+                    # The next fetch is due at the slot after the last one, however long this run took.
+                    # 下次下载在上一个时间槽之后的时间槽到期，与本次运行耗时无关。
+                    now = time()
+                    for url in due:
+                        self.scheduler.reschedule(url, changes.get(url), now)
+
+            # Sleep until the next source is due, the deadline is monotonic so that adjusting the system clock
+            # does not stretch or cut the sleep.
+            # 休眠直到下一个来源到期，截止时间是单调的，因此调整系统时钟不会延长或缩短休眠。
+            next_due = self.scheduler.next_due()
+            delay = self.interval if next_due is None else next_due - time()
+            deadline = monotonic() + max(0.0, delay)
+            while (remaining := deadline - monotonic()) > 0:
+                sleep(remaining)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,230 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from bisect import bisect_left
+from logging import getLogger
+from threading import Lock
+
+logger = getLogger(__name__)
+
+# Default histogram buckets in seconds
+# 默认的直方图桶（秒）
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a label value of the text exposition format.
+    转义文本展示格式中的标签值。
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value: float) -> str:
+    """
+    Format a sample value of the text exposition format.
+    格式化文本展示格式中的样本值。
+    """
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric(object):
+    """
+    Base class of metrics, a family of samples identified by label values.
+    指标基类，由标签值区分的一组样本。
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), registry: 'Registry' = None):
+        """
+        Initialize the Metric object and register it.
+        初始化 Metric 对象并注册。
+
+        :param name: The metric name.
+                     指标名称。
+        :param documentation: The help text.
+                              帮助文本。
+        :param labels: The label names.
+                       标签名称。
+        :param registry: The registry the metric is exposed by, REGISTRY by default.
+                         展示该指标的注册表，默认为 REGISTRY。
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], object] = {}
+        self._lock = Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        """
+        Get the label values in the declared order.
+        按声明顺序获取标签值。
+        """
+        if set(labels) != set(self.labels):
+            raise ValueError(f'Metric {self.name} expects labels {self.labels}, got {tuple(labels)}')
+        return tuple(str(labels[i]) for i in self.labels)
+
+    def _selector(self, key: tuple[str, ...], extra: str = '') -> str:
+        """
+        Format the label values of a sample.
+        格式化样本的标签值。
+        """
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return f'{{{",".join(pairs)}}}' if pairs else ''
+
+    def samples(self) -> list[str]:
+        """
+        Format the samples of the metric.
+        格式化指标的样本。
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """
+        Format the metric in the text exposition format.
+        以文本展示格式格式化指标。
+        """
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        with self._lock:
+            lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    A value that only increases.
+    只增不减的值。
+    """
+    type = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        """
+        Increase the counter.
+        增加计数器。
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        return [f'{self.name}{self._selector(key)} {_format(value)}' for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+    可增可减的值。
+    """
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        """
+        Set the gauge.
+        设置仪表值。
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> list[str]:
+        return [f'{self.name}{self._selector(key)} {_format(value)}' for key, value in self._values.items()]
+
+
+class Histogram(Metric):
+    """
+    Observations counted in cumulative buckets.
+    以累积桶计数的观测值。
+    """
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = BUCKETS, registry: 'Registry' = None):
+        """
+        Initialize the Histogram object.
+        初始化 Histogram 对象。
+
+        :param buckets: The upper bounds of the buckets, in increasing order.
+                        各个桶的上界，按递增顺序排列。
+        """
+        self.buckets = tuple(buckets) + (float('inf'),)
+        super().__init__(name, documentation, labels, registry)
+
+    def observe(self, value: float, **labels):
+        """
+        Add an observation.
+        添加一个观测值。
+        """
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="' + _format(bound) + '"'
+                lines.append(f'{self.name}_bucket{self._selector(key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{self._selector(key)} {_format(total)}')
+            lines.append(f'{self.name}_count{self._selector(key)} {cumulative}')
+        return lines
+
+
+class Registry(object):
+    """
+    A collection of metrics exposed together.
+    一起展示的一组指标。
+    """
+
+    def __init__(self):
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric):
+        """
+        Add a metric to the registry.
+        将指标添加到注册表。
+        """
+        self._metrics.append(metric)
+
+    def render(self) -> bytes:
+        """
+        Format every metric in the Prometheus text exposition format.
+        以 Prometheus 文本展示格式格式化所有指标。
+        """
+        return ('\n'.join(i.render() for i in self._metrics) + '\n').encode('utf-8')
+
+
+REGISTRY = Registry()
+
+# Metrics of the collector
+# 收集器的指标
+CYCLE_SECONDS = Histogram('tracker_collector_cycle_duration_seconds', 'Duration of a whole collection cycle.',
+                          buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800))
+LAST_CYCLE = Gauge('tracker_collector_last_cycle_timestamp_seconds', 'Unix time the last cycle finished.')
+FETCH_SECONDS = Histogram('tracker_collector_fetch_duration_seconds', 'Duration of fetching a source.', ('source',))
+FETCH_BYTES = Counter('tracker_collector_fetch_bytes_total', 'Bytes received from a source before decompression.',
+                      ('source',))
+FETCH_ERRORS = Counter('tracker_collector_fetch_errors_total', 'Failed fetches of a source.', ('source',))
+ANALYSIS_SECONDS = Histogram('tracker_collector_analysis_duration_seconds', 'Duration of analyzing a response.',
+                             ('method',))
+MISSED_RUNS = Counter('tracker_collector_missed_runs_total', 'Scheduled fetches missed because a run overran.')
+TRACKERS = Gauge('tracker_collector_trackers', 'Number of trackers at each step of the last cycle.', ('state',))
+
+# Metrics of the built-in server
+# 内置服务器的指标
+REQUEST_SECONDS = Histogram('tracker_collector_http_request_duration_seconds', 'Duration of serving a request.',
+                            ('path',), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+REQUESTS = Counter('tracker_collector_http_requests_total', 'Requests served.', ('path', 'status'))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,117 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from functools import lru_cache
+from logging import getLogger
+from re import compile
+from typing import Iterable
+from urllib.parse import urlsplit
+
+logger = getLogger(__name__)
+
+# Tracker schemes and their default ports, a None port means the port is required
+# 追踪器协议及其默认端口，端口为 None 表示必须指定端口
+SCHEMES = {
+    'http': 80,
+    'https': 443,
+    'udp': None,
+    'ws': 80,
+    'wss': 443,
+}
+
+# A tracker that is already canonical: lowercase scheme and host, no fragment, no trailing slash
+# 已经是规范形式的追踪器：小写协议和主机，没有片段，没有末尾斜杠
+CANONICAL = compile(r'(https?|udp|wss?)://[a-z0-9.\-]+(?::([1-9]\d{0,4}))?(?:/[^\s#?]*[^\s#?/])?(?:\?[^\s#]*)?')
+
+
+class Normalizer(object):
+    """
+    Convert trackers to a canonical form, so that spellings of the same tracker are deduplicated.
+    将追踪器转换为规范形式，使同一追踪器的不同写法能够被去重。
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        Initialize the Normalizer object.
+        初始化 Normalizer 对象。
+
+        :param cache_size: The number of normalized trackers remembered, trackers repeat across sources and cycles.
+                           记住的规范化结果数量，追踪器会在多个来源和多个周期中重复出现。
+        """
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __call__(self, trackers: Iterable[str]) -> set[str]:
+        """
+        Normalize trackers and drop the invalid ones.
+        规范化追踪器并丢弃无效的追踪器。
+
+        :param trackers: The trackers to normalize.
+                         需要规范化的追踪器。
+        :return: The set of canonical trackers.
+                 规范追踪器的集合。
+        """
+        result = set()
+        for tracker in trackers:
+            tracker = self.normalize(tracker)
+            if tracker is not None:
+                result.add(tracker)
+        return result
+
+    @staticmethod
+    def _normalize(tracker: str) -> str | None:
+        """
+        Normalize one tracker.
+        规范化一个追踪器。
+
+        :param tracker: The tracker, may contain surrounding whitespace and a #comment.
+                        追踪器，可能包含两端空白和 #注释。
+        :return: The canonical tracker, or None if it is not a valid tracker.
+                 规范追踪器，若不是有效的追踪器则返回 None。
+        """
+        # Fast path: most trackers are already canonical
+        # 快速路径：大多数追踪器已经是规范形式
+        match = CANONICAL.fullmatch(tracker)
+        if match:
+            scheme, port = match.groups()
+            if port is None and SCHEMES[scheme] is not None:
+                return tracker
+            if port is not None and int(port) != SCHEMES[scheme] and 0 < int(port) < 65536:
+                return tracker
+
+        # Drop the comment or fragment and the surrounding whitespace
+        # 去除注释或片段以及两端空白
+        tracker = tracker.split('#', 1)[0].strip()
+        if not tracker:
+            return None
+
+        try:
+            parts = urlsplit(tracker)
+            port = parts.port
+        except ValueError:
+            logger.debug(f'Drop malformed tracker {tracker}')
+            return None
+
+        scheme = parts.scheme.lower()
+        host = parts.hostname
+        if scheme not in SCHEMES or not host:
+            logger.debug(f'Drop tracker {tracker} with scheme {scheme or "none"} or without host')
+            return None
+
+        if not port and SCHEMES[scheme] is None:
+            logger.debug(f'Drop tracker {tracker} without port')
+            return None
+
+        if ':' in host:
+            # IPv6 address
+            # IPv6 地址
+            host = f'[{host}]'
+        if port and port != SCHEMES[scheme]:
+            host = f'{host}:{port}'
+
+        path = parts.path.rstrip('/')
+        query = f'?{parts.query}' if parts.query else ''
+        return f'{scheme}://{host}{path}{query}'
+
+
+if __name__ == '__main__':
+    pass
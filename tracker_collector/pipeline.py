@@ -0,0 +1,170 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from logging import getLogger
+from queue import Queue
+from threading import Lock, Thread
+from time import perf_counter
+from typing import Any, Callable, Iterable
+
+logger = getLogger(__name__)
+
+# Marker put into a queue to stop one worker
+# 放入队列中用于停止一个工作线程的标记
+_END = object()
+
+
+class Stage(object):
+    """
+    A pipeline stage: worker threads that take items from a bounded input queue.
+    流水线阶段：从有界输入队列中获取数据项的工作线程。
+    """
+
+    def __init__(self, name: str, function: Callable[[Any], Any], workers: int = 1, capacity: int = 8):
+        """
+        Initialize the Stage object.
+        初始化 Stage 对象。
+
+        :param name: The name of the stage.
+                     阶段名称。
+        :param function: Processes one item and returns the item for the next stage, or None to drop it.
+                         处理一个数据项并返回交给下一阶段的数据项，返回 None 表示丢弃。
+        :param workers: The number of worker threads.
+                        工作线程数量。
+        :param capacity: The size of the input queue, a full queue blocks the previous stage.
+                         输入队列大小，队列已满时会阻塞上一阶段。
+        """
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.queue = Queue(maxsize=capacity)
+
+        # Statistics of the stage
+        # 阶段的统计信息
+        self.processed = 0
+        self.dropped = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.peak = 0
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f'Stage(name={self.name}, workers={self.workers}, capacity={self.queue.maxsize})'
+
+    def put(self, item: Any):
+        """
+        Put an item into the input queue, blocking while the queue is full.
+        将数据项放入输入队列，队列已满时阻塞。
+        """
+        self.queue.put(item)
+        with self._lock:
+            self.peak = max(self.peak, self.queue.qsize())
+
+    def work(self, output: 'Stage | None'):
+        """
+        Worker loop: process items until the end marker is received.
+        工作线程循环：处理数据项直到收到结束标记。
+
+        :param output: The next stage, or None for the last stage.
+                       下一阶段，最后一个阶段为 None。
+        """
+        while True:
+            item = self.queue.get()
+            if item is _END:
+                return
+
+            start = perf_counter()
+            try:
+                result = self.function(item)
+            except Exception as e:
+                logger.error(f'Stage {self.name} failed to process an item due to {e}', exc_info=True)
+                result = None
+            busy = perf_counter() - start
+
+            blocked = 0.0
+            if result is not None and output is not None:
+                # Blocks while the next stage is full, which is the backpressure of the pipeline
+                # 下一阶段已满时阻塞，即流水线的背压
+                start = perf_counter()
+                output.put(result)
+                blocked = perf_counter() - start
+
+            with self._lock:
+                self.processed += 1
+                if result is None and output is not None:
+                    self.dropped += 1
+                self.busy += busy
+                self.blocked += blocked
+
+    def report(self, elapsed: float) -> str:
+        """
+        Describe the throughput of the stage.
+        描述阶段的吞吐量。
+
+        :param elapsed: The wall time of the whole pipeline run.
+                        整个流水线运行的实际耗时。
+        """
+        rate = self.processed / elapsed if elapsed else 0.0
+        return (f'{self.name}: {self.processed} items ({self.dropped} dropped), {rate:.1f} items/s, '
+                f'busy {self.busy:.2f}s, blocked {self.blocked:.2f}s, peak queue {self.peak}/{self.queue.maxsize}')
+
+
+class Pipeline(object):
+    """
+    A chain of stages connected by bounded queues.
+    由有界队列连接的一系列阶段。
+    """
+
+    def __init__(self, stages: list[Stage]):
+        """
+        Initialize the Pipeline object.
+        初始化 Pipeline 对象。
+
+        :param stages: The stages, in order.
+                       按顺序排列的阶段。
+        """
+        self.stages = stages
+        self.elapsed = 0.0
+
+    def run(self, items: Iterable[Any]):
+        """
+        Feed the items into the first stage and wait until every stage has finished.
+        将数据项输入第一个阶段，并等待所有阶段完成。
+
+        :param items: The input items, consumed lazily as the first stage has room.
+                      输入数据项，在第一个阶段有空间时才被惰性地取用。
+        """
+        start = perf_counter()
+        threads: list[list[Thread]] = []
+
+        for index, stage in enumerate(self.stages):
+            output = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            workers = [Thread(target=stage.work, args=(output,), name=f'{stage.name}-{i}', daemon=True)
+                       for i in range(stage.workers)]
+            for thread in workers:
+                thread.start()
+            threads.append(workers)
+
+        for item in items:
+            self.stages[0].put(item)
+
+        # Stop the stages in order, so that every item reaches the next stage before its end markers
+        # 按顺序停止各阶段，保证每个数据项都在结束标记之前到达下一阶段
+        for stage, workers in zip(self.stages, threads):
+            for _ in workers:
+                stage.queue.put(_END)
+            for thread in workers:
+                thread.join()
+
+        self.elapsed = perf_counter() - start
+
+    def report(self) -> list[str]:
+        """
+        Describe the throughput of every stage.
+        描述每个阶段的吞吐量。
+        """
+        return [stage.report(self.elapsed) for stage in self.stages]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,254 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from asyncio import DatagramProtocol, DatagramTransport, Future, Lock, Semaphore, gather, get_running_loop, \
+    open_connection, run, sleep, wait_for, TimeoutError as AsyncTimeoutError
+from collections import defaultdict
+from logging import getLogger
+from os import urandom
+from random import getrandbits
+from socket import SOCK_DGRAM
+from struct import pack, unpack_from
+from time import monotonic, perf_counter
+from typing import Iterable
+from urllib.parse import SplitResult, urlencode, urlsplit
+
+logger = getLogger(__name__)
+
+# Magic constant and actions of the UDP tracker protocol (BEP 15)
+# UDP 追踪器协议（BEP 15）的魔数和动作
+PROTOCOL_ID = 0x41727101980
+ACTION_CONNECT = 0
+ACTION_ERROR = 3
+
+# Schemes that can be probed, trackers with other schemes are not probed
+# 可以探测的协议，其他协议的追踪器不会被探测
+SCHEMES = ('udp', 'http', 'https')
+
+
+class TrackerProtocol(DatagramProtocol):
+    """
+    Receive the UDP tracker responses and resolve the waiting probes by transaction ID.
+    接收 UDP 追踪器响应，并根据事务 ID 唤醒等待中的探测。
+    """
+
+    def __init__(self, pending: dict[int, Future]):
+        self.pending = pending
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        if len(data) < 8:
+            return
+
+        action, transaction = unpack_from('>II', data)
+        future = self.pending.get(transaction)
+        if future is None or future.done():
+            return
+
+        if action == ACTION_CONNECT and len(data) >= 16:
+            future.set_result(None)
+        elif action == ACTION_ERROR:
+            future.set_exception(ConnectionError(data[8:].decode('utf-8', 'replace')))
+        else:
+            future.set_exception(ConnectionError(f'Unexpected response with action {action}'))
+
+    def error_received(self, exc: Exception):
+        logger.debug(f'UDP probe socket received an error: {exc}')
+
+
+class Prober(object):
+    """
+    Check whether trackers respond, with UDP connect requests and HTTP announce requests sent from one event loop.
+    在同一个事件循环中发送 UDP connect 请求和 HTTP announce 请求，检查追踪器是否响应。
+    """
+
+    def __init__(self, timeout: float = 2.0, concurrency: int = 256, host_interval: float = 0.2):
+        """
+        Initialize the Prober object.
+        初始化 Prober 对象。
+
+        :param timeout: The latency budget in seconds, trackers responding later are considered dead.
+                        以秒为单位的延迟预算，晚于此时间响应的追踪器被视为失效。
+        :param concurrency: The maximum number of probes in flight.
+                            同时进行的最大探测数量。
+        :param host_interval: The minimum number of seconds between two probes to the same host.
+                              对同一主机的两次探测之间的最小间隔秒数。
+        """
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.host_interval = host_interval
+
+    @staticmethod
+    def probeable(tracker: str) -> bool:
+        """
+        Whether the tracker can be probed.
+        追踪器是否可以被探测。
+        """
+        return tracker.split('://', 1)[0] in SCHEMES
+
+    def probe(self, trackers: Iterable[str]) -> dict[str, float | None]:
+        """
+        Probe trackers concurrently.
+        并发探测追踪器。
+
+        :param trackers: The trackers to probe, trackers that cannot be probed are skipped.
+                         需要探测的追踪器，无法探测的追踪器会被跳过。
+        :return: A mapping from tracker to its round trip time in seconds, or None if it did not respond in time.
+                 追踪器到其往返时间（秒）的映射，若未及时响应则为 None。
+        """
+        trackers = [i for i in trackers if self.probeable(i)]
+        if not trackers:
+            return {}
+        return run(self._probe_all(trackers))
+
+    async def _probe_all(self, trackers: list[str]) -> dict[str, float | None]:
+        """
+        Probe trackers in the running event loop.
+        在当前事件循环中探测追踪器。
+        """
+        self._semaphore = Semaphore(self.concurrency)
+        self._host_locks: dict[str, Lock] = defaultdict(Lock)
+        self._host_times: dict[str, float] = {}
+
+        # One UDP socket per address family, shared by every UDP probe
+        # 每个地址族一个 UDP 套接字，由所有 UDP 探测共享
+        self._pending: dict[int, Future] = {}
+        self._transports: dict[int, DatagramTransport] = {}
+        self._transport_lock = Lock()
+
+        try:
+            # An unexpected error of one probe must not abort the others, the tracker counts as dead
+            # 单个探测的意外错误不能中止其他探测，该追踪器视为失效
+            results = await gather(*(self._probe(i) for i in trackers), return_exceptions=True)
+        finally:
+            for transport in self._transports.values():
+                transport.close()
+
+        return {tracker: None if isinstance(result, BaseException) else result
+                for tracker, result in zip(trackers, results)}
+
+    async def _probe(self, tracker: str) -> float | None:
+        """
+        Probe one tracker.
+        探测一个追踪器。
+        """
+        try:
+            parts = urlsplit(tracker)
+            port = parts.port
+        except ValueError:
+            return None
+        if not parts.hostname:
+            return None
+
+        await self._throttle(parts.hostname)
+
+        async with self._semaphore:
+            start = perf_counter()
+            try:
+                if parts.scheme == 'udp':
+                    await wait_for(self._probe_udp(parts.hostname, port), self.timeout)
+                else:
+                    await wait_for(self._probe_http(parts), self.timeout)
+
+            # Before Python 3.11 asyncio.TimeoutError is not the builtin TimeoutError
+            # 在 Python 3.11 之前 asyncio.TimeoutError 不是内置的 TimeoutError
+            except (OSError, TimeoutError, AsyncTimeoutError, ValueError) as e:
+                logger.debug(f'Tracker {tracker} did not respond: {e!r}')
+                return None
+
+            latency = perf_counter() - start
+
+        logger.debug(f'Tracker {tracker} responded in {latency * 1000:.0f}ms')
+        return latency
+
+    async def _throttle(self, host: str):
+        """
+        Wait until the host may be probed again.
+        等待直到可以再次探测该主机。
+        """
+        async with self._host_locks[host]:
+            delay = self._host_times.get(host, float('-inf')) + self.host_interval - monotonic()
+            if delay > 0:
+                await sleep(delay)
+            self._host_times[host] = monotonic()
+
+    async def _probe_udp(self, host: str, port: int):
+        """
+        Send a BEP 15 connect request and wait for the response.
+        发送 BEP 15 connect 请求并等待响应。
+        """
+        if not port:
+            raise ValueError('UDP tracker without port')
+
+        loop = get_running_loop()
+        family, _, _, _, address = (await loop.getaddrinfo(host, port, type=SOCK_DGRAM))[0]
+        transport = await self._udp_transport(family)
+
+        transaction = getrandbits(32)
+        while transaction in self._pending:
+            transaction = getrandbits(32)
+
+        future = loop.create_future()
+        self._pending[transaction] = future
+        try:
+            transport.sendto(pack('>QII', PROTOCOL_ID, ACTION_CONNECT, transaction), address)
+            await future
+        finally:
+            self._pending.pop(transaction, None)
+
+    async def _udp_transport(self, family: int) -> DatagramTransport:
+        """
+        Get the shared UDP socket of an address family.
+        获取某个地址族共享的 UDP 套接字。
+        """
+        async with self._transport_lock:
+            if family not in self._transports:
+                transport, _ = await get_running_loop().create_datagram_endpoint(
+                    lambda: TrackerProtocol(self._pending), family=family)
+                self._transports[family] = transport
+            return self._transports[family]
+
+    @staticmethod
+    async def _probe_http(parts: SplitResult):
+        """
+        Send an HTTP announce request for a random torrent and wait for the status line.
+        为一个随机种子发送 HTTP announce 请求并等待状态行。
+        """
+        https = parts.scheme == 'https'
+        port = parts.port or (443 if https else 80)
+
+        # Trackers answer an unknown torrent with a failure reason, which still shows that they are alive
+        # 追踪器会以失败原因回应未知的种子，这同样表明追踪器存活
+        query = urlencode({
+            'info_hash': urandom(20),
+            'peer_id': b'-TC0001-' + urandom(12),
+            'port': 6881,
+            'uploaded': 0,
+            'downloaded': 0,
+            'left': 0,
+            'compact': 1,
+        })
+        if parts.query:
+            query = f'{parts.query}&{query}'
+
+        reader, writer = await open_connection(parts.hostname, port, ssl=True if https else None)
+        try:
+            writer.write(f'GET {parts.path or "/"}?{query} HTTP/1.1\r\n'
+                         f'Host: {parts.netloc}\r\n'
+                         f'Connection: close\r\n\r\n'.encode('latin-1'))
+            await writer.drain()
+
+            line = (await reader.readline()).decode('latin-1').split()
+            if len(line) < 2 or not line[0].startswith('HTTP/') or not line[1].isdigit():
+                raise ValueError('Invalid HTTP response')
+            if line[1] == '404' or int(line[1]) >= 500:
+                raise ConnectionError(f'HTTP status {line[1]}')
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+if __name__ == '__main__':
+    pass
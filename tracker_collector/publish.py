@@ -0,0 +1,80 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from hashlib import blake2b
+from logging import getLogger
+from os import replace
+from os.path import exists
+
+logger = getLogger(__name__)
+
+
+class Publisher(object):
+    """
+    Write the tracker list atomically, and only when it has changed.
+    以原子方式写入追踪器列表，并且只在其发生变化时写入。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Initialize the Publisher object with the content of the existing file.
+        使用已有文件的内容初始化 Publisher 对象。
+
+        :param file_path: The path of the tracker list.
+                          追踪器列表的路径。
+        """
+        self.file_path = file_path
+        self.content: bytes | None = None
+        self.digest: str | None = None
+        self.trackers: set[str] = set()
+
+        if exists(file_path):
+            with open(file_path, 'rb') as f:
+                self.content = f.read()
+            self.digest = self._digest(self.content)
+            self.trackers = set(self.content.decode('utf-8', 'replace').split('\n')) - {''}
+
+    @staticmethod
+    def _digest(content: bytes) -> str:
+        """
+        Hash the content of the tracker list.
+        计算追踪器列表内容的哈希。
+        """
+        return blake2b(content, digest_size=16).hexdigest()
+
+    def publish(self, trackers: list[str]) -> bool:
+        """
+        Write the trackers, unless the file already has the same content.
+        写入追踪器，除非文件已经具有相同的内容。
+
+        :param trackers: The trackers in the order they are written.
+                         按写入顺序排列的追踪器。
+        :return: Whether the file was written.
+                 文件是否被写入。
+        """
+        content = '\n'.join(trackers).encode('utf-8')
+        digest = self._digest(content)
+        if digest == self.digest:
+            logger.info(f'Trackers in {self.file_path} are unchanged, skip writing')
+            return False
+
+        current = set(trackers)
+        added = len(current - self.trackers)
+        removed = len(self.trackers - current)
+
+        # Readers of the file see either the old or the new list, never a truncated one
+        # 文件的读取者只会看到旧列表或新列表，而不会看到被截断的列表
+        temp = f'{self.file_path}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(content)
+        replace(temp, self.file_path)
+
+        self.content = content
+        self.digest = digest
+        self.trackers = current
+        logger.info(f'Write {len(current)} trackers to {self.file_path}: {added} added, {removed} removed')
+        return True
+
+
+if __name__ == '__main__':
+    pass
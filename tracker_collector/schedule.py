@@ -0,0 +1,212 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from heapq import heappop, heappush
+from logging import getLogger
+from math import floor
+from random import Random, getrandbits
+from time import time
+from typing import Iterable
+
+from metrics import MISSED_RUNS
+
+logger = getLogger(__name__)
+
+# What to do with the runs a source missed because its previous run overran
+# 来源因上一次运行超时而错过的运行的处理方式
+MISSED = ('coalesce', 'skip')
+
+
+class Scheduler(object):
+    """
+    Timer queue of the sources, each with its own refresh interval.
+    来源的定时队列，每个来源都有自己的刷新间隔。
+
+    The interval of a source grows while its trackers stay the same and shrinks when they change, so stable sources
+    are fetched less often and volatile ones more often.
+    来源的追踪器保持不变时其间隔增大，发生变化时间隔缩小，因此稳定的来源被较少地下载，多变的来源被较频繁地下载。
+
+    Runs are due at wall clock slots, offset + k * interval seconds since the epoch, so the time a run takes does not
+    delay the next one and runs line up with other collectors and mirrors using the same interval.
+    运行在墙上时钟的时间槽到期，即纪元以来 offset + k * interval 秒，因此运行耗时不会推迟下一次运行，且运行与使用相同间隔的
+    其他收集器和镜像对齐。
+    """
+
+    def __init__(self, interval: float, minimum: float = None, maximum: float = None, factor: float = 2.0,
+                 offset: float = 0.0, missed: str = 'coalesce', jitter: float = 0.0):
+        """
+        Initialize the Scheduler object.
+        初始化 Scheduler 对象。
+
+        :param interval: The initial refresh interval in seconds.
+                         初始刷新间隔（秒）。
+        :param minimum: The shortest refresh interval in seconds, the initial interval by default.
+                        最短刷新间隔（秒），默认为初始间隔。
+        :param maximum: The longest refresh interval in seconds, the initial interval by default.
+                        最长刷新间隔（秒），默认为初始间隔。
+        :param factor: The interval is multiplied by it when a source is unchanged and divided by it when it changed.
+                       来源未变化时间隔乘以该系数，变化时间隔除以该系数。
+        :param offset: The seconds the slots are shifted from the multiples of the interval since the epoch.
+                       时间槽相对于纪元以来间隔整数倍的偏移秒数。
+        :param missed: coalesce runs the missed runs once immediately, skip waits for the next slot.
+                       coalesce 立即将错过的运行合并为一次运行，skip 等待下一个时间槽。
+        :param jitter: The maximum random delay in seconds added to each slot, so that collectors sharing the same
+                       slots do not fetch the same sources at once.
+                       添加到每个时间槽的最大随机延迟（秒），使共享相同时间槽的收集器不会同时下载相同的来源。
+        """
+        if missed not in MISSED:
+            raise ValueError(f'{missed} is not a valid missed run policy, available: {", ".join(MISSED)}')
+
+        self.interval = interval
+        self.minimum = interval if minimum is None else min(minimum, interval)
+        self.maximum = interval if maximum is None else max(maximum, interval)
+        self.factor = factor
+        self.offset = offset
+        self.missed = missed
+        self.jitter = jitter
+
+        # Seed of the jitter, drawn once so that every source sharing a slot gets the same delay in this instance
+        # 抖动的种子，只抽取一次，使本实例中共享同一时间槽的来源获得相同的延迟
+        self._seed = getrandbits(64)
+
+        # A mapping from source to its refresh interval, its slot and its next due time
+        # 来源到其刷新间隔、时间槽以及下次到期时间的映射
+        self.intervals: dict[str, float] = {}
+        self._slots: dict[str, float] = {}
+        self._due: dict[str, float] = {}
+
+        # Heap of (due time, source), entries that no longer match _due are skipped
+        # (到期时间, 来源) 的堆，与 _due 不再一致的条目会被跳过
+        self._heap: list[tuple[float, str]] = []
+
+    def add(self, source: str, due: float = None):
+        """
+        Add a source, it is due immediately unless a due time is given.
+        添加来源，除非给定到期时间，否则立即到期。
+        """
+        self.intervals.setdefault(source, self.interval)
+        if due is not None:
+            self._slots[source] = due
+        self._push(source, time() if due is None else due)
+
+    def remove(self, source: str):
+        """
+        Forget a source.
+        忘记某个来源。
+        """
+        self.intervals.pop(source, None)
+        self._slots.pop(source, None)
+        self._due.pop(source, None)
+
+    def retain(self, sources: Iterable[str]):
+        """
+        Keep only the given sources and add the new ones.
+        只保留给定的来源，并添加新的来源。
+        """
+        sources = set(sources)
+        for source in self.intervals.keys() - sources:
+            self.remove(source)
+        for source in sources - self.intervals.keys():
+            self.add(source)
+
+    def slot(self, interval: float, after: float) -> float:
+        """
+        Get the first slot of an interval strictly after a time.
+        获取某个间隔在给定时间之后的第一个时间槽。
+        """
+        return self.offset + (floor((after - self.offset) / interval) + 1) * interval
+
+    def delay(self, slot: float) -> float:
+        """
+        Get the random delay of a slot, the same for every source sharing it.
+        获取时间槽的随机延迟，共享该时间槽的来源延迟相同。
+        """
+        if not self.jitter:
+            return 0.0
+        return Random(f'{self._seed}:{slot}').uniform(0.0, self.jitter)
+
+    def _push(self, source: str, due: float):
+        self._due[source] = due
+        heappush(self._heap, (due, source))
+
+    def next_due(self) -> float | None:
+        """
+        Get the earliest due time, or None if there is no source.
+        获取最早的到期时间，若没有来源则返回 None。
+        """
+        while self._heap:
+            due, source = self._heap[0]
+            if self._due.get(source) == due:
+                return due
+            heappop(self._heap)
+        return None
+
+    def due(self, now: float = None) -> list[str]:
+        """
+        Take the sources that are due, they are not due again until they are rescheduled.
+        取出已到期的来源，在重新调度之前它们不会再次到期。
+
+        :param now: The Unix time to compare with, the current time by default.
+                    用于比较的 Unix 时间，默认为当前时间。
+        """
+        now = time() if now is None else now
+        sources = []
+        while (due := self.next_due()) is not None and due <= now:
+            _, source = heappop(self._heap)
+            del self._due[source]
+            sources.append(source)
+        return sources
+
+    def reschedule(self, source: str, changed: bool | None, now: float = None) -> float:
+        """
+        Adapt the interval of a fetched source and schedule its next fetch at the slot following its last one.
+        调整已下载来源的间隔，并将其下次下载安排在上一个时间槽之后的时间槽。
+
+        :param source: The source.
+                       来源。
+        :param changed: Whether the trackers of the source changed, None if it is unknown, e.g. the fetch failed.
+                        来源的追踪器是否发生变化，未知时为 None，例如下载失败。
+        :param now: The Unix time the fetch finished, the current time by default.
+                    下载完成的 Unix 时间，默认为当前时间。
+        :return: The new interval in seconds.
+                 新的间隔（秒）。
+        """
+        now = time() if now is None else now
+        if source not in self.intervals:
+            return self.interval
+
+        interval = self.intervals[source]
+        if changed is True:
+            interval = max(self.minimum, interval / self.factor)
+        elif changed is False:
+            interval = min(self.maximum, interval * self.factor)
+
+        if interval != self.intervals[source]:
+            logger.info(f'Refresh interval of {source} is {interval:.0f} seconds, '
+                        f'{"changed" if changed else "unchanged"} since the last fetch')
+        self.intervals[source] = interval
+
+        # The first fetch of a source is not on a slot, the following ones are.
+        # 来源的首次下载不在时间槽上，之后的下载都在时间槽上。
+        previous = self._slots.get(source)
+        slot = self.slot(interval, now if previous is None else previous)
+
+        if slot <= now:
+            # The run overran one or more slots.
+            # 运行超过了一个或多个时间槽。
+            missed = floor((now - slot) / interval) + 1
+            MISSED_RUNS.inc(missed)
+            if self.missed == 'skip':
+                slot = self.slot(interval, now)
+            else:
+                slot += (missed - 1) * interval
+            logger.warning(f'Fetch of {source} overran and missed {missed} runs, {self.missed} them, '
+                           f'next fetch in {max(0.0, slot - now):.0f} seconds')
+
+        self._slots[source] = slot
+        self._push(source, slot + self.delay(slot))
+        return interval
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,134 @@
+# -*- coding:utf-8 -*-
+# AUTHOR: Sun
+
+from collections import deque
+from json import dump, load
+from logging import getLogger
+from os import replace
+from os.path import exists
+from typing import Iterable
+
+logger = getLogger(__name__)
+
+
+class Scores(object):
+    """
+    Rolling window of probe results per tracker, used to rank the output by success rate and latency.
+    每个追踪器探测结果的滚动窗口，用于按成功率和延迟对输出排序。
+    """
+
+    def __init__(self, window: int = 10, file_path: str = None):
+        """
+        Initialize the Scores object and load it from the sidecar file.
+        初始化 Scores 对象并从附属文件加载。
+
+        :param window: The number of latest probes kept for each tracker.
+                       每个追踪器保留的最近探测次数。
+        :param file_path: The path of the sidecar file, the scores are kept in memory only if it is empty.
+                          附属文件路径，为空时分数仅保存在内存中。
+        """
+        self.window = window
+        self.file_path = file_path
+
+        # A mapping from tracker to its latest round trip times in milliseconds, None for a failed probe
+        # 追踪器到其最近往返时间（毫秒）的映射，探测失败时为 None
+        self._samples: dict[str, deque[float | None]] = {}
+
+        self.load()
+
+    def record(self, latencies: dict[str, float | None]):
+        """
+        Add the results of one probe round.
+        添加一轮探测的结果。
+
+        :param latencies: A mapping from tracker to its round trip time in seconds, or None if it did not respond.
+                          追踪器到其往返时间（秒）的映射，未响应时为 None。
+        """
+        for tracker, latency in latencies.items():
+            samples = self._samples.setdefault(tracker, deque(maxlen=self.window))
+            samples.append(None if latency is None else round(latency * 1000, 1))
+
+    def retain(self, trackers: Iterable[str]):
+        """
+        Forget the trackers that are no longer gathered.
+        忘记不再被收集到的追踪器。
+        """
+        trackers = set(trackers)
+        for tracker in self._samples.keys() - trackers:
+            del self._samples[tracker]
+
+    def score(self, tracker: str) -> tuple[float, float | None]:
+        """
+        Get the score of a tracker.
+        获取追踪器的分数。
+
+        :return: The success rate and the mean round trip time in milliseconds of the successful probes,
+                 (0.0, None) if the tracker has never been probed.
+                 成功率以及成功探测的平均往返时间（毫秒），若追踪器从未被探测则为 (0.0, None)。
+        """
+        samples = self._samples.get(tracker)
+        if not samples:
+            return 0.0, None
+
+        succeeded = [i for i in samples if i is not None]
+        if not succeeded:
+            return 0.0, None
+        return len(succeeded) / len(samples), sum(succeeded) / len(succeeded)
+
+    def rank(self, trackers: Iterable[str]) -> list[str]:
+        """
+        Sort trackers by success rate, then by latency, unprobed trackers come last.
+        按成功率、再按延迟对追踪器排序，未探测的追踪器排在最后。
+        """
+        def key(tracker: str):
+            rate, latency = self.score(tracker)
+            return -rate, latency is None, latency or 0.0, tracker
+
+        return sorted(trackers, key=key)
+
+    def load(self):
+        """
+        Load the samples from the sidecar file.
+        从附属文件加载样本。
+        """
+        if not self.file_path or not exists(self.file_path):
+            return
+
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                entries = load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to load score file {self.file_path}, start with empty scores: {e}')
+            return
+
+        for tracker, entry in entries.items():
+            self._samples[tracker] = deque(entry['samples'], maxlen=self.window)
+        logger.info(f'Load scores of {len(self._samples)} trackers from {self.file_path}')
+
+    def save(self):
+        """
+        Write the scores to the sidecar file, in the same order as the output.
+        将分数写入附属文件，顺序与输出相同。
+        """
+        if not self.file_path:
+            return
+
+        entries = {}
+        for tracker in self.rank(self._samples):
+            rate, latency = self.score(tracker)
+            entries[tracker] = {
+                'success_rate': round(rate, 3),
+                'latency_ms': None if latency is None else round(latency, 1),
+                'samples': list(self._samples[tracker]),
+            }
+
+        temp = f'{self.file_path}.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            dump(entries, f, indent=2)
+        replace(temp, self.file_path)
+
+        logger.debug(f'Save scores of {len(entries)} trackers to {self.file_path}')
+
+
+if __name__ == '__main__':
+    pass
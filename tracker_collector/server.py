@@ -1,11 +1,23 @@
 # -*- coding:utf-8 -*-
 # AUTHOR: Sun
 
-from threading import Thread
+from email.utils import formatdate, parsedate_to_datetime
+from gzip import compress as gzip_compress
+from hashlib import blake2b
+from threading import BoundedSemaphore, Lock, Thread
 from logging import getLogger
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from os import stat
+from re import finditer
+from time import monotonic, perf_counter, time
 
 from config import Config
+from metrics import REGISTRY, REQUEST_SECONDS, REQUESTS
+
+try:
+    from brotli import compress as brotli_compress
+except ImportError:
+    brotli_compress = None
 
 logger = getLogger(__name__)
 
@@ -20,6 +32,255 @@ ENABLE = CONFIG.get('server', 'enable')
 PORT = CONFIG.get('server', 'port')
 REQUIRE_HEADERS = CONFIG.get('server', 'require_headers')
 
+# Serving mode, the maximum number of connections and the idle timeout of keep-alive connections
+# 服务模式、最大连接数以及保持连接的空闲超时
+MODE = CONFIG.get('server', 'mode')
+MAX_CONNECTIONS = CONFIG.get('server', 'max_connections')
+KEEP_ALIVE = CONFIG.get('server', 'keep_alive')
+
+# Max age of the Cache-Control header, 0 makes clients revalidate on every request
+# Cache-Control 头部的 max-age，为 0 时客户端每次请求都需要重新验证
+MAX_AGE = CONFIG.get('server', 'max_age')
+
+# Content codings in order of preference, brotli only when the library is installed
+# 按优先顺序排列的内容编码，仅在安装了 brotli 库时包含 br
+ENCODINGS = ('br', 'gzip', 'identity') if brotli_compress else ('gzip', 'identity')
+
+# Protocols that have their own endpoint
+# 拥有独立端点的协议
+PROTOCOLS = ('udp', 'http', 'https', 'ws', 'wss')
+
+# Minimum number of seconds between two checks of the file's mtime
+# 两次检查文件修改时间之间的最小间隔秒数
+CHECK_INTERVAL = 1.0
+
+
+class Version(object):
+    """
+    One published version of the tracker list, with everything needed to serve it computed once.
+    追踪器列表的一个发布版本，提供服务所需的一切都只计算一次。
+    """
+    __slots__ = ('content', 'mtime', 'etag', 'last_modified', 'variants', 'offsets')
+
+    def __init__(self, content: bytes, mtime: float):
+        """
+        Initialize the Version object.
+        初始化 Version 对象。
+
+        :param content: The tracker list.
+                        追踪器列表。
+        :param mtime: The modification time of the list.
+                      列表的修改时间。
+        """
+        self.content = content
+        self.mtime = mtime
+        self.etag = f'"{blake2b(content, digest_size=16).hexdigest()}"'
+        self.last_modified = formatdate(int(mtime), usegmt=True)
+
+        # Compressed once per version, a coding is only kept if it makes the list smaller
+        # 每个版本只压缩一次，只有能使列表变小的编码才会被保留
+        self.variants: dict[str, bytes] = {'identity': content}
+        compressed = {'gzip': gzip_compress(content, compresslevel=9, mtime=0)}
+        if brotli_compress:
+            compressed['br'] = brotli_compress(content)
+        for encoding, body in compressed.items():
+            if len(body) < len(content):
+                self.variants[encoding] = body
+
+        # The end of each line, so that the first N trackers are a slice of the content
+        # 每行的结束位置，使前 N 个追踪器是内容的一个切片
+        self.offsets = [i.start() for i in finditer(b'\n', content)] + [len(content)]
+
+    def negotiate(self, accept_encoding: str | None) -> str:
+        """
+        Choose the content coding for a request.
+        为请求选择内容编码。
+
+        :param accept_encoding: The Accept-Encoding header.
+                                Accept-Encoding 头部。
+        :return: The most preferred coding accepted by the client, identity if none is.
+                 客户端接受的最优先编码，若都不接受则为 identity。
+        """
+        if not accept_encoding:
+            return 'identity'
+
+        accepted = {}
+        for item in accept_encoding.split(','):
+            coding, _, parameters = item.partition(';')
+            quality = 1.0
+            if parameters.strip().startswith('q='):
+                try:
+                    quality = float(parameters.strip()[2:])
+                except ValueError:
+                    pass
+            accepted[coding.strip().lower()] = quality
+
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return encoding
+        return 'identity'
+
+    def variant(self, encoding: str) -> tuple[bytes, str]:
+        """
+        Get the body and the ETag of a content coding, each coding has its own ETag.
+        获取某个内容编码的响应体和 ETag，每种编码都有自己的 ETag。
+        """
+        if encoding == 'identity':
+            return self.content, self.etag
+        return self.variants[encoding], f'{self.etag[:-1]}-{encoding}"'
+
+    def top(self, count: int) -> tuple[memoryview, str]:
+        """
+        Get the body and the ETag of the first trackers, the list is sorted by quality.
+        获取前若干个追踪器的响应体和 ETag，列表已按质量排序。
+
+        :param count: The number of trackers.
+                      追踪器数量。
+        """
+        end = self.offsets[min(count, len(self.offsets)) - 1]
+        return memoryview(self.content)[:end], f'{self.etag[:-1]}-top{count}"'
+
+    def matches(self, etag: str, if_none_match: str | None, if_modified_since: str | None) -> bool:
+        """
+        Whether the client already has this version.
+        客户端是否已经拥有此版本。
+
+        :param etag: The ETag of the variant being served.
+                     所提供变体的 ETag。
+        :param if_none_match: The If-None-Match header, it takes precedence over If-Modified-Since.
+                              If-None-Match 头部，其优先级高于 If-Modified-Since。
+        :param if_modified_since: The If-Modified-Since header.
+                                  If-Modified-Since 头部。
+        """
+        if if_none_match is not None:
+            tags = [i.strip().removeprefix('W/') for i in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return since.tzinfo is not None and int(self.mtime) <= since.timestamp()
+
+        return False
+
+
+class Snapshot(object):
+    """
+    The tracker list kept in memory as immutable bytes, so that requests are served without file I/O.
+    以不可变字节形式保存在内存中的追踪器列表，使请求无需文件 I/O 即可得到响应。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Initialize the Snapshot object.
+        初始化 Snapshot 对象。
+
+        :param file_path: The path of the tracker list.
+                          追踪器列表的路径。
+        """
+        self.file_path = file_path
+
+        # The versions of the current list by endpoint key, replaced in a single assignment
+        # 当前列表按端点键划分的各个版本，在一次赋值中替换
+        self._views: dict[str, Version] = {}
+        self._checked = float('-inf')
+        self._lock = Lock()
+
+    @staticmethod
+    def build(content: bytes, mtime: float, sources: dict[str, list[str]] = None) -> dict[str, Version]:
+        """
+        Build the version of every endpoint once, so that requests never filter the list.
+        一次性构建每个端点的版本，使请求无需过滤列表。
+
+        :param content: The whole tracker list.
+                        完整的追踪器列表。
+        :param mtime: The modification time of the list.
+                      列表的修改时间。
+        :param sources: The trackers of each source, by the name of its tracker section.
+                        每个来源的追踪器，以其追踪器配置节的名称为键。
+        """
+        protocols: dict[str, list[bytes]] = {i: [] for i in PROTOCOLS}
+        for line in content.split(b'\n'):
+            scheme = line.split(b'://', 1)[0].decode('ascii', 'replace')
+            if scheme in protocols:
+                protocols[scheme].append(line)
+
+        views = {'all': Version(content, mtime)}
+        for protocol, lines in protocols.items():
+            views[protocol] = Version(b'\n'.join(lines), mtime)
+        for name, trackers in (sources or {}).items():
+            views[f'source/{name}'] = Version('\n'.join(trackers).encode('utf-8'), mtime)
+        return views
+
+    def update(self, content: bytes, sources: dict[str, list[str]] = None):
+        """
+        Swap in the content the collector has just written.
+        换入收集器刚刚写入的内容。
+
+        :param content: The whole tracker list.
+                        完整的追踪器列表。
+        :param sources: The trackers of each source, in the same order as the list.
+                        每个来源的追踪器，顺序与列表相同。
+        """
+        try:
+            mtime = stat(self.file_path).st_mtime
+        except OSError:
+            mtime = time()
+        views = self.build(content, mtime, sources)
+
+        # A reload that read the file before it was written must not swap the old list back in, so wait for it
+        # and postpone the next check
+        # 在文件写入之前读取文件的重新加载不能将旧列表换回，因此等待其完成并推迟下一次检查
+        with self._lock:
+            self._views = views
+            self._checked = monotonic()
+        logger.debug(f'Swap in {len(content)} bytes of trackers')
+
+    def get(self, key: str = 'all') -> Version | None:
+        """
+        Get the current version of an endpoint, reloading the file if it was changed by another process.
+        获取某个端点的当前版本，若文件被其他进程修改则重新加载。
+
+        :param key: all, a protocol, or source/<name>.
+                    all、某个协议或 source/<名称>。
+        :return: The version, or None if the file or the source does not exist.
+                 版本，若文件或来源不存在则返回 None。
+        """
+        if monotonic() - self._checked >= CHECK_INTERVAL and self._lock.acquire(blocking=False):
+            # Only one request checks the file, the others keep serving the current version
+            # 只有一个请求检查文件，其他请求继续使用当前版本
+            try:
+                self._checked = monotonic()
+                self._reload()
+            finally:
+                self._lock.release()
+
+        return self._views.get(key)
+
+    def _reload(self):
+        """
+        Read the file if its mtime has changed, the caller holds the lock.
+        若文件的修改时间发生变化则读取文件，调用者持有锁。
+        """
+        try:
+            mtime = stat(self.file_path).st_mtime
+            if self._views and mtime == self._views['all'].mtime:
+                return
+            with open(self.file_path, 'rb') as f:
+                # The sources are only known to the collector
+                # 来源只有收集器知道
+                self._views = self.build(f.read(), mtime)
+        except FileNotFoundError:
+            self._views = {}
+            return
+
+        logger.debug(f'Reload {self.file_path} after it was modified')
+
+
+SNAPSHOT = Snapshot(FILE_PATH)
+
 
 class HTTPRequestHandler(BaseHTTPRequestHandler):
     """
@@ -31,13 +292,34 @@ class HTTPRequestHandler(BaseHTTPRequestHandler):
         Process GET requests
         处理GET请求
         """
+        # The route and the status are labels of the request metrics
+        # 路由和状态码是请求指标的标签
+        start = perf_counter()
+        self.endpoint = 'unknown'
+        self.status = 0
         try:
             self.get_method()
+        except ConnectionError as e:
+            # The client went away, there is nobody to send an error to
+            # 客户端已断开，无法再发送错误
+            logger.debug(f'Client {self.client_address} disconnected: {e}')
+            self.close_connection = True
         except Exception as e:
             # Record the error
             # 记录错误
             logger.error(e, exc_info=True)
             self.send_error(500)
+        finally:
+            REQUEST_SECONDS.observe(perf_counter() - start, path=self.endpoint)
+            REQUESTS.inc(path=self.endpoint, status=self.status)
+
+    def send_response(self, code: int, message: str = None):
+        """
+        Remember the status code of the response
+        记录响应的状态码
+        """
+        self.status = code
+        super().send_response(code, message)
 
     def get_method(self):
         """
@@ -53,25 +335,102 @@ class HTTPRequestHandler(BaseHTTPRequestHandler):
 
         # Check whether the path is legal
         # 检查路径是否合法
-        if self.path not in ('/', '/all', f'/{FILE_PATH}'):
+        route = self.route(self.path.split('?', 1)[0])
+        if route is None:
             self.send_error(404)
             return
 
+        key, top = route
+        self.endpoint = 'top' if top else key.split('/', 1)[0]
+        if key == 'metrics':
+            self.send_metrics()
+            return
+
+        version = SNAPSHOT.get(key)
+        if version is None:
+            self.send_error(404)
+            if key == 'all':
+                logger.error(f'File {FILE_PATH} not found')
+            return
+
+        if top:
+            # A slice of the list, which is sorted by quality
+            # 列表的一个切片，列表已按质量排序
+            encoding = 'identity'
+            body, etag = version.top(top)
+        else:
+            # Choose the precompressed variant
+            # 选择预先压缩的变体
+            encoding = version.negotiate(self.headers.get('Accept-Encoding'))
+            body, etag = version.variant(encoding)
+
+        # The client already has this version
+        # 客户端已经拥有此版本
+        if version.matches(etag, self.headers.get('If-None-Match'), self.headers.get('If-Modified-Since')):
+            self.send_response(304)
+            self.send_validators(version, etag)
+            self.end_headers()
+            return
+
         # Send response header
         # 发送响应头
         self.send_response(200)
-        self.send_header('Content-type', 'text/html')
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_validators(version, etag)
         self.end_headers()
 
-        try:
-            # Read the file and send the content
-            # 读取文件并发送内容
-            with open(FILE_PATH, 'rb') as f:
-                contents = f.read()
-            self.wfile.write(contents)
-        except FileNotFoundError:
-            self.send_error(404)
-            logger.error(f'File {FILE_PATH} not found')
+        # Send the content kept in memory
+        # 发送保存在内存中的内容
+        self.wfile.write(body)
+
+    @staticmethod
+    def route(path: str) -> tuple[str, int | None] | None:
+        """
+        Map a path to the key of its version and the number of top trackers
+        将路径映射到其版本的键以及排名靠前的追踪器数量
+
+        :return: The key and the number of trackers (None for the whole version), or None for an unknown path
+                 键以及追踪器数量（None 表示整个版本），未知路径返回 None
+        """
+        if path in ('/', '/all', f'/{FILE_PATH}'):
+            return 'all', None
+        if path == '/metrics':
+            return 'metrics', None
+
+        parts = path.strip('/').split('/')
+        if len(parts) == 1 and parts[0] in PROTOCOLS:
+            return parts[0], None
+        if len(parts) == 2 and parts[0] == 'source' and parts[1]:
+            return f'source/{parts[1]}', None
+        if len(parts) == 2 and parts[0] == 'top' and parts[1].isdigit() and int(parts[1]) > 0:
+            return 'all', int(parts[1])
+        return None
+
+    def send_metrics(self):
+        """
+        Send the metrics in the Prometheus text exposition format
+        以 Prometheus 文本展示格式发送指标
+        """
+        body = REGISTRY.render()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_validators(self, version: Version, etag: str):
+        """
+        Send the headers that let clients and caches revalidate their copy
+        发送使客户端和缓存能够重新验证其副本的头部
+        """
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', version.last_modified)
+        self.send_header('Cache-Control', f'public, max-age={MAX_AGE}' if MAX_AGE else 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
 
     def log_message(self, format_: str, *args) -> None:
         """
@@ -81,6 +440,70 @@ class HTTPRequestHandler(BaseHTTPRequestHandler):
         logger.info(format_ % args)
 
 
+class KeepAliveHTTPRequestHandler(HTTPRequestHandler):
+    """
+    HTTP/1.1 request handler that keeps the connection open between requests
+    在请求之间保持连接的 HTTP/1.1 请求处理器
+    """
+    protocol_version = 'HTTP/1.1'
+
+    # Idle connections are closed after this many seconds
+    # 空闲连接在此秒数后关闭
+    timeout = KEEP_ALIVE or None
+
+
+class LimitedThreadingHTTPServer(ThreadingHTTPServer):
+    """
+    Server handling each connection in its own thread, with a limited number of connections
+    每个连接在单独线程中处理、并限制连接数量的服务器
+    """
+
+    def __init__(self, server_address: tuple, handler: type[BaseHTTPRequestHandler],
+                 max_connections: int = MAX_CONNECTIONS):
+        self._slots = BoundedSemaphore(max_connections)
+        super().__init__(server_address, handler)
+
+    def process_request(self, request, client_address):
+        """
+        Wait for a free slot before starting the thread, further connections wait in the listen backlog
+        在启动线程前等待空闲名额，其余连接在监听队列中等待
+        """
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        """
+        Serve the connection and free its slot
+        处理连接并释放其名额
+        """
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+def create_server(server_address: tuple, mode: str = MODE) -> HTTPServer:
+    """
+    Create the server of a serving mode
+    创建指定服务模式的服务器
+
+    :param server_address: The address to listen on
+                           监听的地址
+    :param mode: single (one connection at a time) or thread (concurrent keep-alive connections)
+                 single（同一时间一个连接）或 thread（并发的保持连接）
+    """
+    if mode == 'single':
+        return HTTPServer(server_address, HTTPRequestHandler)
+
+    if mode != 'thread':
+        logger.warning(f'Server mode {mode} is not recognized, use default mode: thread')
+    return LimitedThreadingHTTPServer(server_address, KeepAliveHTTPRequestHandler)
+
+
 class Run(Thread):
     """
     Define the server thread class
@@ -103,8 +526,8 @@ class Run(Thread):
         运行服务器
         """
         server_address = ('', PORT)
-        httpd = HTTPServer(server_address, HTTPRequestHandler)
-        logger.info(f'Server running on port {PORT}')
+        httpd = create_server(server_address)
+        logger.info(f'Server running on port {PORT} in {MODE} mode')
         logger.warning('This server can only be used in intranet, please do not expose it to the Internet!')
         httpd.serve_forever()
 